@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+CATEGORY_SHARD_SEPARATOR = "__"
+
+
+def category_shards_path(db_path: Path, collection_name: str) -> Path:
+    # 分片清单与向量索引放在同一根目录下，随快照一起复制
+    return Path(db_path) / f"{collection_name}.shards.json"
+
+
+def shard_collection_name(collection_name: str, job_code: str, job_category: str) -> str:
+    # Chroma 集合名只允许 ASCII，按 job_code 命名；缺少 job_code 时用类别名的哈希
+    code = job_code or hashlib.sha1(job_category.encode("utf-8")).hexdigest()[:10]
+    return f"{collection_name}{CATEGORY_SHARD_SEPARATOR}{code}"
+
+
+def load_category_shards(db_path: Path, collection_name: str) -> Dict[str, Dict[str, Any]]:
+    """读取分片清单：job_category -> {"collection", "job_code", "count"}，不存在时返回空字典"""
+    path = category_shards_path(db_path, collection_name)
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)["shards"]
+
+
+def save_category_shards(db_path: Path, collection_name: str, shards: Dict[str, Dict[str, Any]]) -> None:
+    path = category_shards_path(db_path, collection_name)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump({"collection": collection_name, "shards": shards}, handle, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class CategoryShardedWriter:
+    """
+    在全局集合之外按 job_category 维护分片集合，接口与 chromadb Collection 的写入方法一致
+
+    写入同时进入全局集合与所属类别的分片；读取（get/count）只走全局集合。
+    类别过滤查询直接检索对应分片，耗时只与该类别的岗位数有关，而不是整个目录的规模。
+    """
+
+    def __init__(
+        self,
+        collection,
+        collection_name: str,
+        open_shard: Callable[[str], Any],
+        shards: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        self.collection = collection
+        self.collection_name = collection_name
+        self._open_shard = open_shard
+        self.shards: Dict[str, Dict[str, Any]] = dict(shards or {})
+        self._collections: Dict[str, Any] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        # 未覆盖的方法（get、count 等）直接转发给全局集合
+        return getattr(self.collection, name)
+
+    def shard(self, job_category: str, job_code: str = "") -> Any:
+        if job_category not in self.shards:
+            self.shards[job_category] = {
+                "collection": shard_collection_name(self.collection_name, job_code, job_category),
+                "job_code": job_code,
+            }
+        if job_category not in self._collections:
+            self._collections[job_category] = self._open_shard(self.shards[job_category]["collection"])
+        return self._collections[job_category]
+
+    def add(self, ids: List[str], embeddings, metadatas: List[Dict[str, Any]], documents=None) -> None:
+        self.collection.add(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+        self._write_shards(ids, embeddings, metadatas, documents)
+
+    def upsert(self, ids: List[str], embeddings, metadatas: List[Dict[str, Any]], documents=None) -> None:
+        # 重新编码的岗位类别可能变化，先从所有分片移除再写入新类别
+        self.collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+        self._delete_from_shards(ids)
+        self._write_shards(ids, embeddings, metadatas, documents)
+
+    def update(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        self.collection.update(ids=ids, metadatas=metadatas)
+        for job_category, rows in self._group(metadatas).items():
+            shard = self.shard(job_category, metadatas[rows[0]].get("job_code", ""))
+            group_ids = [ids[row] for row in rows]
+            present = set(shard.get(ids=group_ids, include=[])["ids"])
+            in_place = [row for row in rows if ids[row] in present]
+            if in_place:
+                shard.update(ids=[ids[row] for row in in_place], metadatas=[metadatas[row] for row in in_place])
+            moved = [ids[row] for row in rows if ids[row] not in present]
+            if moved:
+                # 类别变化：向量从全局集合取回，移动到新分片
+                stored = self.collection.get(ids=moved, include=["embeddings", "documents", "metadatas"])
+                self._delete_from_shards(stored["ids"])
+                shard.add(
+                    ids=stored["ids"],
+                    embeddings=stored["embeddings"],
+                    metadatas=stored["metadatas"],
+                    documents=stored["documents"],
+                )
+
+    def delete(self, ids: List[str]) -> None:
+        self.collection.delete(ids=ids)
+        self._delete_from_shards(ids)
+
+    def finish(self) -> Dict[str, Dict[str, Any]]:
+        # 返回要写入清单的分片信息；空分片也保留在清单里，下次增量构建继续维护
+        for job_category in list(self.shards):
+            self.shards[job_category]["count"] = self.shard(job_category).count()
+        return self.shards
+
+    def _group(self, metadatas: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        groups: Dict[str, List[int]] = {}
+        for row, metadata in enumerate(metadatas):
+            job_category = metadata.get("job_category") or ""
+            if job_category:
+                groups.setdefault(job_category, []).append(row)
+        return groups
+
+    def _write_shards(self, ids: List[str], embeddings, metadatas, documents) -> None:
+        for job_category, rows in self._group(metadatas).items():
+            shard = self.shard(job_category, metadatas[rows[0]].get("job_code", ""))
+            shard.add(
+                ids=[ids[row] for row in rows],
+                embeddings=[embeddings[row] for row in rows],
+                metadatas=[metadatas[row] for row in rows],
+                documents=[documents[row] for row in rows] if documents is not None else None,
+            )
+
+    def _delete_from_shards(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        if ids:
+            for job_category in list(self.shards):
+                self.shard(job_category).delete(ids=ids)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_DOCUMENT_CACHE_PATH = Path(__file__).resolve().parent / "embedding_cache.sqlite"
+_SQLITE_MAX_PARAMS = 900
+
+
+class DocumentEmbeddingCache:
+    """建索引用的岗位向量磁盘缓存：以 sha256(模型|维度|文档) 为键，语料不变时重建索引无需再跑模型"""
+
+    def __init__(self, path: Path, model_name: str, embedding_dim: int) -> None:
+        self.path = Path(path)
+        self.model_name = model_name
+        self.embedding_dim = int(embedding_dim)
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 流水线构建时编码与写入线程都会访问，连接跨线程共享并用锁串行化
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    def make_key(self, document: str) -> str:
+        raw = f"{self.model_name}|{self.embedding_dim}|{document}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_many(self, documents: Sequence[str]) -> List[Optional[np.ndarray]]:
+        # 批量查询，未命中的位置返回 None
+        keys = [self.make_key(document) for document in documents]
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), _SQLITE_MAX_PARAMS):
+                chunk = keys[start : start + _SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk)
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    if vector.shape[0] == self.embedding_dim:
+                        found[key] = vector
+            results = [found.get(key) for key in keys]
+            hit_count = sum(vector is not None for vector in results)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, documents: Sequence[str], embeddings: np.ndarray) -> None:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        rows = [(self.make_key(document), embeddings[i].tobytes()) for i, document in enumerate(documents)]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "path": str(self.path),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
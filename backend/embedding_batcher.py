@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_MAX_BATCH_SIZE = 16
+DEFAULT_MAX_WAIT_MS = 10.0
+
+
+class _EncodeRequest:
+    __slots__ = ("text", "future")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.future: Future = Future()
+
+
+class EmbeddingBatcher:
+    """微批调度器：在短时间窗口内收集并发的单条 encode 请求，合并为一个批次编码后再分发结果"""
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    ) -> None:
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self._queue: queue.Queue[Optional[_EncodeRequest]] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, text: str) -> Future:
+        request = _EncodeRequest(text)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("embedding batcher is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="embedding-batcher", daemon=True)
+                self._thread.start()
+        self._queue.put(request)
+        return request.future
+
+    def encode(self, text: str) -> List[float]:
+        return self.submit(text).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self.batches,
+                "items": self.items,
+                "largest_batch": self.largest_batch,
+                "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "queued": self._queue.qsize(),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        self._queue.put(None)
+        if thread is not None:
+            thread.join()
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            stop = self._collect(batch)
+            self._run(batch)
+            if stop:
+                return
+
+    def _collect(self, batch: List[_EncodeRequest]) -> bool:
+        # 以第一条请求到达为起点，等待至多 max_wait 或凑满 max_batch_size
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return False
+            if request is None:
+                return True
+            batch.append(request)
+        return False
+
+    def _run(self, batch: List[_EncodeRequest]) -> None:
+        # 按文本长度排序，使相邻文本长度接近，减少 padding
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        batch.sort(key=lambda request: len(request.text))
+        try:
+            vectors = self.encode_fn([request.text for request in batch])
+        except Exception as exc:
+            for request in batch:
+                request.future.set_exception(exc)
+            return
+
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+        for request, vector in zip(batch, vectors):
+            request.future.set_result(vector)
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import queue
+import threading
+import traceback
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+_READY_TIMEOUT_SECONDS = 600
+_POLL_SECONDS = 1.0
+
+
+def _worker_main(
+    worker_id: int,
+    model_name: str,
+    device: str,
+    local_only: bool,
+    quantize: str,
+    num_threads: int,
+    tasks: mp.Queue,
+    results: mp.Queue,
+) -> None:
+    # 子进程：限定 torch 线程数后加载独立的模型副本，循环处理分到的批次
+    import torch
+
+    from backend.job_index import load_embedding_model
+
+    torch.set_num_threads(max(1, num_threads))
+    try:
+        model = load_embedding_model(model_name=model_name, device=device, local_only=local_only, quantize=quantize)
+    except Exception:
+        results.put(("error", worker_id, traceback.format_exc()))
+        return
+    info = (model.get_sentence_embedding_dimension(), getattr(model, "max_seq_length", None))
+    results.put(("ready", worker_id, info))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        seq, documents, batch_size = task
+        try:
+            with torch.no_grad():
+                embeddings = model.encode(
+                    documents,
+                    batch_size=batch_size,
+                    normalize_embeddings=True,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                )
+            results.put(("done", seq, embeddings.astype(np.float32, copy=False)))
+        except Exception:
+            results.put(("error", seq, traceback.format_exc()))
+
+
+class EncodePool:
+    """
+    多进程 CPU 编码池：每个进程持有独立模型副本与独立的 torch 线程数
+
+    encode 把文档按 batch_size 切块后轮询（round-robin）分发给各进程，再按原顺序拼回，
+    接口与 SentenceTransformer.encode 保持一致，可直接替换 add_job_batch / encode_documents 中的 model。
+    encode 可以被多个线程同时调用：分发在锁内完成，结果按批次序号交给发起调用的线程。
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int,
+        threads_per_worker: int = 1,
+        device: str = "cpu",
+        local_only: bool = True,
+        quantize: str = "none",
+    ) -> None:
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        if device != "cpu":
+            raise ValueError(f"EncodePool only supports cpu, got device={device}")
+        self.workers = workers
+        self.threads_per_worker = max(1, threads_per_worker)
+        self._next_worker = 0
+        self._seq = 0
+        self._closed = False
+        self._dispatch_lock = threading.Lock()
+        # 同一时刻只有一个线程读结果队列，读到的结果放入 _finished 后唤醒所有等待者
+        self._results_ready = threading.Condition()
+        self._finished: Dict[int, tuple] = {}
+        self._draining = False
+
+        # spawn 避免 fork 已初始化 torch 线程池的父进程
+        context = mp.get_context("spawn")
+        self._results: mp.Queue = context.Queue()
+        self._tasks: List[mp.Queue] = [context.Queue() for _ in range(workers)]
+        self._processes = [
+            context.Process(
+                target=_worker_main,
+                args=(
+                    worker_id,
+                    model_name,
+                    device,
+                    local_only,
+                    quantize,
+                    self.threads_per_worker,
+                    self._tasks[worker_id],
+                    self._results,
+                ),
+                name=f"encode-worker-{worker_id}",
+                daemon=True,
+            )
+            for worker_id in range(workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        self.embedding_dim: Optional[int] = None
+        self.max_seq_length: Optional[int] = None
+        try:
+            for _ in range(workers):
+                kind, worker_id, payload = self._get_result(timeout=_READY_TIMEOUT_SECONDS)
+                if kind == "error":
+                    raise RuntimeError(f"Encode worker {worker_id} failed to load model:\n{payload}")
+                self.embedding_dim, self.max_seq_length = payload
+        except BaseException:
+            self.close()
+            raise
+
+    def get_sentence_embedding_dimension(self) -> Optional[int]:
+        return self.embedding_dim
+
+    def encode(self, sentences: Sequence[str], batch_size: int = 32, **_: Any) -> np.ndarray:
+        # 其余参数（normalize_embeddings 等）与建索引时的固定取值一致，子进程内已写死
+        if self._closed:
+            raise RuntimeError("encode pool is closed")
+        documents = list(sentences)
+        if not documents:
+            return np.zeros((0, self.embedding_dim or 0), dtype=np.float32)
+
+        batch_size = max(1, batch_size)
+        seqs: List[int] = []
+        with self._dispatch_lock:
+            for start in range(0, len(documents), batch_size):
+                seq = self._seq
+                self._seq += 1
+                self._tasks[self._next_worker].put((seq, documents[start : start + batch_size], batch_size))
+                self._next_worker = (self._next_worker + 1) % self.workers
+                seqs.append(seq)
+
+        results = self._collect(seqs)
+        for seq in seqs:
+            kind, _, payload = results[seq]
+            if kind == "error":
+                raise RuntimeError(f"Encode worker failed on batch {seq}:\n{payload}")
+        return np.concatenate([results[seq][2] for seq in seqs], axis=0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "threads_per_worker": self.threads_per_worker,
+            "alive": sum(process.is_alive() for process in self._processes),
+            "batches": self._seq,
+        }
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+    def __enter__(self) -> "EncodePool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _collect(self, seqs: List[int]) -> Dict[int, tuple]:
+        # 取回本次调用的所有批次；其他线程的结果留在 _finished 里由它们自己取走，不会被丢弃
+        collected: Dict[int, tuple] = {}
+        remaining = set(seqs)
+        while remaining:
+            with self._results_ready:
+                for seq in [seq for seq in remaining if seq in self._finished]:
+                    collected[seq] = self._finished.pop(seq)
+                    remaining.discard(seq)
+                if not remaining:
+                    break
+                if self._draining:
+                    self._results_ready.wait(timeout=_POLL_SECONDS)
+                    self._check_workers()
+                    continue
+                self._draining = True
+            result = None
+            try:
+                result = self._get_result()
+            finally:
+                with self._results_ready:
+                    self._draining = False
+                    if result is not None:
+                        self._finished[result[1]] = result
+                    self._results_ready.notify_all()
+        return collected
+
+    def _check_workers(self) -> None:
+        # close 之前任何子进程退出（包括正常退出码）都意味着分给它的批次不会再有结果
+        dead = [process.name for process in self._processes if process.exitcode is not None]
+        if dead and not self._closed:
+            raise RuntimeError(f"Encode worker exited unexpectedly: {', '.join(dead)}")
+
+    def _get_result(self, timeout: Optional[float] = None) -> tuple:
+        # 轮询结果队列，期间检查子进程是否异常退出，避免主进程无限等待
+        waited = 0.0
+        while True:
+            try:
+                return self._results.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                waited += _POLL_SECONDS
+            self._check_workers()
+            if timeout is not None and waited >= timeout:
+                raise TimeoutError("Timed out waiting for encode workers")
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+DEFAULT_PIPELINE_QUEUE_SIZE = 4
+PIPELINE_STAGES = ("parse", "encode", "write")
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+class StageStats:
+    """单个流水线阶段的吞吐与队列深度统计"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.queue_depth_total = 0
+        self.max_queue_depth = 0
+
+    def record(self, items: int, seconds: float, queue_depth: int) -> None:
+        self.batches += 1
+        self.items += items
+        self.busy_seconds += seconds
+        self.queue_depth_total += queue_depth
+        self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def as_dict(self, wall_seconds: float) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "busy_s": round(self.busy_seconds, 3),
+            "items_per_s": round(self.items / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+            "utilization": round(self.busy_seconds / wall_seconds, 3) if wall_seconds else 0.0,
+            "avg_queue": round(self.queue_depth_total / self.batches, 2) if self.batches else 0.0,
+            "max_queue": self.max_queue_depth,
+        }
+
+
+def run_pipeline(
+    source: Iterable[Any],
+    encode: Callable[[Any], Any],
+    write: Callable[[Any], None],
+    size_of: Callable[[Any], int],
+    queue_size: int = DEFAULT_PIPELINE_QUEUE_SIZE,
+) -> Dict[str, Dict[str, float]]:
+    """
+    三段流水线：解析线程 -> 编码（调用线程）-> 写入线程，阶段之间用有界队列背压
+
+    编码留在调用线程，模型始终只在一个线程里推理；任一阶段抛错会让其它阶段尽快退出，
+    并在调用线程重新抛出。queue_depth 记录的是该阶段取批次时输入队列里积压的批次数
+    （解析阶段为放入时输出队列的深度），编码阶段队列长期为空说明瓶颈在解析，长期满说明瓶颈在编码。
+
+    Returns:
+        各阶段统计与端到端吞吐
+    """
+    parsed: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    encoded: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    stats = {name: StageStats(name) for name in PIPELINE_STAGES}
+    errors: List[BaseException] = []
+    stop = threading.Event()
+
+    def put(target: queue.Queue, item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(source_queue: queue.Queue) -> Any:
+        while not stop.is_set():
+            try:
+                return source_queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def fail(exc: BaseException) -> None:
+        errors.append(exc)
+        stop.set()
+
+    def parse_stage() -> None:
+        try:
+            iterator = iter(source)
+            while True:
+                start = time.perf_counter()
+                batch = next(iterator, _DONE)
+                if batch is _DONE:
+                    break
+                stats["parse"].record(size_of(batch), time.perf_counter() - start, parsed.qsize())
+                if not put(parsed, batch):
+                    return
+            put(parsed, _DONE)
+        except BaseException as exc:
+            fail(exc)
+
+    def write_stage() -> None:
+        try:
+            while True:
+                depth = encoded.qsize()
+                batch = get(encoded)
+                if batch is _DONE:
+                    return
+                start = time.perf_counter()
+                write(batch)
+                stats["write"].record(size_of(batch), time.perf_counter() - start, depth)
+        except BaseException as exc:
+            fail(exc)
+
+    wall_start = time.perf_counter()
+    parser = threading.Thread(target=parse_stage, name="index-parse", daemon=True)
+    writer = threading.Thread(target=write_stage, name="index-write", daemon=True)
+    parser.start()
+    writer.start()
+    try:
+        while True:
+            depth = parsed.qsize()
+            batch = get(parsed)
+            if batch is _DONE:
+                break
+            start = time.perf_counter()
+            batch = encode(batch)
+            stats["encode"].record(size_of(batch), time.perf_counter() - start, depth)
+            if not put(encoded, batch):
+                break
+        put(encoded, _DONE)
+    except BaseException as exc:
+        fail(exc)
+    finally:
+        parser.join()
+        writer.join()
+    if errors:
+        raise errors[0]
+
+    wall = time.perf_counter() - wall_start
+    report: Dict[str, Dict[str, float]] = {name: stage.as_dict(wall) for name, stage in stats.items()}
+    written = stats["write"].items
+    report["total"] = {
+        "items": written,
+        "wall_s": round(wall, 3),
+        "items_per_s": round(written / wall, 1) if wall else 0.0,
+    }
+    return report
+
+
+def format_pipeline_report(report: Dict[str, Dict[str, float]]) -> str:
+    lines = []
+    for name in PIPELINE_STAGES:
+        stage = report[name]
+        lines.append(
+            f"  {name:<7} {stage['items']} items, {stage['items_per_s']:.1f}/s busy, "
+            f"utilization {stage['utilization']:.0%}, queue avg {stage['avg_queue']} max {stage['max_queue']}"
+        )
+    total = report["total"]
+    lines.append(
+        f"  total   {total['items']} items in {total['wall_s']:.1f}s ({total['items_per_s']:.1f}/s end-to-end)"
+    )
+    return "\n".join(lines)
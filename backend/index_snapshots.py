@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+SNAPSHOT_VERSIONS_DIR = "versions"
+SNAPSHOT_MANIFEST_FILE = "snapshot.json"
+CURRENT_POINTER_FILE = "current"
+DEFAULT_KEEP_SNAPSHOTS = 3
+DEFAULT_SNAPSHOT_POLL_SECONDS = 5.0
+
+
+def new_snapshot_version(root: Path) -> str:
+    # 以 UTC 时间命名，字典序即时间序；同一秒内重复构建时追加序号
+    base = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    version, suffix = base, 1
+    while snapshot_path(root, version).exists():
+        suffix += 1
+        version = f"{base}-{suffix}"
+    return version
+
+
+def snapshot_path(root: Path, version: str) -> Path:
+    return Path(root) / SNAPSHOT_VERSIONS_DIR / version
+
+
+def read_current_version(root: Path) -> Optional[str]:
+    try:
+        version = (Path(root) / CURRENT_POINTER_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def read_snapshot_manifest(root: Path, version: str) -> Dict[str, Any]:
+    path = snapshot_path(root, version) / SNAPSHOT_MANIFEST_FILE
+    if not path.exists():
+        return {"version": version}
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def list_snapshots(root: Path) -> List[str]:
+    versions_dir = Path(root) / SNAPSHOT_VERSIONS_DIR
+    if not versions_dir.exists():
+        return []
+    return sorted(path.name for path in versions_dir.iterdir() if path.is_dir())
+
+
+def publish_snapshot(root: Path, version: str, manifest: Dict[str, Any]) -> None:
+    """写入版本清单后原子地切换 current 指针，运行中的后端轮询到变化后热切换"""
+    directory = snapshot_path(root, version)
+    tmp_manifest = directory / (SNAPSHOT_MANIFEST_FILE + ".tmp")
+    with open(tmp_manifest, "w", encoding="utf-8") as handle:
+        json.dump({"version": version, **manifest}, handle, ensure_ascii=False, indent=2)
+    os.replace(tmp_manifest, directory / SNAPSHOT_MANIFEST_FILE)
+
+    pointer = Path(root) / CURRENT_POINTER_FILE
+    tmp_pointer = pointer.with_name(pointer.name + ".tmp")
+    tmp_pointer.write_text(version, encoding="utf-8")
+    os.replace(tmp_pointer, pointer)
+
+
+def prune_snapshots(root: Path, keep: int = DEFAULT_KEEP_SNAPSHOTS) -> List[str]:
+    # 只保留最近 keep 个版本，当前版本永不删除；保留多个版本给仍在排空旧版本的进程留出余量
+    current = read_current_version(root)
+    versions = list_snapshots(root)
+    removable = [version for version in versions[: max(0, len(versions) - keep)] if version != current]
+    for version in removable:
+        shutil.rmtree(snapshot_path(root, version), ignore_errors=True)
+    return removable
+
+
+class IndexSnapshot:
+    """一个已打开的索引版本，带引用计数：被替换后等进行中的查询全部结束再关闭"""
+
+    def __init__(
+        self,
+        version: Optional[str],
+        path: Path,
+        store: Any,
+        lexical: Any,
+        manifest: Dict[str, Any],
+        jobs: Any = None,
+        signature: Any = None,
+    ) -> None:
+        self.version = version
+        self.path = path
+        self.signature = signature
+        self.store = store
+        self.lexical = lexical
+        self.jobs = jobs
+        self.manifest = manifest
+        self.loaded_at = time.time()
+        self._leases = 0
+        self._retired = False
+        self._lock = threading.Lock()
+
+    @property
+    def leases(self) -> int:
+        with self._lock:
+            return self._leases
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._leases += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._leases -= 1
+            drained = self._retired and self._leases == 0
+        if drained:
+            self._close()
+
+    def retire(self) -> None:
+        with self._lock:
+            self._retired = True
+            drained = self._leases == 0
+        if drained:
+            self._close()
+
+    def _close(self) -> None:
+        for resource in (self.store, self.jobs):
+            close = getattr(resource, "close", None)
+            if close is not None:
+                close()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "path": str(self.path),
+            "loaded_at": self.loaded_at,
+            "leases": self.leases,
+            "jobs": self.store.count(),
+            "stored_jobs": len(self.jobs) if self.jobs is not None else None,
+            "manifest": self.manifest,
+        }
+
+
+class IndexManager:
+    """
+    管理当前服务的索引版本
+
+    root 下存在 current 指针时服务 versions/<current>，否则按旧布局直接服务 root。
+    后台线程按 poll_seconds 轮询指针，发现新版本后先在锁外完整加载，再原子替换；
+    signature(path) 返回索引文件的指纹，旧布局原地重建（指针不变）时据此发现变化并重新打开；
+    查询通过 lease() 持有所用版本，旧版本在最后一个查询结束后关闭，切换过程不阻塞请求。
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        opener: Callable[[Path], Tuple[Any, Any, Any]],
+        poll_seconds: float = DEFAULT_SNAPSHOT_POLL_SECONDS,
+        signature: Optional[Callable[[Path], Any]] = None,
+    ) -> None:
+        self.root = Path(root)
+        self.opener = opener
+        self.signature = signature
+        self.poll_seconds = poll_seconds
+        self.swaps = 0
+        self.last_error: Optional[str] = None
+        self._failed: Optional[Tuple[Optional[str], Any]] = None
+        self._active: Optional[IndexSnapshot] = None
+        self._draining: List[IndexSnapshot] = []
+        self._swap_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def current(self) -> IndexSnapshot:
+        with self._swap_lock:
+            active = self._active
+        if active is None:
+            self.refresh()
+            with self._swap_lock:
+                active = self._active
+        return active
+
+    @contextmanager
+    def lease(self) -> Iterator[IndexSnapshot]:
+        # 取快照与加引用在同一把锁内完成，保证拿到的版本不会在使用中被关闭
+        with self._swap_lock:
+            snapshot = self._active
+            if snapshot is not None:
+                snapshot.acquire()
+        if snapshot is None:
+            self.refresh()
+            with self._swap_lock:
+                snapshot = self._active
+                snapshot.acquire()
+        try:
+            yield snapshot
+        finally:
+            snapshot.release()
+
+    def refresh(self, force: bool = False) -> bool:
+        """指针指向的版本或索引文件指纹与当前不同时加载并切换，返回是否发生了切换；加载失败过的版本只在 force 时重试"""
+        with self._load_lock:
+            version = read_current_version(self.root)
+            path = snapshot_path(self.root, version) if version else self.root
+            signature = self.signature(path) if self.signature is not None else None
+            active = self._active
+            if active is not None and (active.version, active.signature) == (version, signature):
+                return False
+            if active is not None and (version, signature) == self._failed and not force:
+                return False
+
+            try:
+                store, lexical, jobs = self.opener(path)
+            except Exception as exc:
+                self._failed = (version, signature)
+                self.last_error = f"{version}: {type(exc).__name__}: {exc}"
+                raise
+            manifest = read_snapshot_manifest(self.root, version) if version else {}
+            snapshot = IndexSnapshot(version, path, store, lexical, manifest, jobs=jobs, signature=signature)
+
+            with self._swap_lock:
+                previous, self._active = self._active, snapshot
+                if previous is not None:
+                    self.swaps += 1
+                    self._draining.append(previous)
+            if previous is not None:
+                previous.retire()
+                print(f"🔄 索引已切换: {previous.version} -> {version}")
+            self.last_error = None
+            self._failed = None
+            return True
+
+    def start_watcher(self) -> None:
+        if self.poll_seconds <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="index-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_seconds + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._swap_lock:
+            active = self._active
+            self._draining = [snapshot for snapshot in self._draining if snapshot.leases > 0]
+            draining = [{"version": snapshot.version, "leases": snapshot.leases} for snapshot in self._draining]
+        return {
+            "root": str(self.root),
+            "pointer": read_current_version(self.root),
+            "active": active.info() if active is not None else None,
+            "draining": draining,
+            "swaps": self.swaps,
+            "available": list_snapshots(self.root),
+            "poll_seconds": self.poll_seconds,
+            "last_error": self.last_error,
+        }
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception:
+                # 新版本加载失败时继续服务旧版本，指针再次变化或手动 reload 时重试
+                print(f"❌ 索引切换失败: {self.last_error}")
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from backend.job_store import JobStore, JobStoreWriter, StringColumn, is_job_store_file
+from backend.jsonl_index import make_job_id
+
+JOB_CATALOG_SUFFIX = ".catalog"
+# 取值很少的字段做字典编码：过滤与分面只比较整数编码
+CATALOG_DICTIONARY_COLUMNS = (
+    "薪资范围",
+    "工作经验",
+    "学历要求",
+    "职位标签",
+    "公司规模",
+    "公司阶段",
+    "所属行业",
+    "job_category",
+    "job_code",
+)
+
+
+def catalog_path_for(source_path: Path) -> Path:
+    # offline_jobs.jsonl -> offline_jobs.catalog
+    return Path(source_path).with_suffix(JOB_CATALOG_SUFFIX)
+
+
+def is_job_catalog(path: Path) -> bool:
+    return is_job_store_file(path)
+
+
+class JobCatalog(JobStore):
+    """
+    列式岗位目录：与 JobStore 同一文件格式，按源数据顺序保存全部字段（含重复岗位），岗位 id 在转换时算好
+
+    建索引、爬虫输出与后端都可以直接读取；过滤、分面与精确去重在列数组上完成，不需要逐条构造 dict。
+    字段值统一以文本保存，非字符串值按 JSON 序列化。
+    """
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def iter_jobs(self, chunk_size: int = 4096) -> Iterable[tuple[str, Dict[str, str]]]:
+        # 按源数据顺序产出 (岗位 id, 字段)，分块按列批量解码
+        ids = self.row_ids()
+        for start in range(0, self.num_rows, chunk_size):
+            rows = np.arange(start, min(start + chunk_size, self.num_rows))
+            yield from zip(ids[start : start + len(rows)], self.records_at(rows))
+
+    def filter(self, **equals: str) -> np.ndarray:
+        """按字段取值过滤，返回行掩码，例如 filter(job_category="Python", 学历要求="硕士")"""
+        mask = np.ones(self.num_rows, dtype=bool)
+        for name, value in equals.items():
+            mask &= self.column(name).equals(value)
+        return mask
+
+    def facet(self, name: str, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        return self.column(name).facet(mask)
+
+    def first_occurrence(self) -> np.ndarray:
+        # 精确去重：同一岗位 id 只保留最早的一行。排序 id 已按行号稳定排序，相邻相同即重复
+        mask = np.zeros(self.num_rows, dtype=bool)
+        if self.count:
+            first = np.r_[True, self.ids[1:] != self.ids[:-1]]
+            mask[self.rows[first]] = True
+        return mask
+
+    def texts(self, names: Iterable[str], rows: Iterable[int], separator: str = " ") -> List[str]:
+        # 只解码需要的列，拼接为文本（近重复检测等场景）
+        columns: List[StringColumn] = [self.column(name) for name in names]
+        values = [column.take(rows) for column in columns]
+        return [separator.join(value.strip() for value in row_values) for row_values in zip(*values)]
+
+
+def write_job_catalog(jobs: Iterable[Dict[str, Any]], target_path: Path) -> int:
+    writer = JobStoreWriter(
+        [],
+        dictionary_columns=CATALOG_DICTIONARY_COLUMNS,
+        dedupe=False,
+        extra_columns=True,
+    )
+    for job in jobs:
+        writer.add(make_job_id(job), job)
+    writer.save(target_path)
+    return len(writer)
+
+
+def convert_jsonl_to_catalog(source_path: Path, target_path: Optional[Path] = None) -> Path:
+    """把 JSONL 岗位数据转换为列式目录，默认写到同名的 .catalog 文件"""
+    target_path = Path(target_path) if target_path else catalog_path_for(source_path)
+
+    def jobs() -> Iterable[Dict[str, Any]]:
+        with open(source_path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    write_job_catalog(jobs(), target_path)
+    return target_path
@@ -1,57 +1,127 @@
 from __future__ import annotations
 
+import copy
 import hashlib
 import json
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 
 import chromadb
+import numpy as np
 import torch
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+from backend.build_profile import BuildProfiler, write_profile_report
+from backend.category_shards import (
+    CategoryShardedWriter,
+    category_shards_path,
+    load_category_shards,
+    save_category_shards,
+)
+from backend.document_embedding_cache import DEFAULT_DOCUMENT_CACHE_PATH, DocumentEmbeddingCache
+from backend.encode_pool import EncodePool
+from backend.index_pipeline import DEFAULT_PIPELINE_QUEUE_SIZE, run_pipeline
+from backend.index_snapshots import (
+    DEFAULT_KEEP_SNAPSHOTS,
+    SNAPSHOT_MANIFEST_FILE,
+    new_snapshot_version,
+    prune_snapshots,
+    publish_snapshot,
+    read_current_version,
+    snapshot_path,
+)
+from backend.job_catalog import CATALOG_DICTIONARY_COLUMNS, JobCatalog, is_job_catalog
+from backend.job_store import JobStore, JobStoreWriter, job_store_path
+from backend.jsonl_index import JsonlIndex, count_jsonl_records, iter_jsonl_spans, make_job_id, safe_text
+from backend.lexical_index import LexicalIndexBuilder, lexical_index_path
+from backend.near_dedup import DEFAULT_DEDUP_THRESHOLD, MinHashDeduper
+from backend.vector_store import DEFAULT_NUMPY_PATH, NumpyIndexWriter
+
 DEFAULT_COLLECTION = "offline_jobs"
 DEFAULT_MODEL = "Qwen/Qwen3-Embedding-0.6B"
 DEFAULT_DB_PATH = Path(__file__).resolve().parent / "chromadb_data"
 DEFAULT_SOURCE_PATH = Path(__file__).resolve().parent / "data" / "offline_jobs.jsonl"
+QUANTIZE_MODES = ("none", "int8", "onnx", "onnx-int8")
+DEFAULT_LENGTH_SORT_WINDOW = 2048
+# 增量同步时标记旧格式（完整字段）metadata，使其在同步时被整条替换为精简 metadata
+LEGACY_METADATA_KEY = "legacy_fields"
+JOB_RECORD_FIELDS = (
+    "公司名称",
+    "职位名称",
+    "工作地点",
+    "薪资范围",
+    "工作经验",
+    "学历要求",
+    "职位标签",
+    "所需技能",
+    "公司规模",
+    "公司阶段",
+    "所属行业",
+    "岗位描述",
+    "job_category",
+    "job_code",
+)
 
 
-def load_jobs_jsonl(path: Path) -> Iterable[Dict[str, Any]]:
-    # 加载数据
+class _JobBatch:
+    """流水线中传递的一批岗位；consumed 记录被跳过（重复或空文档）的源数据行数，用于进度条"""
+
+    __slots__ = ("kind", "ids", "documents", "metadatas", "embeddings", "consumed", "encode_batch_size")
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, str]] = []
+        self.embeddings: Optional[np.ndarray] = None
+        self.consumed = 0
+        self.encode_batch_size: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, job_id: str, document: str, metadata: Dict[str, str]) -> None:
+        self.ids.append(job_id)
+        self.documents.append(document)
+        self.metadatas.append(metadata)
+
+
+def iter_jsonl_lines(path: Path) -> Iterable[str]:
+    # 逐行读取非空行，不做 JSON 解析
     with open(path, "r", encoding="utf-8") as handle:
         for line in handle:
             line = line.strip()
-            if not line:
-                continue
-            yield json.loads(line)
+            if line:
+                yield line
+
+
+def load_jobs_jsonl(path: Path) -> Iterable[Dict[str, Any]]:
+    # 加载数据
+    for line in iter_jsonl_lines(path):
+        yield json.loads(line)
 
 
 def count_jsonl_lines(path: Path) -> int:
-    count = 0
-    with open(path, "r", encoding="utf-8") as handle:
-        for line in handle:
-            if line.strip():
-                count += 1
-    return count
-
-
-def _safe_text(value: Any) -> str:
-    # 清洗文本
-    if value is None:
-        return ""
-    return str(value).strip()
-
-
-def make_job_id(job: Dict[str, Any]) -> str:
-    # 生成唯一ID
-    key = "|".join(
-        [
-            _safe_text(job.get("公司名称")),
-            _safe_text(job.get("职位名称")),
-            _safe_text(job.get("岗位描述")),
-        ]
-    )
-    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+    # 有效的 sidecar 偏移索引直接复用，其余部分只扫描字节；计数只用于进度条，不解析 JSON
+    return count_jsonl_records(path)
+
+
+def load_jobs(path: Path) -> Iterable[Dict[str, Any]]:
+    # 源数据可以是 JSONL 或列式岗位目录（按文件头识别）
+    if is_job_catalog(path):
+        return (job for _, job in JobCatalog(path).iter_jobs())
+    return load_jobs_jsonl(path)
+
+
+def count_jobs(path: Path) -> int:
+    if is_job_catalog(path):
+        return len(JobCatalog(path))
+    return count_jsonl_lines(path)
 
 
 def build_job_document(job: Dict[str, Any]) -> str:
@@ -61,143 +131,831 @@ def build_job_document(job: Dict[str, Any]) -> str:
         ("所需技能", job.get("所需技能")),
         ("岗位描述", job.get("岗位描述")),
     ]
-    parts = [f"{label}: {_safe_text(value)}" for label, value in fields if _safe_text(value)]
+    parts = [f"{label}: {safe_text(value)}" for label, value in fields if safe_text(value)]
     return "\n".join(parts)
 
 
-def build_job_metadata(job: Dict[str, Any]) -> Dict[str, str]:
-    # 构建metadata
+def build_job_record(job: Dict[str, Any]) -> Dict[str, str]:
+    # 构建完整岗位字段，写入 JobStore，查询结果从中回填
+    return {field: safe_text(job.get(field)) for field in JOB_RECORD_FIELDS}
+
+
+def document_hash(document: str) -> str:
+    # 检索文本指纹，增量同步据此判断是否需要重新编码
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()[:16]
+
+
+def build_job_metadata(job: Dict[str, Any], document: Optional[str] = None) -> Dict[str, str]:
+    # 构建metadata：向量索引只保存可过滤的小字段，完整字段在 JobStore 中
     metadata = {
-        "公司名称": _safe_text(job.get("公司名称")),
-        "职位名称": _safe_text(job.get("职位名称")),
-        "工作地点": _safe_text(job.get("工作地点")),
-        "薪资范围": _safe_text(job.get("薪资范围")),
-        "工作经验": _safe_text(job.get("工作经验")),
-        "学历要求": _safe_text(job.get("学历要求")),
-        "职位标签": _safe_text(job.get("职位标签")),
-        "所需技能": _safe_text(job.get("所需技能")),
-        "公司规模": _safe_text(job.get("公司规模")),
-        "公司阶段": _safe_text(job.get("公司阶段")),
-        "所属行业": _safe_text(job.get("所属行业")),
-        "岗位描述": _safe_text(job.get("岗位描述")),
-        "job_category": _safe_text(job.get("job_category")),
-        "job_code": _safe_text(job.get("job_code")),
+        "job_category": safe_text(job.get("job_category")),
+        "job_code": safe_text(job.get("job_code")),
     }
+    if document is not None:
+        metadata["doc_hash"] = document_hash(document)
     return metadata
 
 
+def find_near_duplicates(
+    source_path: Path,
+    threshold: float = DEFAULT_DEDUP_THRESHOLD,
+) -> tuple[Dict[str, str], Dict[str, int]]:
+    # 预扫描源数据，按 公司+职位+岗位描述 的 MinHash 签名聚类近重复岗位（重新发布、改了空白或末尾一行等）
+    deduper = MinHashDeduper(threshold=threshold)
+    if is_job_catalog(source_path):
+        # 列式目录：精确去重在 id 数组上完成，只解码参与签名的三列
+        catalog = JobCatalog(source_path)
+        rows = np.flatnonzero(catalog.first_occurrence())
+        ids = catalog.row_ids()
+        texts = catalog.texts(("公司名称", "职位名称", "岗位描述"), rows)
+        for row, text in zip(rows, texts):
+            deduper.add(ids[row], text)
+        return deduper.clusters()
+
+    seen_ids: set[str] = set()
+    for job in load_jobs_jsonl(source_path):
+        job_id = make_job_id(job)
+        if job_id in seen_ids:
+            continue
+        seen_ids.add(job_id)
+        text = " ".join(safe_text(job.get(key)) for key in ("公司名称", "职位名称", "岗位描述"))
+        deduper.add(job_id, text)
+    return deduper.clusters()
+
+
 def load_embedding_model(
     model_name: str = DEFAULT_MODEL,
     device: str = "cuda",
     local_only: bool = True,
+    quantize: str = "none",
 ) -> SentenceTransformer:
-    # 加载embedding模型
-    return SentenceTransformer(
+    # 加载embedding模型，quantize 可选 CPU 量化推理后端
+    if quantize not in QUANTIZE_MODES:
+        raise ValueError(f"Unknown quantize mode: {quantize}")
+    if quantize != "none" and device != "cpu":
+        raise ValueError(f"Quantized inference ({quantize}) is only supported on cpu, got device={device}")
+
+    if quantize.startswith("onnx"):
+        # onnx-int8 需要模型目录下已有 export_dynamic_quantized_onnx_model 导出的 avx512_vnni 量化图
+        model_kwargs = {"file_name": "onnx/model_qint8_avx512_vnni.onnx"} if quantize == "onnx-int8" else None
+        model = SentenceTransformer(
+            model_name,
+            device=device,
+            trust_remote_code=True,
+            local_files_only=local_only,
+            backend="onnx",
+            model_kwargs=model_kwargs,
+        )
+        return model
+
+    model = SentenceTransformer(
         model_name,
         device=device,
         trust_remote_code=True,
         local_files_only=local_only,
     )
+    if quantize == "int8":
+        # 动态 int8 量化：权重离线量化，激活在推理时量化，只作用于 Linear 层
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def check_quantized_agreement(
+    source_path: Path = DEFAULT_SOURCE_PATH,
+    model_name: str = DEFAULT_MODEL,
+    quantize: str = "int8",
+    sample_size: int = 200,
+    batch_size: int = 8,
+    local_only: bool = True,
+) -> Dict[str, float]:
+    # 在离线岗位数据上对比量化模型与 fp32 模型的向量余弦一致性和编码耗时
+    documents: List[str] = []
+    for job in load_jobs(source_path):
+        document = build_job_document(job)
+        if document:
+            documents.append(document)
+        if len(documents) >= sample_size:
+            break
+
+    def encode_timed(model: SentenceTransformer) -> tuple[np.ndarray, float]:
+        model.encode(documents[:1], normalize_embeddings=True, show_progress_bar=False)
+        start = time.perf_counter()
+        with torch.no_grad():
+            embeddings = model.encode(
+                documents,
+                batch_size=batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        return embeddings, time.perf_counter() - start
+
+    reference, reference_seconds = encode_timed(load_embedding_model(model_name, "cpu", local_only))
+    candidate, candidate_seconds = encode_timed(load_embedding_model(model_name, "cpu", local_only, quantize))
+    cosines = np.sum(reference * candidate, axis=1)
+
+    return {
+        "documents": len(documents),
+        "mean_cosine": float(np.mean(cosines)),
+        "min_cosine": float(np.min(cosines)),
+        "p05_cosine": float(np.percentile(cosines, 5)),
+        "fp32_ms_per_doc": reference_seconds * 1000 / len(documents),
+        "quantized_ms_per_doc": candidate_seconds * 1000 / len(documents),
+        "speedup": reference_seconds / candidate_seconds if candidate_seconds else 0.0,
+    }
+
+
+def truncate_embeddings(embeddings: np.ndarray, dim: Optional[int]) -> np.ndarray:
+    # Matryoshka 截断：保留前 dim 维后重新归一化
+    if not dim or dim >= embeddings.shape[-1]:
+        return embeddings
+    truncated = embeddings[..., :dim]
+    norms = np.linalg.norm(truncated, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return truncated / norms
+
+
+def dimension_recall_report(
+    source_path: Path = DEFAULT_SOURCE_PATH,
+    model_name: str = DEFAULT_MODEL,
+    dims: Iterable[int] = (128, 256, 512),
+    k: int = 20,
+    sample_size: int = 1000,
+    num_queries: int = 100,
+    device: str = "cpu",
+    batch_size: int = 8,
+    local_only: bool = True,
+) -> Dict[int, float]:
+    # 以全维向量的 top-k 为基准，统计截断维度下的 recall@k（查询为样本中的岗位本身，排除自身）
+    documents: List[str] = []
+    for job in load_jobs(source_path):
+        document = build_job_document(job)
+        if document:
+            documents.append(document)
+        if len(documents) >= sample_size:
+            break
+
+    model = load_embedding_model(model_name=model_name, device=device, local_only=local_only)
+    with torch.no_grad():
+        full = model.encode(
+            documents,
+            batch_size=batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+
+    k = min(k, len(documents) - 1)
+    query_rows = np.arange(min(num_queries, len(documents)))
+
+    def top_k(matrix: np.ndarray) -> List[set]:
+        scores = matrix[query_rows] @ matrix.T
+        scores[np.arange(len(query_rows)), query_rows] = -np.inf
+        ranked = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        return [set(row.tolist()) for row in ranked]
+
+    reference = top_k(full)
+    report: Dict[int, float] = {}
+    for dim in dims:
+        candidate = top_k(truncate_embeddings(full, dim))
+        overlaps = [len(ref & cand) / k for ref, cand in zip(reference, candidate)]
+        report[dim] = float(np.mean(overlaps))
+    return report
 
 
 def get_collection(
     db_path: Path,
     collection_name: str,
     reset: bool = False,
+    embedding_dim: Optional[int] = None,
+    model_name: Optional[str] = None,
 ) -> chromadb.Collection:
-    # 获取或创建ChromaDB集合
+    # 获取或创建ChromaDB集合，向量维度写入集合 metadata，查询端据此截断
     client = chromadb.PersistentClient(path=str(db_path))
     if reset:
         try:
             client.delete_collection(collection_name)
         except Exception:
             pass
-    return client.get_or_create_collection(
-        collection_name,
-        metadata={"hnsw:space": "cosine"},
-    )
+    metadata: Dict[str, Any] = {"hnsw:space": "cosine"}
+    if embedding_dim:
+        metadata["embedding_dim"] = embedding_dim
+    if model_name:
+        metadata["embedding_model"] = model_name
+    collection = client.get_or_create_collection(collection_name, metadata=metadata)
+
+    recorded_dim = (collection.metadata or {}).get("embedding_dim")
+    if embedding_dim and recorded_dim and int(recorded_dim) != embedding_dim:
+        raise ValueError(
+            f"Collection {collection_name} stores {recorded_dim}-dim embeddings, got embedding_dim={embedding_dim}"
+        )
+    return collection
+
+
+def drop_collection(db_path: Path, collection_name: str) -> None:
+    # 删除集合，不存在时忽略
+    client = chromadb.PersistentClient(path=str(db_path))
+    try:
+        client.delete_collection(collection_name)
+    except Exception:
+        pass
+
+
+def open_index_writer(
+    backend: str,
+    db_path: Path,
+    collection_name: str,
+    reset: bool = False,
+    dtype: str = "float32",
+    embedding_dim: Optional[int] = None,
+    model_name: Optional[str] = None,
+):
+    # 返回可被 add_job_batch 写入的对象：chromadb Collection 或 NumpyIndexWriter
+    if backend == "chroma":
+        return get_collection(db_path, collection_name, reset=reset, embedding_dim=embedding_dim, model_name=model_name)
+    if backend == "numpy":
+        return NumpyIndexWriter(
+            db_path / collection_name,
+            reset=reset,
+            dtype=dtype,
+            embedding_dim=embedding_dim,
+            model_name=model_name,
+        )
+    raise ValueError(f"Unknown vector backend: {backend}")
+
+
+def load_length_tokenizer(model: SentenceTransformer | EncodePool, model_name: str, local_only: bool = True):
+    # 解析线程统计 token 长度用的独立 tokenizer（fast tokenizer 不宜与编码线程共用同一实例）
+    if isinstance(model, SentenceTransformer):
+        return copy.deepcopy(model.tokenizer)
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(model_name, local_files_only=local_only, trust_remote_code=True)
+
+
+def length_bucketed_batches(
+    lengths: List[int],
+    batch_size: int,
+    workers: int = 1,
+    token_budget: Optional[int] = None,
+) -> List[tuple[List[int], int]]:
+    # 按 token 长度排序后切批，使同批文本长度接近、padding 最少；返回 (下标列表, 单次 encode 批大小)
+    # 指定 token_budget 时按 批大小 x 批内最长长度 <= token_budget 自适应批大小，短文本批更大、长文本批更小
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches: List[tuple[List[int], int]] = []
+    start = 0
+    while start < len(order):
+        if token_budget:
+            end = start
+            while end < len(order) and (end - start + 1) * max(1, lengths[order[end]]) <= token_budget * workers:
+                end += 1
+            end = max(end, start + 1)
+            per_call = -(-(end - start) // workers)
+        else:
+            end = min(start + batch_size * workers, len(order))
+            per_call = batch_size
+        batches.append((order[start:end], per_call))
+        start = end
+    return batches
+
+
+def encode_documents(
+    model: SentenceTransformer | EncodePool,
+    documents: List[str],
+    batch_size: int,
+    embedding_cache: Optional[DocumentEmbeddingCache] = None,
+) -> np.ndarray:
+    # 编码完整维度的向量；有缓存时只对未命中的文档跑模型
+    cached = embedding_cache.get_many(documents) if embedding_cache is not None else [None] * len(documents)
+    missing = [index for index, vector in enumerate(cached) if vector is None]
+    encoded = None
+    if missing:
+        with torch.no_grad():
+            encoded = model.encode(
+                [documents[index] for index in missing],
+                batch_size=batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        if embedding_cache is not None:
+            embedding_cache.put_many([documents[index] for index in missing], encoded)
+        if len(missing) == len(documents):
+            return encoded
+    for position, index in enumerate(missing):
+        cached[index] = encoded[position]
+    return np.stack(cached)
 
 
 def add_job_batch(
-    collection: chromadb.Collection,
-    model: SentenceTransformer,
+    collection: chromadb.Collection | NumpyIndexWriter,
+    model: SentenceTransformer | EncodePool,
     documents: List[str],
     metadatas: List[Dict[str, str]],
     ids: List[str],
     batch_size: int,
+    embedding_dim: Optional[int] = None,
+    upsert: bool = False,
+    embedding_cache: Optional[DocumentEmbeddingCache] = None,
 ) -> None:
-    # 批量添加数据到集合
-    with torch.no_grad():
-        embeddings = model.encode(
-            documents,
-            batch_size=batch_size,
-            normalize_embeddings=True,
-            convert_to_numpy=True,
-            show_progress_bar=False,
+    # 批量添加数据到集合，upsert=True 时覆盖已存在的 id
+    embeddings = encode_documents(model, documents, batch_size, embedding_cache)
+    embeddings = truncate_embeddings(embeddings, embedding_dim)
+    write_job_batch(collection, ids, metadatas, embeddings, upsert=upsert)
+
+
+def write_job_batch(
+    collection: chromadb.Collection | NumpyIndexWriter,
+    ids: List[str],
+    metadatas: List[Dict[str, str]],
+    embeddings: np.ndarray,
+    upsert: bool = False,
+    profiler: Optional[BuildProfiler] = None,
+) -> None:
+    # 写入已编码好的一批数据；检索文本不存入向量索引，完整字段由 JobStore 保存
+    profiler = profiler or BuildProfiler(enabled=False)
+    with profiler.stage("tolist", len(ids)):
+        vectors = embeddings.tolist()
+    write = collection.upsert if upsert else collection.add
+    with profiler.stage("insert", len(ids)):
+        write(ids=ids, metadatas=metadatas, embeddings=vectors)
+
+
+def replace_job_metadata(
+    collection: chromadb.Collection | NumpyIndexWriter,
+    ids: List[str],
+    metadatas: List[Dict[str, str]],
+) -> None:
+    # chromadb 的 update/upsert 都把新 metadata 合并进旧 metadata，旧字段会残留；
+    # 取回已有向量后删除再写入，整条替换。numpy 写入器的 update 本就是整条替换
+    if isinstance(collection, NumpyIndexWriter):
+        collection.update(ids=ids, metadatas=metadatas)
+        return
+    stored = collection.get(ids=ids, include=["embeddings"])
+    vectors = dict(zip(stored["ids"], np.asarray(stored["embeddings"], dtype=np.float32).tolist()))
+    present = [row for row, job_id in enumerate(ids) if job_id in vectors]
+    if present:
+        present_ids = [ids[row] for row in present]
+        collection.delete(ids=present_ids)
+        collection.add(
+            ids=present_ids,
+            embeddings=[vectors[job_id] for job_id in present_ids],
+            metadatas=[metadatas[row] for row in present],
         )
-    collection.add(
-        ids=ids,
-        documents=documents,
-        metadatas=metadatas,
-        embeddings=embeddings.tolist(),
+
+
+def load_index_metadata(
+    collection: chromadb.Collection | NumpyIndexWriter,
+    page_size: int = 10000,
+) -> Dict[str, Dict[str, str]]:
+    # 分页读取索引中全部岗位的 metadata，供增量同步在内存中比对；
+    # 旧格式索引的 metadata 含完整字段、没有 doc_hash，只保留由字段重建的检索文本指纹
+    existing: Dict[str, Dict[str, str]] = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        for job_id, metadata in zip(page["ids"], page["metadatas"]):
+            metadata = metadata or {}
+            if "doc_hash" not in metadata:
+                metadata = {"doc_hash": document_hash(build_job_document(metadata)), LEGACY_METADATA_KEY: "1"}
+            existing[job_id] = metadata
+        if len(page["ids"]) < page_size:
+            return existing
+        offset += page_size
+
+
+def classify_existing_job(previous: Dict[str, str], document: str, metadata: Dict[str, str]) -> Optional[str]:
+    # 已在索引中的岗位：检索文本变化返回 "document"（需重新编码），仅 metadata 变化返回 "metadata"，否则 None
+    if previous == metadata:
+        return None
+    if previous.get("doc_hash") != document_hash(document):
+        return "document"
+    return "metadata"
+
+
+@dataclass
+class BuildConfig:
+    """build_job_index 的参数，字段与 tools/build_job_index.py 的命令行参数一一对应"""
+
+    source_path: Path = DEFAULT_SOURCE_PATH
+    # 默认按 backend 选择 DEFAULT_DB_PATH 或 DEFAULT_NUMPY_PATH
+    db_path: Optional[Path] = None
+    collection_name: str = DEFAULT_COLLECTION
+    model_name: str = DEFAULT_MODEL
+    device: str = "cuda"
+    batch_size: int = 32
+    max_items: Optional[int] = None
+    reset: bool = False
+    local_only: bool = True
+    backend: str = "chroma"
+    dtype: str = "float32"
+    embedding_dim: Optional[int] = None
+    lexical: bool = True
+    incremental: bool = False
+    prune: bool = False
+    embedding_cache_path: Optional[Path] = DEFAULT_DOCUMENT_CACHE_PATH
+    pipeline_queue_size: int = DEFAULT_PIPELINE_QUEUE_SIZE
+    encode_workers: int = 1
+    threads_per_worker: Optional[int] = None
+    length_sort_window: int = DEFAULT_LENGTH_SORT_WINDOW
+    token_budget: Optional[int] = None
+    # 近重复折叠会少索引文档，默认关闭；开启时阈值与折叠条数写入快照清单
+    near_dedup: bool = False
+    dedup_threshold: float = DEFAULT_DEDUP_THRESHOLD
+    snapshot: bool = False
+    keep_snapshots: int = DEFAULT_KEEP_SNAPSHOTS
+    profile_path: Optional[Path] = None
+    category_shards: bool = False
+
+
+@dataclass
+class BuildStats:
+    """一次构建的结果统计，由调用方决定如何展示"""
+
+    # 实际写入的目录，版本化构建时为版本目录
+    db_path: Path
+    new: int = 0
+    reembedded: int = 0
+    updated: int = 0
+    removed: int = 0
+    # 只有增量构建才统计未变化的岗位数
+    unchanged: Optional[int] = None
+    near_duplicates: int = 0
+    near_duplicate_clusters: int = 0
+    # run_pipeline 返回的各阶段统计
+    pipeline: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    embedding_cache: Optional[Dict[str, Any]] = None
+    category_shards: List[str] = field(default_factory=list)
+    indexed_jobs: int = 0
+    stored_jobs: int = 0
+    job_store_path: Optional[Path] = None
+    snapshot_version: Optional[str] = None
+    pruned_snapshots: List[str] = field(default_factory=list)
+    profile: Optional[Dict[str, Any]] = None
+
+
+def build_job_index(config: BuildConfig) -> BuildStats:
+    # 构建职位数据索引；incremental 模式只编码索引中缺失的岗位，prune 额外删除源数据中已不存在的岗位
+    if config.incremental and config.reset:
+        raise ValueError("incremental and reset are mutually exclusive")
+    if config.prune and (not config.incremental or config.max_items):
+        raise ValueError("prune requires incremental mode over the full source file")
+    db_path = config.db_path or (DEFAULT_NUMPY_PATH if config.backend == "numpy" else DEFAULT_DB_PATH)
+    embedding_dim = config.embedding_dim
+    threads_per_worker = config.threads_per_worker
+    # profile_path 非空时记录各阶段墙钟/CPU 时间、吞吐与峰值内存，写出 JSON 报告
+    profiler = BuildProfiler(enabled=config.profile_path is not None)
+    # 版本化构建：写入 versions/<version>/，完成后原子切换 current 指针，运行中的后端随后热切换
+    snapshot_root: Optional[Path] = None
+    if config.snapshot:
+        snapshot_root = Path(db_path)
+        version = new_snapshot_version(snapshot_root)
+        parent_version = read_current_version(snapshot_root)
+        db_path = snapshot_path(snapshot_root, version)
+        if config.incremental and parent_version:
+            # 增量构建在当前版本的副本上进行，当前版本保持只读
+            shutil.copytree(snapshot_path(snapshot_root, parent_version), db_path)
+            (db_path / SNAPSHOT_MANIFEST_FILE).unlink(missing_ok=True)
+        db_path.mkdir(parents=True, exist_ok=True)
+    stats = BuildStats(db_path=Path(db_path))
+    with profiler.stage("model_load"):
+        if config.encode_workers > 1:
+            # 多进程编码：每个进程一份模型，线程数默认平分 CPU 核数
+            threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // config.encode_workers)
+            model = EncodePool(
+                config.model_name,
+                workers=config.encode_workers,
+                threads_per_worker=threads_per_worker,
+                device=config.device,
+                local_only=config.local_only,
+            )
+        else:
+            model = load_embedding_model(
+                model_name=config.model_name, device=config.device, local_only=config.local_only
+            )
+    full_dim = model.get_sentence_embedding_dimension()
+    if embedding_dim and full_dim and embedding_dim > full_dim:
+        raise ValueError(f"embedding_dim={embedding_dim} exceeds model dimension {full_dim}")
+    embedding_dim = embedding_dim or full_dim
+    # 缓存存完整维度向量，不同 embedding_dim 的重建可共用
+    embedding_cache = (
+        DocumentEmbeddingCache(config.embedding_cache_path, config.model_name, full_dim)
+        if config.embedding_cache_path
+        else None
     )
+    collection = open_index_writer(
+        config.backend,
+        db_path,
+        config.collection_name,
+        reset=config.reset,
+        dtype=config.dtype,
+        embedding_dim=embedding_dim,
+        model_name=config.model_name,
+    )
+    # Chroma 按 job_category 额外写入分片集合；numpy 索引自带按类别排序的行号区间，无需分片
+    shards_path = category_shards_path(db_path, config.collection_name)
+    existing_shards = load_category_shards(db_path, config.collection_name) if config.backend == "chroma" else {}
+    if config.reset or (not config.incremental and not config.category_shards):
+        for info in existing_shards.values():
+            drop_collection(db_path, info["collection"])
+        existing_shards = {}
+        shards_path.unlink(missing_ok=True)
+    if config.backend == "chroma" and (config.category_shards or existing_shards):
+        if config.incremental and not existing_shards and collection.count():
+            raise ValueError("category shards must be enabled on a full build (--reset) before incremental syncs")
+        collection = CategoryShardedWriter(
+            collection,
+            config.collection_name,
+            lambda name: get_collection(db_path, name, embedding_dim=embedding_dim, model_name=config.model_name),
+            existing_shards,
+        )
 
+    # 与向量同步构建 BM25 词法索引，供混合检索使用
+    lexical_builder: Optional[LexicalIndexBuilder] = None
+    lexical_path = lexical_index_path(db_path, config.collection_name)
+    if config.lexical:
+        if not config.reset and lexical_path.exists():
+            lexical_builder = LexicalIndexBuilder.from_file(lexical_path)
+        else:
+            lexical_builder = LexicalIndexBuilder()
+    # 完整岗位字段写入列式 JobStore；非 reset 构建在已有记录基础上更新
+    job_store_file = job_store_path(db_path, config.collection_name)
+    base_store = JobStore(job_store_file) if not config.reset and job_store_file.exists() else None
+    job_store = JobStoreWriter(JOB_RECORD_FIELDS, base=base_store, dictionary_columns=CATALOG_DICTIONARY_COLUMNS)
 
-def build_job_index(
-    source_path: Path = DEFAULT_SOURCE_PATH,
-    db_path: Path = DEFAULT_DB_PATH,
-    collection_name: str = DEFAULT_COLLECTION,
-    model_name: str = DEFAULT_MODEL,
-    device: str = "cuda",
-    batch_size: int = 32,
-    max_items: Optional[int] = None,
-    reset: bool = False,
-    local_only: bool = True,
-) -> int:
-    # 构建职位数据索引
-    collection = get_collection(db_path, collection_name, reset=reset)
-    model = load_embedding_model(model_name=model_name, device=device, local_only=local_only)
+    # 近重复岗位每簇只保留文件中最早出现的一条，簇大小写入 metadata 的 cluster_size
+    canonical_of: Dict[str, str] = {}
+    cluster_sizes: Dict[str, int] = {}
+    if config.near_dedup:
+        with profiler.stage("near_dedup"):
+            canonical_of, cluster_sizes = find_near_duplicates(config.source_path, threshold=config.dedup_threshold)
+        stats.near_duplicates, stats.near_duplicate_clusters = len(canonical_of), len(cluster_sizes)
+
+    def job_metadata(job_id: str, job: Dict[str, Any], document: str) -> Dict[str, str]:
+        metadata = build_job_metadata(job, document)
+        metadata["cluster_size"] = str(cluster_sizes.get(job_id, 1))
+        return metadata
 
+    # 增量同步的比对在解析线程内基于这份快照完成，构建过程中不再读取向量索引
+    with profiler.stage("list_existing"):
+        existing_metadata = load_index_metadata(collection) if config.incremental else {}
+    existing_ids = set(existing_metadata)
     seen_ids: set[str] = set()
-    docs_batch: List[str] = []
-    metas_batch: List[Dict[str, str]] = []
-    ids_batch: List[str] = []
-    total = 0
-
-    total_lines = count_jsonl_lines(source_path)
-    if max_items:
-        total_lines = min(total_lines, max_items)
+    counts = {"new": 0, "updated": 0, "reembedded": 0}
+
+    total_lines = count_jobs(config.source_path)
+    if config.max_items:
+        total_lines = min(total_lines, config.max_items)
     progress = tqdm(total=total_lines, desc="Indexing jobs", unit="job")
-    for job in load_jobs_jsonl(source_path):
-        job_id = make_job_id(job)
-        if job_id in seen_ids:
-            progress.update(1)
-            continue
-        seen_ids.add(job_id)
 
-        document = build_job_document(job)
-        if not document:
-            progress.update(1)
-            continue
+    # 按长度分桶需要 tokenizer 统计长度，长度按模型最大序列长度截断（超出部分编码时本就会被截掉）
+    length_tokenizer = (
+        load_length_tokenizer(model, config.model_name, config.local_only) if config.length_sort_window else None
+    )
+    max_seq_length = getattr(model, "max_seq_length", None)
+    window_size = config.batch_size * config.encode_workers
+    if length_tokenizer is not None:
+        window_size = max(config.length_sort_window, window_size)
 
-        docs_batch.append(document)
-        metas_batch.append(build_job_metadata(job))
-        ids_batch.append(job_id)
-        total += 1
+    def split_window(window: _JobBatch) -> List[_JobBatch]:
+        if length_tokenizer is None:
+            window.encode_batch_size = config.batch_size
+            return [window]
+        with profiler.stage("tokenize", len(window)):
+            token_ids = length_tokenizer(window.documents, add_special_tokens=False)["input_ids"]
+            lengths = [min(len(ids), max_seq_length) if max_seq_length else len(ids) for ids in token_ids]
+        profiler.add_tokens(sum(lengths))
+        batches = []
+        buckets = length_bucketed_batches(lengths, config.batch_size, config.encode_workers, config.token_budget)
+        for indices, per_call in buckets:
+            batch = _JobBatch("add")
+            for index in indices:
+                batch.append(window.ids[index], window.documents[index], window.metadatas[index])
+            batch.encode_batch_size = per_call
+            batches.append(batch)
+        batches[0].consumed = window.consumed
+        return batches
 
-        if max_items and total >= max_items:
-            progress.update(1)
-            break
+    def iter_source() -> Iterable[tuple[str, Dict[str, Any]]]:
+        # 列式岗位目录自带岗位 id，省去逐行 JSON 解析与哈希
+        if is_job_catalog(config.source_path):
+            rows = iter(JobCatalog(config.source_path).iter_jobs())
+            while True:
+                with profiler.stage("catalog_read", 1):
+                    item = next(rows, None)
+                if item is None:
+                    return
+                yield item
+        # 解析时顺带记录每条记录的字节偏移，完整读完源文件后写出 sidecar 偏移索引，供随机读取与下次计数复用
+        starts: List[int] = []
+        ends: List[int] = []
+        job_ids: List[str] = []
+        for start, end, line in iter_jsonl_spans(config.source_path):
+            with profiler.stage("json_parse", 1):
+                job = json.loads(line)
+            with profiler.stage("hash", 1):
+                job_id = make_job_id(job)
+            starts.append(start)
+            ends.append(end)
+            job_ids.append(job_id)
+            yield job_id, job
+        try:
+            JsonlIndex(
+                config.source_path, np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64), job_ids
+            ).save()
+        except OSError:
+            # 源目录只读时跳过，sidecar 只是加速手段
+            pass
+
+    def parse_batches() -> Iterable[_JobBatch]:
+        # 解析线程：去重、构建文档与 metadata，攒满一个窗口后按长度分桶切批（多进程编码时每批喂满所有进程）；
+        # 已在索引中的岗位：检索文本变化的进入 reembed 批次由编码阶段重新编码，其余进入 sync 批次
+        added = 0
+        window, sync_batch, reembed_batch = _JobBatch("add"), _JobBatch("sync"), _JobBatch("reembed")
+        for job_id, job in iter_source():
+            if job_id in canonical_of:
+                window.consumed += 1
+                continue
+            with profiler.stage("document", 1):
+                document = build_job_document(job) if job_id not in seen_ids else ""
+                metadata = job_metadata(job_id, job, document) if document else {}
+            seen_ids.add(job_id)
+            if not document:
+                window.consumed += 1
+                continue
+            with profiler.stage("job_store", 1):
+                job_store.add(job_id, build_job_record(job))
+            if job_id in existing_ids:
+                change = classify_existing_job(existing_metadata[job_id], document, metadata)
+                if change == "document":
+                    reembed_batch.append(job_id, document, metadata)
+                    if len(reembed_batch) >= config.batch_size:
+                        reembed_batch.encode_batch_size = config.batch_size
+                        yield reembed_batch
+                        reembed_batch = _JobBatch("reembed")
+                else:
+                    # sync 批次中 metadata 为空表示无需更新
+                    sync_batch.append(job_id, document, metadata if change == "metadata" else {})
+                    if len(sync_batch) >= config.batch_size:
+                        yield sync_batch
+                        sync_batch = _JobBatch("sync")
+                continue
+
+            window.append(job_id, document, metadata)
+            added += 1
+            if config.max_items and added >= config.max_items:
+                break
+            if len(window) >= window_size:
+                yield from split_window(window)
+                window = _JobBatch("add")
+        if len(window):
+            yield from split_window(window)
+        elif window.consumed:
+            yield window
+        if len(reembed_batch):
+            reembed_batch.encode_batch_size = config.batch_size
+            yield reembed_batch
+        if len(sync_batch):
+            yield sync_batch
 
-        if len(docs_batch) >= batch_size:
-            add_job_batch(collection, model, docs_batch, metas_batch, ids_batch, batch_size=batch_size)
-            docs_batch = []
-            metas_batch = []
-            ids_batch = []
-        progress.update(1)
+    def encode_batch(batch: _JobBatch) -> _JobBatch:
+        # 编码阶段：新增岗位与检索文本变化的已有岗位都在这里编码，模型只在调用线程推理
+        if batch.kind in ("add", "reembed") and batch.ids:
+            with profiler.stage("encode", len(batch)):
+                embeddings = encode_documents(model, batch.documents, batch.encode_batch_size, embedding_cache)
+                batch.embeddings = truncate_embeddings(embeddings, embedding_dim)
+        return batch
 
-    if docs_batch:
-        add_job_batch(collection, model, docs_batch, metas_batch, ids_batch, batch_size=batch_size)
-    progress.close()
+    def write_batch(batch: _JobBatch) -> None:
+        # 写入阶段：向量库与 BM25 索引只在此线程修改
+        if batch.kind == "add":
+            if batch.ids:
+                write_job_batch(collection, batch.ids, batch.metadatas, batch.embeddings, profiler=profiler)
+                counts["new"] += len(batch.ids)
+            if lexical_builder is not None:
+                with profiler.stage("lexical", len(batch)):
+                    for job_id, document in zip(batch.ids, batch.documents):
+                        lexical_builder.add(job_id, document)
+        elif batch.kind == "reembed":
+            with profiler.stage("sync_existing", len(batch)):
+                write_job_batch(collection, batch.ids, batch.metadatas, batch.embeddings, upsert=True)
+            if lexical_builder is not None:
+                lexical_builder.remove(batch.ids)
+                for job_id, document in zip(batch.ids, batch.documents):
+                    lexical_builder.add(job_id, document)
+            counts["reembedded"] += len(batch.ids)
+        else:
+            if lexical_builder is not None:
+                # 词法索引缺失时为已有岗位补建 posting（已存在的 id 会被忽略）
+                for job_id, document in zip(batch.ids, batch.documents):
+                    lexical_builder.add(job_id, document)
+            # 新 metadata 去掉了旧字段（如旧格式索引迁移到精简 metadata）时需整条替换，其余原位更新
+            replaced: List[tuple[str, Dict[str, str]]] = []
+            merged: List[tuple[str, Dict[str, str]]] = []
+            for job_id, metadata in zip(batch.ids, batch.metadatas):
+                if metadata:
+                    stale = set(existing_metadata[job_id]) - set(metadata)
+                    (replaced if stale else merged).append((job_id, metadata))
+            with profiler.stage("sync_existing", len(replaced) + len(merged)):
+                if replaced:
+                    replace_job_metadata(
+                        collection,
+                        [job_id for job_id, _ in replaced],
+                        [metadata for _, metadata in replaced],
+                    )
+                if merged:
+                    collection.update(
+                        ids=[job_id for job_id, _ in merged],
+                        metadatas=[metadata for _, metadata in merged],
+                    )
+            counts["updated"] += len(replaced) + len(merged)
+        progress.update(len(batch) + batch.consumed)
+
+    try:
+        report = run_pipeline(
+            parse_batches(), encode_batch, write_batch, size_of=len, queue_size=config.pipeline_queue_size
+        )
+    finally:
+        progress.close()
+        if isinstance(model, EncodePool):
+            model.close()
+    stats.new, stats.reembedded, stats.updated = counts["new"], counts["reembedded"], counts["updated"]
+    stats.pipeline = report
+
+    if config.prune:
+        stale_ids = sorted(existing_ids - seen_ids)
+        for start in range(0, len(stale_ids), 1000):
+            collection.delete(ids=stale_ids[start : start + 1000])
+        if lexical_builder is not None:
+            lexical_builder.remove(stale_ids)
+        job_store.remove(stale_ids)
+        stats.removed = len(stale_ids)
+    if config.incremental:
+        stats.unchanged = len(existing_ids) - stats.reembedded - stats.updated - stats.removed
+
+    if embedding_cache is not None:
+        stats.embedding_cache = embedding_cache.stats()
+        embedding_cache.close()
+
+    stats.indexed_jobs = collection.count()
+    with profiler.stage("finalize"):
+        if isinstance(collection, NumpyIndexWriter):
+            collection.close()
+        if isinstance(collection, CategoryShardedWriter):
+            shards = collection.finish()
+            save_category_shards(db_path, config.collection_name, shards)
+            stats.category_shards = sorted(shards)
+        stats.stored_jobs = job_store.save(job_store_file)
+        stats.job_store_path = job_store_file
+        if lexical_builder is not None:
+            lexical_builder.save(lexical_path)
+        elif lexical_path.exists() and (config.reset or snapshot_root is not None):
+            # 重建向量索引但跳过词法索引时，删除旧词法索引避免与向量不一致
+            lexical_path.unlink()
+
+    if snapshot_root is not None:
+        publish_snapshot(
+            snapshot_root,
+            version,
+            {
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "backend": config.backend,
+                "collection": config.collection_name,
+                "model": config.model_name,
+                "embedding_dim": embedding_dim,
+                "jobs": stats.indexed_jobs,
+                "lexical": lexical_builder is not None,
+                "near_dedup": config.near_dedup,
+                "dedup_threshold": config.dedup_threshold if config.near_dedup else None,
+                "near_duplicates": stats.near_duplicates,
+                "source_path": str(config.source_path),
+                "parent": parent_version if config.incremental else None,
+            },
+        )
+        stats.snapshot_version = version
+        stats.pruned_snapshots = prune_snapshots(snapshot_root, config.keep_snapshots)
+
+    if config.profile_path is not None:
+        stats.profile = profiler.report(
+            stats.new,
+            config={
+                "source_path": str(config.source_path),
+                "backend": config.backend,
+                "model": config.model_name,
+                "device": config.device,
+                "batch_size": config.batch_size,
+                "encode_workers": config.encode_workers,
+                "threads_per_worker": threads_per_worker,
+                "length_sort_window": config.length_sort_window,
+                "token_budget": config.token_budget,
+                "embedding_dim": embedding_dim,
+                "dtype": config.dtype,
+                "near_dedup": config.near_dedup,
+                "embedding_cache": str(config.embedding_cache_path) if config.embedding_cache_path else None,
+            },
+            pipeline=report,
+            embedding_cache=stats.embedding_cache,
+        )
+        write_profile_report(config.profile_path, stats.profile)
 
-    return total
+    return stats
@@ -1,13 +1,54 @@
 from __future__ import annotations
 
+import asyncio
+import copy
+import hashlib
+import json
 import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
-from backend.job_index import DEFAULT_COLLECTION, DEFAULT_DB_PATH, DEFAULT_MODEL, get_collection, load_embedding_model
+from backend.category_shards import load_category_shards
+from backend.embedding_batcher import DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS, EmbeddingBatcher
+from backend.index_snapshots import DEFAULT_SNAPSHOT_POLL_SECONDS, IndexManager
+from backend.job_index import (
+    DEFAULT_COLLECTION,
+    DEFAULT_DB_PATH,
+    DEFAULT_MODEL,
+    get_collection,
+    load_embedding_model,
+    truncate_embeddings,
+)
+from backend.job_store import JobStore, job_store_path
+from backend.lexical_index import LexicalIndex, lexical_index_path, load_lexical_index
+from backend.resume_query import DEFAULT_QUERY_MAX_TOKENS, truncate_to_tokens
+from backend.vector_store import (
+    DEFAULT_NUMPY_PATH,
+    CategoryFilteredStore,
+    ChromaVectorStore,
+    NumpyVectorStore,
+    VectorStore,
+)
+
+DEFAULT_EMBEDDING_CACHE_SIZE = 256
+DEFAULT_SEARCH_WORKERS = 8
+DEFAULT_SEARCH_QUEUE_SIZE = 32
+DEFAULT_SEARCH_RETRY_AFTER = 2
+DEFAULT_SEARCH_OVERFETCH = 5
+DEFAULT_RRF_K = 60
+# 候选结果内部携带的岗位 id，回填完整字段后移除，不出现在返回结果里
+_JOB_ID_FIELD = "_job_id"
+# model.encode 内部的 fast tokenizer 不是线程安全的：关闭微批时检索线程会并发编码，需串行化
+_encode_lock = threading.Lock()
 
 
 def _use_local_only() -> bool:
@@ -15,47 +56,532 @@ def _use_local_only() -> bool:
     return value not in {"0", "false", "no"}
 
 
-@lru_cache(maxsize=1)
-def get_job_collection():
-    db_path = Path(os.getenv("JOB_CHROMA_PATH", str(DEFAULT_DB_PATH)))
+def _embedding_model_name() -> str:
+    return os.getenv("JOB_EMBEDDING_MODEL", DEFAULT_MODEL)
+
+
+def _embedding_quantize() -> str:
+    return os.getenv("JOB_EMBEDDING_QUANTIZE", "none").strip().lower()
+
+
+def _embedding_model_key() -> str:
+    # 缓存键区分模型与推理后端，量化前后的向量不会混用
+    return f"{_embedding_model_name()}|{_embedding_quantize()}"
+
+
+def canonicalize_text(text: str) -> str:
+    # 规范化查询文本，保证语义相同的输入得到相同的缓存键
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.strip().split("\n"))
+
+
+class EmbeddingCache:
+    """按内容寻址的查询向量 LRU 缓存，可选持久化到本地 JSONL 文件"""
+
+    def __init__(self, max_size: int = DEFAULT_EMBEDDING_CACHE_SIZE, path: Optional[Path] = None) -> None:
+        self.max_size = max(0, max_size)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, List[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._persisted = 0
+        if self.path is not None and self.max_size:
+            self._load()
+
+    @staticmethod
+    def make_key(text: str, model_name: str) -> str:
+        # 键 = sha256(模型名 + 规范化文本)
+        return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, key: str, embedding: List[float]) -> None:
+        if not self.max_size:
+            return
+        with self._lock:
+            self._insert(key, embedding)
+            if self.path is not None:
+                self._append(key, embedding)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "persist_path": str(self.path) if self.path else None,
+            }
+
+    def _insert(self, key: str, embedding: List[float]) -> None:
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self) -> None:
+        # 回放持久化文件，损坏的行直接跳过
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                    self._insert(record["key"], record["embedding"])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+                self._persisted += 1
+        self.evictions = 0
+        if self._persisted > 2 * self.max_size:
+            self._compact()
+
+    def _append(self, key: str, embedding: List[float]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps({"key": key, "embedding": embedding}) + "\n")
+        self._persisted += 1
+        if self._persisted > 2 * self.max_size:
+            self._compact()
+
+    def _compact(self) -> None:
+        # 只保留当前仍在缓存中的条目，原子替换持久化文件
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            for key, embedding in self._entries.items():
+                handle.write(json.dumps({"key": key, "embedding": embedding}) + "\n")
+        os.replace(tmp_path, self.path)
+        self._persisted = len(self._entries)
+
+
+class SearchBusyError(RuntimeError):
+    """检索线程池与等待队列均已占满"""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("job search executor is saturated")
+        self.retry_after = retry_after
+
+
+class SearchExecutor:
+    """专用的有界检索线程池，避免 encode 与向量查询阻塞事件循环"""
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_SEARCH_WORKERS,
+        max_queue: int = DEFAULT_SEARCH_QUEUE_SIZE,
+        retry_after: int = DEFAULT_SEARCH_RETRY_AFTER,
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self.completed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job-search")
+        # 执行中 + 排队中的任务总数上限，超出后立即拒绝
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise SearchBusyError(self.retry_after)
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        # 排队中被取消的任务不会执行，因此在 future 结束（含取消）时释放槽位
+        future.add_done_callback(lambda done: self._release(completed=not done.cancelled()))
+        return await asyncio.wrap_future(future)
+
+    def _release(self, completed: bool = False) -> None:
+        with self._lock:
+            self._pending -= 1
+            if completed:
+                self.completed += 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _index_location() -> Tuple[str, Path, str]:
+    # JOB_VECTOR_BACKEND 选择检索后端：chroma（默认）或 numpy
+    backend = os.getenv("JOB_VECTOR_BACKEND", "chroma").strip().lower()
     collection_name = os.getenv("JOB_CHROMA_COLLECTION", DEFAULT_COLLECTION)
-    return get_collection(db_path, collection_name, reset=False)
+    if backend == "numpy":
+        return backend, Path(os.getenv("JOB_NUMPY_PATH", str(DEFAULT_NUMPY_PATH))), collection_name
+    if backend == "chroma":
+        return backend, Path(os.getenv("JOB_CHROMA_PATH", str(DEFAULT_DB_PATH))), collection_name
+    raise ValueError(f"Unknown JOB_VECTOR_BACKEND: {backend}")
+
+
+def _hybrid_search_enabled() -> bool:
+    value = os.getenv("JOB_HYBRID_SEARCH", "true").strip().lower()
+    return value not in {"0", "false", "no"}
+
+
+def _category_routing_enabled() -> bool:
+    value = os.getenv("JOB_CATEGORY_ROUTING", "true").strip().lower()
+    return value not in {"0", "false", "no"}
+
+
+def open_index_snapshot(path: Path) -> Tuple[VectorStore, Optional[LexicalIndex], Optional[JobStore]]:
+    # 打开某个索引目录（版本目录或旧布局的根目录）下的向量索引、词法索引与岗位详情
+    backend, _, collection_name = _index_location()
+    if backend == "numpy":
+        store: VectorStore = NumpyVectorStore(path / collection_name)
+    else:
+        # 存在分片清单时一并打开各类别分片，类别查询直接路由过去
+        shards = {
+            job_category: get_collection(path, info["collection"], reset=False)
+            for job_category, info in load_category_shards(path, collection_name).items()
+        }
+        store = ChromaVectorStore(get_collection(path, collection_name, reset=False), shards=shards)
+    # JOB_EMBEDDING_DIM 仅用于校验，实际截断维度以索引记录为准，二者不一致时拒绝加载
+    expected_dim = int(os.getenv("JOB_EMBEDDING_DIM", "0") or 0)
+    recorded_dim = store.embedding_dim()
+    if expected_dim and recorded_dim and expected_dim != recorded_dim:
+        raise ValueError(f"JOB_EMBEDDING_DIM={expected_dim} does not match index dimension {recorded_dim}")
+    # 混合检索：索引目录下存在词法索引且未关闭 JOB_HYBRID_SEARCH 时启用
+    lexical = load_lexical_index(lexical_index_path(path, collection_name)) if _hybrid_search_enabled() else None
+    # 旧索引的 metadata 自带完整字段，没有 JobStore 时查询结果不做回填
+    jobs_path = job_store_path(path, collection_name)
+    jobs = JobStore(jobs_path) if jobs_path.exists() else None
+    return store, lexical, jobs
+
+
+def index_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    # 岗位详情文件以写临时文件 + 替换的方式更新，原地重建后 inode/mtime/大小随之变化
+    _, _, collection_name = _index_location()
+    try:
+        stat = job_store_path(path, collection_name).stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+@lru_cache(maxsize=1)
+def get_index_manager() -> IndexManager:
+    # 索引根目录下有 current 指针时按版本热切换，旧布局原地重建后也会重新打开；JOB_INDEX_POLL_SECONDS=0 关闭轮询
+    _, root, _ = _index_location()
+    poll_seconds = float(os.getenv("JOB_INDEX_POLL_SECONDS", str(DEFAULT_SNAPSHOT_POLL_SECONDS)))
+    manager = IndexManager(root, open_index_snapshot, poll_seconds=poll_seconds, signature=index_signature)
+    manager.start_watcher()
+    return manager
+
+
+def get_job_collection() -> VectorStore:
+    return get_index_manager().current().store
+
+
+def get_lexical_index() -> Optional[LexicalIndex]:
+    return get_index_manager().current().lexical
+
+
+def query_embedding_for(store: VectorStore, text: str) -> List[float]:
+    # 缓存中保存全维向量，按索引维度截断并重新归一化
+    vector = embed_text(text)
+    dim = store.embedding_dim() or int(os.getenv("JOB_EMBEDDING_DIM", "0") or 0)
+    if not dim or dim == len(vector):
+        return vector
+    if dim > len(vector):
+        raise ValueError(f"Index dimension {dim} exceeds model output dimension {len(vector)}")
+    return truncate_embeddings(np.asarray(vector, dtype=np.float32), dim).tolist()
 
 
 @lru_cache(maxsize=1)
 def get_embedding_model() -> SentenceTransformer:
-    model_name = os.getenv("JOB_EMBEDDING_MODEL", DEFAULT_MODEL)
     device = os.getenv("JOB_EMBEDDING_DEVICE", "cpu")
-    return load_embedding_model(model_name=model_name, device=device, local_only=_use_local_only())
+    return load_embedding_model(
+        model_name=_embedding_model_name(),
+        device=device,
+        local_only=_use_local_only(),
+        quantize=_embedding_quantize(),
+    )
 
 
-def embed_text(text: str) -> List[float]:
-    model = get_embedding_model()
-    embedding = model.encode(
-        [text],
-        normalize_embeddings=True,
-        convert_to_numpy=True,
-        show_progress_bar=False,
+@lru_cache(maxsize=1)
+def _query_max_tokens() -> int:
+    # 与 tokenizer 的截断参数一起在首次使用时固定
+    return int(os.getenv("JOB_QUERY_MAX_TOKENS", str(DEFAULT_QUERY_MAX_TOKENS)))
+
+
+@lru_cache(maxsize=1)
+def get_query_tokenizer() -> Optional[Any]:
+    # 查询截断用的独立 tokenizer，随模型在预热时建立一次：fast tokenizer 的截断参数是实例状态，
+    # 与批处理线程 model.encode 共用同一实例会互相覆盖甚至抛出 "Already borrowed"。
+    # 建立时先按固定的 max_tokens 截断一次，之后参数不再变化，并发调用只读共享状态，无需加锁
+    tokenizer = getattr(get_embedding_model(), "tokenizer", None)
+    if tokenizer is None:
+        return None
+    tokenizer = copy.deepcopy(tokenizer)
+    truncate_to_tokens("warm-up", tokenizer, _query_max_tokens())
+    return tokenizer
+
+
+def truncate_query(text: str) -> str:
+    # 超出 token 上限的部分对检索贡献很小，却线性增加编码耗时
+    return truncate_to_tokens(text, get_query_tokenizer(), _query_max_tokens())
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> EmbeddingCache:
+    max_size = int(os.getenv("JOB_EMBEDDING_CACHE_SIZE", str(DEFAULT_EMBEDDING_CACHE_SIZE)))
+    cache_path = os.getenv("JOB_EMBEDDING_CACHE_PATH", "").strip()
+    return EmbeddingCache(max_size=max_size, path=Path(cache_path) if cache_path else None)
+
+
+@lru_cache(maxsize=1)
+def get_search_executor() -> SearchExecutor:
+    return SearchExecutor(
+        max_workers=int(os.getenv("JOB_SEARCH_WORKERS", str(DEFAULT_SEARCH_WORKERS))),
+        max_queue=int(os.getenv("JOB_SEARCH_QUEUE_SIZE", str(DEFAULT_SEARCH_QUEUE_SIZE))),
+        retry_after=int(os.getenv("JOB_SEARCH_RETRY_AFTER", str(DEFAULT_SEARCH_RETRY_AFTER))),
     )
-    return embedding[0].tolist()
+
+
+def encode_texts(texts: List[str]) -> List[List[float]]:
+    model = get_embedding_model()
+    with _encode_lock:
+        embeddings = model.encode(
+            texts,
+            batch_size=len(texts),
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+    return embeddings.tolist()
+
+
+@lru_cache(maxsize=1)
+def get_embedding_batcher() -> Optional[EmbeddingBatcher]:
+    # 等待窗口设为 0 时关闭微批，逐条编码
+    max_wait_ms = float(os.getenv("JOB_EMBEDDING_BATCH_WAIT_MS", str(DEFAULT_MAX_WAIT_MS)))
+    if max_wait_ms <= 0:
+        return None
+    max_batch_size = int(os.getenv("JOB_EMBEDDING_MAX_BATCH", str(DEFAULT_MAX_BATCH_SIZE)))
+    return EmbeddingBatcher(encode_texts, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+
+def embed_text(text: str) -> List[float]:
+    text = canonicalize_text(text)
+    cache = get_embedding_cache()
+    key = EmbeddingCache.make_key(text, _embedding_model_key())
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    batcher = get_embedding_batcher()
+    vector = batcher.encode(text) if batcher is not None else encode_texts([text])[0]
+    cache.put(key, vector)
+    return vector
+
+
+def fuse_rankings(
+    store: VectorStore,
+    dense: Dict[str, List[Any]],
+    lexical: List[Tuple[str, float]],
+    rrf_k: int = DEFAULT_RRF_K,
+) -> List[Dict[str, Any]]:
+    # 倒数排名融合（RRF）：score = Σ 1 / (k + rank)，只依赖名次，无需对齐两种分数的量纲
+    scores: Dict[str, float] = {}
+    candidates: Dict[str, Dict[str, Any]] = {}
+    for rank, (job_id, metadata, distance) in enumerate(zip(dense["ids"], dense["metadatas"], dense["distances"])):
+        scores[job_id] = 1.0 / (rrf_k + rank + 1)
+        candidates[job_id] = {**metadata, "distance": float(distance), _JOB_ID_FIELD: job_id}
+
+    lexical_only = [job_id for job_id, _ in lexical if job_id not in candidates]
+    for job_id, metadata in zip(lexical_only, store.get(lexical_only)):
+        if metadata is not None:
+            candidates[job_id] = {**metadata, "distance": None, _JOB_ID_FIELD: job_id}
+    for rank, (job_id, _) in enumerate(lexical):
+        if job_id in candidates:
+            scores[job_id] = scores.get(job_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+
+    ranked = sorted(candidates, key=lambda job_id: scores[job_id], reverse=True)
+    return [candidates[job_id] for job_id in ranked]
+
+
+def rank_by_category(
+    candidates: List[Dict[str, Any]],
+    top_k: int,
+    job_category: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    # 同类别结果优先，其余结果按原有排序补足 top_k，并标注来源层级
+    tiers: Dict[str, List[Dict[str, Any]]] = {"category": [], "global": []}
+    for candidate in candidates:
+        tier = "category" if job_category and candidate.get("job_category") == job_category else "global"
+        tiers[tier].append({**candidate, "match_tier": tier})
+    return (tiers["category"] + tiers["global"])[:top_k]
 
 
 def query_jobs(
     resume_text: str,
     top_k: int = 20,
     job_category: Optional[str] = None,
-) -> List[Dict[str, str]]:
-    collection = get_job_collection()
-    if collection.count() == 0:
+) -> List[Dict[str, Any]]:
+    # 整个查询持有同一索引版本，期间发生热切换也不会混用新旧版本
+    with get_index_manager().lease() as snapshot:
+        results = _query_snapshot(snapshot.store, snapshot.lexical, resume_text, top_k, job_category)
+        return hydrate_jobs(snapshot.jobs, results)
+
+
+def hydrate_jobs(job_store: Optional[JobStore], candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # 只为最终返回的 top_k 条结果从 JobStore 读取完整字段，索引中的小字段与分数覆盖在其上
+    job_ids = [candidate.get(_JOB_ID_FIELD) for candidate in candidates]
+    records = job_store.get_many([job_id for job_id in job_ids if job_id]) if job_store is not None else {}
+    hydrated = []
+    for job_id, candidate in zip(job_ids, candidates):
+        fields = {key: value for key, value in candidate.items() if key not in (_JOB_ID_FIELD, "doc_hash")}
+        hydrated.append({**records.get(job_id, {}), **fields})
+    return hydrated
+
+
+def _query_snapshot(
+    collection: VectorStore,
+    lexical_index: Optional[LexicalIndex],
+    resume_text: str,
+    top_k: int,
+    job_category: Optional[str],
+) -> List[Dict[str, Any]]:
+    count = collection.count()
+    if count == 0:
         return []
 
-    query_embedding = embed_text(resume_text)
-    where = {"job_category": job_category} if job_category else None
+    resume_text = truncate_query(resume_text)
+    query_embedding = query_embedding_for(collection, resume_text)
+    overfetch = max(1, int(os.getenv("JOB_SEARCH_OVERFETCH", str(DEFAULT_SEARCH_OVERFETCH))))
+    n_candidates = top_k * overfetch if lexical_index is not None else top_k
 
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=top_k,
-        where=where,
-        include=["metadatas"],
-    )
-    return results.get("metadatas", [[]])[0] or []
+    if job_category:
+        # 类别条件下推到检索：有分片时直接检索分片，否则在完整索引上带过滤条件检索，只做一次检索，
+        # 耗时与类别稀疏程度无关；类别内岗位不足 top_k 时只返回这些同类别结果，不再追加全局检索
+        shard = collection.category_shard(job_category) if _category_routing_enabled() else None
+        scoped = shard if shard is not None else CategoryFilteredStore(collection, job_category)
+        lexical = None
+        if lexical_index is not None:
+            # 词法结果同样限定在该类别内：多取若干倍后过滤，名次按类别内重新计算
+            wide = lexical_index.search(resume_text, n_candidates * overfetch)
+            lexical = _filter_lexical(scoped, wide)[:n_candidates]
+        candidates = _search_candidates(scoped, query_embedding, lexical, n_candidates)
+        if candidates:
+            return rank_by_category(candidates, top_k, job_category)
+        # 该类别在索引中没有任何岗位（未知类别）时，按无类别查询处理
+
+    lexical = lexical_index.search(resume_text, n_candidates) if lexical_index is not None else None
+    return rank_by_category(_search_candidates(collection, query_embedding, lexical, n_candidates), top_k)
+
+
+def _filter_lexical(store: VectorStore, lexical: List[Tuple[str, float]]) -> List[Tuple[str, float]]:
+    # 只保留 store 中存在（类别视图下即同类别）的词法命中
+    metadatas = store.get([job_id for job_id, _ in lexical])
+    return [hit for hit, metadata in zip(lexical, metadatas) if metadata is not None]
+
+
+def _search_candidates(
+    store: VectorStore,
+    query_embedding: List[float],
+    lexical: Optional[List[Tuple[str, float]]],
+    n_candidates: int,
+) -> List[Dict[str, Any]]:
+    # 稠密检索；有词法结果时与之做 RRF 融合
+    n_results = min(store.count(), n_candidates)
+    if n_results <= 0:
+        return []
+    results = store.search(query_embedding, n_results=n_results)
+    if lexical is None:
+        return [
+            {**metadata, "distance": float(distance), _JOB_ID_FIELD: job_id}
+            for job_id, metadata, distance in zip(results["ids"], results["metadatas"], results["distances"])
+        ]
+    rrf_k = int(os.getenv("JOB_RRF_K", str(DEFAULT_RRF_K)))
+    return fuse_rankings(store, results, lexical, rrf_k)
+
+
+def warm_up() -> Dict[str, Any]:
+    # 预加载模型与索引，并执行一次假编码和假查询，返回各阶段耗时（毫秒）
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    get_embedding_model()
+    get_query_tokenizer()
+    timings["model_load_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    snapshot = get_index_manager().current()
+    collection = snapshot.store
+    count = collection.count()
+    timings["collection_open_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    query_embedding = encode_texts(["warm-up"])[0]
+    dim = collection.embedding_dim()
+    if dim and dim < len(query_embedding):
+        query_embedding = truncate_embeddings(np.asarray(query_embedding, dtype=np.float32), dim).tolist()
+    timings["first_encode_ms"] = (time.perf_counter() - start) * 1000
+
+    if count:
+        start = time.perf_counter()
+        collection.search(query_embedding, n_results=1)
+        timings["first_query_ms"] = (time.perf_counter() - start) * 1000
+
+    # 词法索引随索引版本一起加载，这里只做一次假查询
+    lexical_index = snapshot.lexical
+    if lexical_index is not None:
+        start = time.perf_counter()
+        lexical_index.search("warm-up", 1)
+        timings["lexical_query_ms"] = (time.perf_counter() - start) * 1000
+
+    if snapshot.jobs is not None:
+        start = time.perf_counter()
+        snapshot.jobs.get("warm-up")
+        timings["job_store_lookup_ms"] = (time.perf_counter() - start) * 1000
+
+    timings["indexed_jobs"] = count
+    timings["index_version"] = snapshot.version
+    return timings
+
+
+def shutdown_search() -> None:
+    get_index_manager().stop()
+    get_search_executor().shutdown()
+    batcher = get_embedding_batcher()
+    if batcher is not None:
+        batcher.close()
+
+
+async def aquery_jobs(
+    resume_text: str,
+    top_k: int = 20,
+    job_category: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    # 在专用线程池中执行检索，线程池占满时抛出 SearchBusyError
+    return await get_search_executor().run(query_jobs, resume_text, top_k=top_k, job_category=job_category)
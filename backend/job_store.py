@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+JOB_STORE_MAGIC = b"JOBSTOR1"
+JOB_STORE_FORMAT_VERSION = 1
+_ALIGN = 8
+
+
+def job_store_path(db_path: Path, collection_name: str) -> Path:
+    # 岗位详情与向量索引放在同一根目录下
+    return Path(db_path) / f"{collection_name}.jobs.bin"
+
+
+def is_job_store_file(path: Path) -> bool:
+    # 按魔数识别，与扩展名无关
+    try:
+        with open(path, "rb") as handle:
+            return handle.read(len(JOB_STORE_MAGIC)) == JOB_STORE_MAGIC
+    except OSError:
+        return False
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _as_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+class StringColumn:
+    """
+    一列文本的向量化视图：plain 列为 行偏移 + utf-8 文本区；dict 列为 行编码 + 取值表
+
+    过滤与分面在数组上完成，只有命中的行才解码成 str。
+    """
+
+    def __init__(self, name: str, offsets: np.ndarray, data: np.ndarray, codes: Optional[np.ndarray] = None) -> None:
+        self.name = name
+        self.offsets = offsets
+        self.data = data
+        self.codes = codes
+        # 通过 memoryview 切片解码，避免 numpy 标量索引的开销
+        self._view = memoryview(data) if len(data) else memoryview(b"")
+        self._dictionary: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.codes) if self.codes is not None else len(self.offsets) - 1
+
+    @property
+    def is_dictionary(self) -> bool:
+        return self.codes is not None
+
+    def _decode(self, index: int) -> str:
+        return str(self._view[int(self.offsets[index]) : int(self.offsets[index + 1])], "utf-8")
+
+    def dictionary(self) -> List[str]:
+        # dict 列的取值表，编码即下标
+        if self.codes is None:
+            raise ValueError(f"column {self.name} is not dictionary-encoded")
+        if self._dictionary is None:
+            self._dictionary = self._take_plain(np.arange(len(self.offsets) - 1))
+        return self._dictionary
+
+    def value(self, row: int) -> str:
+        if self.codes is not None:
+            return self.dictionary()[int(self.codes[row])]
+        return self._decode(row)
+
+    def take(self, rows: Sequence[int]) -> List[str]:
+        """批量解码若干行，偏移一次性转成 Python 列表，比逐行 value 快一个数量级"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if self.codes is not None:
+            dictionary = self.dictionary()
+            return [dictionary[code] for code in self.codes[rows].tolist()]
+        return self._take_plain(rows)
+
+    def _take_plain(self, indices: np.ndarray) -> List[str]:
+        view = self._view
+        starts = self.offsets[indices].tolist()
+        ends = self.offsets[indices + 1].tolist()
+        return [str(view[start:end], "utf-8") for start, end in zip(starts, ends)]
+
+    def lengths(self) -> np.ndarray:
+        # 每行的 utf-8 字节数
+        sizes = np.diff(self.offsets)
+        return sizes[self.codes] if self.codes is not None else sizes
+
+    def isin(self, values: Iterable[str]) -> np.ndarray:
+        wanted = set(values)
+        if self.codes is not None:
+            codes = [code for code, value in enumerate(self.dictionary()) if value in wanted]
+            return np.isin(self.codes, codes)
+        # plain 列先按字节长度筛出候选，再只比较候选行
+        encoded = {value.encode("utf-8") for value in wanted}
+        mask = np.isin(self.lengths(), [len(value) for value in encoded])
+        for row in np.flatnonzero(mask):
+            mask[row] = self._view[int(self.offsets[row]) : int(self.offsets[row + 1])].tobytes() in encoded
+        return mask
+
+    def equals(self, value: str) -> np.ndarray:
+        return self.isin([value])
+
+    def facet(self, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """各取值的行数，mask 限定参与统计的行；按行数降序"""
+        if self.codes is not None:
+            codes = self.codes if mask is None else self.codes[mask]
+            counts = np.bincount(codes, minlength=len(self.offsets) - 1)
+            dictionary = self.dictionary()
+            pairs = [(dictionary[code], int(counts[code])) for code in np.flatnonzero(counts)]
+        else:
+            rows = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+            pairs = list(Counter(self.take(rows)).items())
+        return dict(sorted(pairs, key=lambda pair: -pair[1]))
+
+
+class JobStore:
+    """
+    按岗位 id 存取完整岗位字段的列式只读存储，整个文件内存映射
+
+    文件布局：魔数 + 头部 JSON 长度 + 头部 JSON，其后各段按 8 字节对齐：
+    排序后的 id（定长字节串）、排序位置到行号的映射，以及每列的数据段。
+    plain 列为 int64 行偏移与 utf-8 文本区，dict 列另有 int32 行编码，文本区只存去重后的取值。
+    按 id 查找是对排序 id 的二分查找，打开时不需要构建字典，也不解析任何记录。
+    行号即写入顺序，岗位目录（JobCatalog）据此保持源数据顺序。
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._mm = np.memmap(self.path, dtype=np.uint8, mode="r")
+        if bytes(self._mm[: len(JOB_STORE_MAGIC)]) != JOB_STORE_MAGIC:
+            raise ValueError(f"{self.path} is not a job store")
+        header_start = len(JOB_STORE_MAGIC) + 8
+        header_len = int(self._mm[len(JOB_STORE_MAGIC) : header_start].view(np.int64)[0])
+        header = json.loads(bytes(self._mm[header_start : header_start + header_len]).decode("utf-8"))
+        self._base = _aligned(header_start + header_len)
+        if header["format_version"] != JOB_STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported job store format at {self.path}")
+
+        self.header = header
+        self.columns: List[str] = header["columns"]
+        self.count: int = header["count"]
+        sections = header["sections"]
+        self.ids = self._section(sections["ids"]).view(f"S{header['id_width']}")
+        self.rows = self._section(sections["rows"]).view(np.int64)
+        self.num_rows: int = header["num_rows"]
+        self._columns: Dict[str, StringColumn] = {}
+        for index, name in enumerate(self.columns):
+            codes = sections.get(f"codes_{index}")
+            self._columns[name] = StringColumn(
+                name,
+                self._section(sections[f"offsets_{index}"]).view(np.int64),
+                self._section(sections[f"data_{index}"]),
+                self._section(codes).view(np.int32) if codes is not None else None,
+            )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _section(self, bounds: Sequence[int]) -> np.ndarray:
+        return self._mm[self._base + bounds[0] : self._base + bounds[1]]
+
+    def column(self, name: str) -> StringColumn:
+        return self._columns[name]
+
+    def find_rows(self, job_ids: Sequence[str]) -> np.ndarray:
+        # 批量二分查找，返回行号，不存在的 id 为 -1；重复 id 返回最早写入的一行
+        if not self.count or not len(job_ids):
+            return np.full(len(job_ids), -1, dtype=np.int64)
+        encoded = [job_id.encode("utf-8") for job_id in job_ids]
+        keys = np.asarray(encoded, dtype=self.ids.dtype)
+        positions = np.searchsorted(self.ids, keys)
+        clipped = np.minimum(positions, self.count - 1)
+        # 定长字节串会截断超长的 id，需额外排除
+        fits = np.asarray([len(key) <= self.ids.dtype.itemsize for key in encoded], dtype=bool)
+        found = fits & (positions < self.count) & (self.ids[clipped] == keys)
+        return np.where(found, self.rows[clipped], -1)
+
+    def record_at(self, row: int) -> Dict[str, str]:
+        return {name: column.value(row) for name, column in self._columns.items()}
+
+    def records_at(self, rows: Sequence[int]) -> List[Dict[str, str]]:
+        # 按列批量解码后再组装，逐行读取大量记录时使用
+        values = [column.take(rows) for column in self._columns.values()]
+        return [dict(zip(self.columns, row_values)) for row_values in zip(*values)]
+
+    def get(self, job_id: str) -> Optional[Dict[str, str]]:
+        row = int(self.find_rows([job_id])[0])
+        return self.record_at(row) if row >= 0 else None
+
+    def get_many(self, job_ids: Sequence[str]) -> Dict[str, Dict[str, str]]:
+        rows = self.find_rows(list(job_ids))
+        return {job_id: self.record_at(int(row)) for job_id, row in zip(job_ids, rows) if row >= 0}
+
+    def row_ids(self) -> List[str]:
+        # 按行号排列的岗位 id
+        ids: List[Optional[str]] = [None] * self.num_rows
+        for job_id, row in zip(self.ids, self.rows):
+            ids[int(row)] = job_id.decode("utf-8")
+        return ids
+
+    def iter_records(self, chunk_size: int = 4096) -> Iterable[tuple[str, Dict[str, str]]]:
+        # 按写入顺序遍历保留的记录，分块批量解码
+        order = np.argsort(self.rows, kind="stable")
+        for start in range(0, len(order), chunk_size):
+            positions = order[start : start + chunk_size]
+            ids = [job_id.decode("utf-8") for job_id in self.ids[positions].tolist()]
+            yield from zip(ids, self.records_at(self.rows[positions]))
+
+    def close(self) -> None:
+        # 丢弃对内存映射的引用，由 GC 解除映射
+        self.ids = self.ids[:0]
+        self.rows = self.rows[:0]
+        self._columns = {}
+        self._mm = None
+
+
+class _ColumnSpool:
+    def __init__(self, dictionary: bool) -> None:
+        self.file = tempfile.TemporaryFile()
+        self.lengths: List[int] = []
+        self.codes: Optional[List[int]] = [] if dictionary else None
+        self.values: Dict[str, int] = {}
+
+    def append(self, text: str) -> None:
+        if self.codes is None:
+            self._write(text)
+            return
+        code = self.values.get(text)
+        if code is None:
+            code = self.values[text] = len(self.values)
+            self._write(text)
+        self.codes.append(code)
+
+    def backfill(self, rows: int) -> None:
+        # 写入中途出现的新列，为此前的行补空值
+        for _ in range(rows):
+            self.append("")
+
+    def _write(self, text: str) -> None:
+        encoded = text.encode("utf-8")
+        self.file.write(encoded)
+        self.lengths.append(len(encoded))
+
+
+class JobStoreWriter:
+    """
+    流式写入 JobStore：每列的文本追加到各自的临时文件，save 时拼成单个文件并原子替换
+
+    dedupe=True 时同一 id 只保留第一次写入的记录。base 为已有的 JobStore 时（增量构建），
+    本次未写入且未被 remove 的岗位原样保留。extra_columns=True 时记录中出现的新字段追加为新列。
+    dictionary_columns 中的列做字典编码，适合类别、学历这类取值很少的字段。
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        base: Optional[JobStore] = None,
+        dictionary_columns: Sequence[str] = (),
+        dedupe: bool = True,
+        extra_columns: bool = False,
+    ) -> None:
+        self.columns = list(columns)
+        self.base = base
+        self.dictionary_columns = set(dictionary_columns)
+        self.dedupe = dedupe
+        self.extra_columns = extra_columns
+        self._ids: List[str] = []
+        self._seen: set[str] = set()
+        self._removed: set[str] = set()
+        self._spools = [_ColumnSpool(name in self.dictionary_columns) for name in self.columns]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, job_id: str, record: Dict[str, Any]) -> None:
+        if self.dedupe and job_id in self._seen:
+            return
+        if self.extra_columns:
+            for name in record:
+                if name not in self.columns:
+                    spool = _ColumnSpool(name in self.dictionary_columns)
+                    spool.backfill(len(self._ids))
+                    self.columns.append(name)
+                    self._spools.append(spool)
+        self._seen.add(job_id)
+        self._ids.append(job_id)
+        for name, spool in zip(self.columns, self._spools):
+            spool.append(_as_text(record.get(name)))
+
+    def remove(self, job_ids: Iterable[str]) -> None:
+        self._removed.update(job_ids)
+
+    def save(self, path: Path) -> int:
+        if self.base is not None:
+            for job_id, record in self.base.iter_records():
+                if job_id not in self._seen and job_id not in self._removed:
+                    self.add(job_id, record)
+            self.base = None
+
+        keep = np.asarray([job_id not in self._removed for job_id in self._ids], dtype=bool)
+        ids = np.asarray([job_id.encode("utf-8") for job_id in self._ids] or [b""], dtype="S")[: len(self._ids)]
+        order = np.argsort(ids, kind="stable")
+        order = order[keep[order]]
+
+        header: Dict[str, Any] = {
+            "format_version": JOB_STORE_FORMAT_VERSION,
+            "columns": self.columns,
+            "dictionary_columns": [name for name in self.columns if name in self.dictionary_columns],
+            "count": int(len(order)),
+            "num_rows": len(self._ids),
+            "id_width": int(ids.dtype.itemsize),
+            "sections": {},
+        }
+        # 行号按写入顺序保留，被删除的行只是不再被 id 段引用
+        payloads: List[tuple[str, Any, int]] = [
+            ("ids", ids[order], int(ids[order].nbytes)),
+            ("rows", order.astype(np.int64), int(order.size * 8)),
+        ]
+        for index, spool in enumerate(self._spools):
+            offsets = np.concatenate([[0], np.cumsum(spool.lengths, dtype=np.int64)]).astype(np.int64)
+            if spool.codes is not None:
+                codes = np.asarray(spool.codes, dtype=np.int32)
+                payloads.append((f"codes_{index}", codes, int(codes.nbytes)))
+            payloads.append((f"offsets_{index}", offsets, int(offsets.nbytes)))
+            payloads.append((f"data_{index}", spool.file, int(offsets[-1])))
+
+        # 各段偏移相对于头部之后第一个对齐位置
+        position = 0
+        for name, _, size in payloads:
+            header["sections"][name] = [position, position + size]
+            position = _aligned(position + size)
+        encoded_header = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        base = _aligned(len(JOB_STORE_MAGIC) + 8 + len(encoded_header))
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as handle:
+            handle.write(JOB_STORE_MAGIC)
+            handle.write(np.asarray([len(encoded_header)], dtype=np.int64).tobytes())
+            handle.write(encoded_header)
+            for name, payload, _ in payloads:
+                handle.seek(base + header["sections"][name][0])
+                if isinstance(payload, np.ndarray):
+                    handle.write(payload.tobytes())
+                else:
+                    payload.seek(0)
+                    shutil.copyfileobj(payload, handle)
+            handle.truncate(base + position)
+        # 写临时文件后替换，正在 mmap 旧文件的进程不受影响
+        os.replace(tmp_path, path)
+        self.close()
+        return int(len(order))
+
+    def close(self) -> None:
+        for spool in self._spools:
+            spool.file.close()
+        self._spools = []
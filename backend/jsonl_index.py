@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+JSONL_INDEX_FORMAT_VERSION = 1
+
+
+def safe_text(value: Any) -> str:
+    # 清洗文本
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def make_job_id(job: Dict[str, Any]) -> str:
+    # 生成唯一ID
+    key = "|".join(
+        [
+            safe_text(job.get("公司名称")),
+            safe_text(job.get("职位名称")),
+            safe_text(job.get("岗位描述")),
+        ]
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def jsonl_index_path(source_path: Path) -> Path:
+    # offline_jobs.jsonl -> offline_jobs.jsonl.idx
+    source_path = Path(source_path)
+    return source_path.with_name(source_path.name + ".idx")
+
+
+def iter_jsonl_spans(source_path: Path, offset: int = 0) -> Iterable[Tuple[int, int, bytes]]:
+    # 从 offset 开始逐行扫描，返回非空行去掉首尾空白后的 [start, end) 字节区间与内容
+    with open(source_path, "rb") as handle:
+        handle.seek(offset)
+        position = offset
+        for line in handle:
+            stripped = line.strip()
+            if stripped:
+                # 行首可能带 utf-8 BOM 或空白，按实际内容起点记录
+                lead = len(line) - len(line.lstrip())
+                if stripped.startswith(b"\xef\xbb\xbf"):
+                    stripped = stripped[3:]
+                    lead += 3
+                yield position + lead, position + lead + len(stripped), stripped
+            position += len(line)
+
+
+def count_jsonl_records(source_path: Path) -> int:
+    # 统计非空记录数：sidecar 有效时直接取已索引部分的条数，其余部分只做字节扫描，不解析 JSON 也不写 .idx
+    index = JsonlIndex.load(source_path)
+    count, offset = (len(index), index.indexed_size) if index is not None else (0, 0)
+    with open(source_path, "rb") as handle:
+        handle.seek(offset)
+        return count + sum(1 for line in handle if line.strip())
+
+
+class JsonlIndex:
+    """
+    JSONL 的字节偏移 sidecar：每条非空记录的 [start, end) 偏移与岗位 id
+
+    支持按行号/岗位 id O(1) 随机读取与无需扫描的计数。由爬虫在写入后刷新，
+    建索引时在解析阶段顺带生成（见 job_index.build_job_index），不额外读取源文件。
+    源文件只追加时 refresh 只扫描新增部分；被覆盖重写时（指纹不符）整体重建。
+    """
+
+    def __init__(self, source_path: Path, starts: np.ndarray, ends: np.ndarray, ids: List[str]) -> None:
+        self.source_path = Path(source_path)
+        self.starts = starts
+        self.ends = ends
+        self.ids = ids
+        self.row_by_id: Dict[str, int] = {}
+        for row, job_id in enumerate(ids):
+            # 重复岗位以第一次出现为准，与建索引时的去重一致
+            self.row_by_id.setdefault(job_id, row)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def indexed_size(self) -> int:
+        return int(self.ends[-1]) if len(self.ends) else 0
+
+    @classmethod
+    def build(cls, source_path: Path) -> "JsonlIndex":
+        starts, ends, ids = _scan(source_path, 0)
+        return cls(source_path, np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64), ids)
+
+    @classmethod
+    def load(cls, source_path: Path) -> Optional["JsonlIndex"]:
+        path = jsonl_index_path(source_path)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            if int(data["format_version"]) != JSONL_INDEX_FORMAT_VERSION:
+                return None
+            index = cls(source_path, data["starts"], data["ends"], data["ids"].tolist())
+            fingerprint = str(data["fingerprint"])
+        return index if index._fingerprint() == fingerprint else None
+
+    def refresh(self) -> int:
+        # 源文件只追加时增量扫描新增记录，返回新增条数
+        size = os.path.getsize(self.source_path)
+        if size <= self.indexed_size:
+            return 0
+        starts, ends, ids = _scan(self.source_path, self.indexed_size)
+        if ids:
+            self.starts = np.concatenate([self.starts, np.asarray(starts, dtype=np.int64)])
+            self.ends = np.concatenate([self.ends, np.asarray(ends, dtype=np.int64)])
+            first_row = len(self.ids)
+            self.ids.extend(ids)
+            for row, job_id in enumerate(ids, start=first_row):
+                self.row_by_id.setdefault(job_id, row)
+        return len(ids)
+
+    def save(self) -> Path:
+        path = jsonl_index_path(self.source_path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as handle:
+            np.savez(
+                handle,
+                format_version=np.asarray(JSONL_INDEX_FORMAT_VERSION),
+                starts=self.starts,
+                ends=self.ends,
+                ids=np.asarray(self.ids, dtype=str),
+                fingerprint=np.asarray(self._fingerprint()),
+            )
+        os.replace(tmp_path, path)
+        return path
+
+    def read_row(self, row: int) -> Dict[str, Any]:
+        with open(self.source_path, "rb") as handle:
+            return self._read(handle, row)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self.row_by_id.get(job_id)
+        return self.read_row(row) if row is not None else None
+
+    def _read(self, handle, row: int) -> Dict[str, Any]:
+        start, end = int(self.starts[row]), int(self.ends[row])
+        handle.seek(start)
+        return json.loads(handle.read(end - start))
+
+    def _fingerprint(self) -> str:
+        # 已索引部分的长度 + 首尾两条记录的内容，足以识别覆盖重写或截断
+        if not self.source_path.exists() or os.path.getsize(self.source_path) < self.indexed_size:
+            return ""
+        digest = hashlib.sha1(str(self.indexed_size).encode("ascii"))
+        if len(self.ids):
+            with open(self.source_path, "rb") as handle:
+                for row in (0, len(self.ids) - 1):
+                    handle.seek(int(self.starts[row]))
+                    digest.update(handle.read(int(self.ends[row] - self.starts[row])))
+        return digest.hexdigest()
+
+
+def _scan(source_path: Path, offset: int) -> Tuple[List[int], List[int], List[str]]:
+    starts: List[int] = []
+    ends: List[int] = []
+    ids: List[str] = []
+    for start, end, line in iter_jsonl_spans(source_path, offset):
+        starts.append(start)
+        ends.append(end)
+        ids.append(make_job_id(json.loads(line)))
+    return starts, ends, ids
+
+
+def open_jsonl_index(source_path: Path) -> JsonlIndex:
+    """载入 sidecar 并补齐追加的记录；不存在或已失效时全量重建，有变化就写回磁盘"""
+    index = JsonlIndex.load(source_path)
+    if index is None:
+        index = JsonlIndex.build(source_path)
+        changed = True
+    else:
+        changed = index.refresh() > 0
+    if changed:
+        index.save()
+    return index
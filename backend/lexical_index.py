@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+LEXICAL_FORMAT_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_MAX_QUERY_TERMS = 64
+DEFAULT_MAX_DF_RATIO = 0.5
+
+_ASCII_TERM = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+_CJK_RUN = re.compile(r"[㐀-䶿一-鿿]+")
+
+
+def lexical_index_path(db_path: Path, collection_name: str) -> Path:
+    # 词法索引与向量索引放在同一根目录下
+    return Path(db_path) / f"{collection_name}.lexical.npz"
+
+
+def tokenize_terms(text: str) -> List[str]:
+    # 英文/数字按词切分（保留 c++、c#、node.js 等写法），中文按字符二元组切分
+    text = text.lower()
+    terms = _ASCII_TERM.findall(text)
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+class LexicalIndexBuilder:
+    """构建 BM25 倒排索引：按词项排序的 (行号, 词频) posting 列表"""
+
+    def __init__(self) -> None:
+        self.vocab: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.doc_lens: List[int] = []
+        self._id_set: set[str] = set()
+        self._term_chunks: List[np.ndarray] = []
+        self._row_chunks: List[np.ndarray] = []
+        self._tf_chunks: List[np.ndarray] = []
+
+    @classmethod
+    def from_file(cls, path: Path) -> "LexicalIndexBuilder":
+        # 载入已有索引，在其基础上追加或删除文档
+        builder = cls()
+        with np.load(path) as data:
+            terms = data["terms"].tolist()
+            offsets = data["offsets"]
+            builder.vocab = {term: index for index, term in enumerate(terms)}
+            builder.ids = data["ids"].tolist()
+            builder.doc_lens = data["doc_lens"].tolist()
+            builder._id_set = set(builder.ids)
+            builder._term_chunks.append(np.repeat(np.arange(len(terms), dtype=np.int32), np.diff(offsets)))
+            builder._row_chunks.append(data["rows"].astype(np.int32))
+            builder._tf_chunks.append(data["tfs"].astype(np.uint16))
+        return builder
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, job_id: str, document: str) -> None:
+        if job_id in self._id_set:
+            return
+        counts = Counter(tokenize_terms(document))
+        row = len(self.ids)
+        self._id_set.add(job_id)
+        self.ids.append(job_id)
+        self.doc_lens.append(sum(counts.values()))
+        if not counts:
+            return
+        term_ids = [self.vocab.setdefault(term, len(self.vocab)) for term in counts]
+        self._term_chunks.append(np.asarray(term_ids, dtype=np.int32))
+        self._row_chunks.append(np.full(len(term_ids), row, dtype=np.int32))
+        self._tf_chunks.append(np.minimum(np.fromiter(counts.values(), dtype=np.int64), 65535).astype(np.uint16))
+
+    def remove(self, job_ids: Iterable[str]) -> int:
+        # 删除文档并压缩行号
+        drop = set(job_ids) & self._id_set
+        if not drop:
+            return 0
+        keep = np.asarray([job_id not in drop for job_id in self.ids], dtype=bool)
+        new_rows = np.cumsum(keep, dtype=np.int64) - 1
+        term_ids, rows, tfs = self._postings()
+        mask = keep[rows]
+        self._term_chunks = [term_ids[mask]]
+        self._row_chunks = [new_rows[rows[mask]].astype(np.int32)]
+        self._tf_chunks = [tfs[mask]]
+        self.ids = [job_id for job_id, kept in zip(self.ids, keep) if kept]
+        self.doc_lens = [length for length, kept in zip(self.doc_lens, keep) if kept]
+        self._id_set = set(self.ids)
+        return len(drop)
+
+    def _postings(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if not self._term_chunks:
+            empty = np.zeros(0, dtype=np.int32)
+            return empty, empty, np.zeros(0, dtype=np.uint16)
+        return (
+            np.concatenate(self._term_chunks),
+            np.concatenate(self._row_chunks),
+            np.concatenate(self._tf_chunks),
+        )
+
+    def save(self, path: Path) -> None:
+        term_ids, rows, tfs = self._postings()
+        order = np.lexsort((rows, term_ids))
+        offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(self.vocab)), out=offsets[1:])
+
+        terms = sorted(self.vocab, key=self.vocab.get)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as handle:
+            np.savez(
+                handle,
+                format_version=np.asarray(LEXICAL_FORMAT_VERSION),
+                terms=np.asarray(terms, dtype=str),
+                offsets=offsets,
+                rows=rows[order],
+                tfs=tfs[order],
+                ids=np.asarray(self.ids, dtype=str),
+                doc_lens=np.asarray(self.doc_lens, dtype=np.int32),
+            )
+        os.replace(tmp_path, path)
+
+
+class LexicalIndex:
+    """常驻内存的 BM25 倒排索引，查询只累加命中词项的 posting"""
+
+    def __init__(self, path: Path) -> None:
+        with np.load(path) as data:
+            if int(data["format_version"]) != LEXICAL_FORMAT_VERSION:
+                raise ValueError(f"Unsupported lexical index format at {path}")
+            terms = data["terms"].tolist()
+            self.offsets = data["offsets"]
+            self.rows = data["rows"]
+            tfs = data["tfs"].astype(np.float32)
+            self.ids: List[str] = data["ids"].tolist()
+            doc_lens = data["doc_lens"].astype(np.float32)
+
+        self.path = Path(path)
+        self.vocab = {term: index for index, term in enumerate(terms)}
+        self.df = np.diff(self.offsets)
+        num_docs = max(len(self.ids), 1)
+        avgdl = float(doc_lens.mean()) if len(doc_lens) else 1.0
+
+        # 载入时一次性算好每个 posting 的 BM25 权重
+        idf = np.log1p((num_docs - self.df + 0.5) / (self.df + 0.5)).astype(np.float32)
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_lens[self.rows] / max(avgdl, 1e-6))
+        self.weights = np.repeat(idf, self.df) * tfs * (BM25_K1 + 1.0) / (tfs + norm)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self,
+        text: str,
+        top_k: int,
+        max_terms: int = DEFAULT_MAX_QUERY_TERMS,
+        max_df_ratio: float = DEFAULT_MAX_DF_RATIO,
+    ) -> List[Tuple[str, float]]:
+        # 只保留区分度最高的若干词项（df 最小），并忽略出现在过半文档中的常见词
+        max_df = max_df_ratio * len(self.ids)
+        term_ids = {self.vocab[term] for term in tokenize_terms(text) if term in self.vocab}
+        term_ids = sorted((tid for tid in term_ids if self.df[tid] <= max_df), key=lambda tid: self.df[tid])
+        if not term_ids or top_k <= 0:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for tid in term_ids[:max_terms]:
+            start, end = self.offsets[tid], self.offsets[tid + 1]
+            scores[self.rows[start:end]] += self.weights[start:end]
+
+        hit_count = int(np.count_nonzero(scores))
+        top_k = min(top_k, hit_count)
+        if top_k <= 0:
+            return []
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[row], float(scores[row])) for row in top]
+
+
+def load_lexical_index(path: Path) -> Optional[LexicalIndex]:
+    return LexicalIndex(path) if Path(path).exists() else None
@@ -1,23 +1,48 @@
-import json
-import sys
-from pathlib import Path
-
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
-from fastapi.middleware.cors import CORSMiddleware
-from langchain.messages import HumanMessage, SystemMessage
-
-# 添加项目根目录到 Python 路径
-sys.path.append(str(Path(__file__).parent.parent))
-
-from backend.job_search import query_jobs
-from backend.latex_generator import generate_latex_resume
-from backend.prompts import PromptTemplates
-from backend.schemas import (
-    ComprehensiveEvaluationRequest,
-    ModifyResumeModuleRequest,
-    ResumeDataRequest,
-)
-from backend.state import add_ids_to_resume_data, get_or_create_session, sessions
+import asyncio
+import hmac
+import json
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Depends, FastAPI, File, Form, Header, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from langchain.messages import HumanMessage, SystemMessage
+
+# 添加项目根目录到 Python 路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from backend.job_search import (
+    SearchBusyError,
+    aquery_jobs,
+    get_embedding_batcher,
+    get_embedding_cache,
+    get_index_manager,
+    get_search_executor,
+    shutdown_search,
+    warm_up,
+)
+from backend.latex_generator import generate_latex_resume
+from backend.prompts import PromptTemplates
+from backend.resume_query import build_resume_query
+from backend.schemas import (
+    ComprehensiveEvaluationRequest,
+    ModifyResumeModuleRequest,
+    ResumeDataRequest,
+)
+from backend.single_flight import SingleFlight
+from backend.state import (
+    add_ids_to_resume_data,
+    aget_or_create_session,
+    aget_session,
+    aupdate_session,
+    get_session_store,
+)
 from backend.utils import (
     build_custom_job_entries,
     format_jobs_detail,
@@ -27,198 +52,280 @@ from backend.utils import (
     parse_modified_module,
     read_jobs_from_results,
 )
-from llm.llm import create_llm
-from tools import compile_latex_to_pdf, extract_text_from_file
-
-app = FastAPI(title="Auto-Resume Agent API")
-
-# CORS 配置
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-llm = create_llm()
-
-
-# ==================== API 端点 ====================
-
-
-@app.post("/api/extract_resume")
-async def extract_resume(
-    session_id: str = Form(...),
-    file: UploadFile = File(...),
-):
-    """上传简历并提取信息"""
-    session = get_or_create_session(session_id)
-
-    # 验证文件格式
-    allow_extensions = {".txt", ".pdf", ".docx"}
-    file_ext = Path(file.filename).suffix.lower()
-    if file_ext not in allow_extensions:
-        raise HTTPException(
-            status_code=400,
-            detail=f"不支持的文件格式: {file_ext}，请使用 .txt, .pdf, .docx 格式",
-        )
-
-    # 提取简历文本
-    content = await file.read()
-    resume_text = await extract_text_from_file(content, file.filename)
-    if not resume_text:
-        raise HTTPException(status_code=400, detail="简历内容为空或无法解析")
-
-    # 使用 LLM 提取结构化信息
-    system_prompt = PromptTemplates.get_resume_extraction_prompt()
-    system_msg = SystemMessage(content=system_prompt)
-    user_msg = HumanMessage(content=f"请提取以下简历的信息：\n\n{resume_text}")
-
-    messages = [system_msg, user_msg]
-    response = await llm.ainvoke(messages)
-
-    # 解析 JSON 响应
-    try:
-        resume_data = parse_json_response(response.content)
-        resume_data = add_ids_to_resume_data(resume_data)
-
-        # 保存到会话
-        session["state"]["resume_data"] = resume_data
-
-        return {
-            "message": "简历信息提取成功",
-            "resume_data": resume_data,
-        }
-
-    except json.JSONDecodeError as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"LLM 返回的 JSON 格式错误: {str(e)}\n原始内容: {response.content[:500]}",
-        )
-
-
-@app.post("/api/save_resume_data")
-async def save_resume_data(request: ResumeDataRequest):
-    """保存用户填写的简历数据"""
-    session = get_or_create_session(request.session_id)
-    session["state"]["resume_data"] = request.resume_data
-
-    return {
-        "message": "简历数据已保存",
-        "step": "analysis",
-    }
-
-
-@app.post("/api/search_jobs_new")
-async def search_jobs_new(
-    session_id: str = Form(...),
-    except_job: str = Form(...),
-):
-    """搜索岗位（离线向量检索）"""
-    session = get_or_create_session(session_id)
-
-    try:
-        except_job_dict = json.loads(except_job)
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="except_job格式错误")
-
-    # 验证必需的 job 参数
-    if "job" not in except_job_dict:
-        raise HTTPException(status_code=400, detail="缺少必需的 job 参数")
-
-    try:
-        # 获取简历数据
-        resume_data = session["state"].get("resume_data")
-        if not resume_data:
-            raise HTTPException(status_code=400, detail="请先填写简历信息")
-
-        session["state"]["except_job"] = except_job_dict
-
-        # 将简历数据转换为文本
-        resume_text = json.dumps(resume_data, ensure_ascii=False, indent=2)
-        job_category = except_job_dict.get("job")
-
-        job_results = query_jobs(resume_text, top_k=20, job_category=job_category)
-        if not job_results and job_category:
-            job_results = query_jobs(resume_text, top_k=20, job_category=None)
-
-        if not job_results:
-            raise HTTPException(status_code=400, detail="未能检索到任何职位")
-
-        session["state"]["job_results"] = job_results
-
-        jobs = []
-        for idx, job in enumerate(job_results):
-            jobs.append(
-                {
-                    "index": idx,
-                    "name": job.get("职位名称", ""),
-                    "company": job.get("公司名称", ""),
-                    "salary": job.get("薪资范围", ""),
-                    "location": job.get("工作地点", ""),
-                    "experience": job.get("工作经验", ""),
-                    "education": job.get("学历要求", ""),
-                    "tags": job.get("职位标签", ""),
-                    "skills": job.get("所需技能", ""),
-                    "company_info": job.get("所属行业", ""),
-                    "description": job.get("岗位描述", ""),
-                }
-            )
-
-        if not jobs:
-            raise HTTPException(status_code=400, detail="未能抓取到任何职位")
-
-        session["current_step"] = "job_search"
-
-        return {"jobs": jobs, "step": "job_search"}
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        import traceback
-
-        error_detail = f"搜索职位失败: {str(e)}\n{traceback.format_exc()}"
-        print(error_detail)
-        raise HTTPException(status_code=500, detail=error_detail)
-
-
-@app.post("/api/comprehensive_evaluation")
+from llm.llm import create_llm
+from tools import compile_latex_to_pdf, extract_text_from_file
+
+
+_LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+WARMUP_INITIAL_BACKOFF_SECONDS = 1.0
+WARMUP_MAX_BACKOFF_SECONDS = 60.0
+
+
+def _warmup_enabled() -> bool:
+    value = os.getenv("JOB_SEARCH_WARMUP", "true").strip().lower()
+    return value not in {"0", "false", "no"}
+
+
+def require_admin(request: Request, x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """管理接口鉴权：配置了 JOB_ADMIN_TOKEN 时校验 X-Admin-Token 请求头，否则只允许本机访问"""
+    token = os.getenv("JOB_ADMIN_TOKEN", "").strip()
+    if token:
+        if not x_admin_token or not hmac.compare_digest(x_admin_token, token):
+            raise HTTPException(status_code=401, detail="管理接口令牌无效")
+        return
+    host = request.client.host if request.client is not None else ""
+    if host not in _LOCAL_HOSTS:
+        raise HTTPException(status_code=403, detail="管理接口仅允许本机访问")
+
+
+async def run_warmup(app: FastAPI) -> None:
+    """
+    后台预热 embedding 模型与向量索引，完成后 /ready 才返回 200
+
+    失败时按指数退避（上限 WARMUP_MAX_BACKOFF_SECONDS）一直重试，索引尚未构建或模型下载中断等
+    暂时性问题恢复后自动就绪；最近一次失败原因与重试次数通过 /ready 返回。
+    """
+    status = app.state.warmup
+    start = time.perf_counter()
+    backoff = WARMUP_INITIAL_BACKOFF_SECONDS
+    while True:
+        status["attempts"] += 1
+        try:
+            status["timings"] = await asyncio.get_running_loop().run_in_executor(None, warm_up)
+            status["ready"] = True
+            status["error"] = None
+            status["next_retry_s"] = None
+            print(f"✅ 检索服务预热完成: {status['timings']}")
+            return
+        except Exception as e:
+            status["error"] = f"{type(e).__name__}: {e}"
+            status["next_retry_s"] = backoff
+            print(f"❌ 检索服务预热失败（第 {status['attempts']} 次），{backoff:.0f} 秒后重试: {e}")
+        finally:
+            status["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, WARMUP_MAX_BACKOFF_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.warmup = {
+        "ready": False,
+        "timings": {},
+        "error": None,
+        "attempts": 0,
+        "next_retry_s": None,
+        "elapsed_ms": None,
+    }
+    warmup_task = None
+    if _warmup_enabled():
+        warmup_task = asyncio.create_task(run_warmup(app))
+    else:
+        app.state.warmup["ready"] = True
+
+    yield
+
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    shutdown_search()
+    get_session_store().close()
+
+
+app = FastAPI(title="Auto-Resume Agent API", lifespan=lifespan)
+
+# CORS 配置
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+llm = create_llm()
+# 连点或 Streamlit 重跑触发的相同模块请求共享同一次 LLM 调用
+single_flight = SingleFlight()
+
+
+# ==================== API 端点 ====================
+
+
+@app.post("/api/extract_resume")
+async def extract_resume(
+    session_id: str = Form(...),
+    file: UploadFile = File(...),
+):
+    """上传简历并提取信息"""
+    await aget_or_create_session(session_id)
+
+    # 验证文件格式
+    allow_extensions = {".txt", ".pdf", ".docx"}
+    file_ext = Path(file.filename).suffix.lower()
+    if file_ext not in allow_extensions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的文件格式: {file_ext}，请使用 .txt, .pdf, .docx 格式",
+        )
+
+    # 提取简历文本
+    content = await file.read()
+    resume_text = await extract_text_from_file(content, file.filename)
+    if not resume_text:
+        raise HTTPException(status_code=400, detail="简历内容为空或无法解析")
+
+    # 使用 LLM 提取结构化信息
+    system_prompt = PromptTemplates.get_resume_extraction_prompt()
+    system_msg = SystemMessage(content=system_prompt)
+    user_msg = HumanMessage(content=f"请提取以下简历的信息：\n\n{resume_text}")
+
+    messages = [system_msg, user_msg]
+    response = await llm.ainvoke(messages)
+
+    # 解析 JSON 响应
+    try:
+        resume_data = parse_json_response(response.content)
+        resume_data = add_ids_to_resume_data(resume_data)
+
+        # 保存到会话：LLM 调用期间会话可能已被其他请求修改，在最新版本上写入
+        await aupdate_session(session_id, lambda session: session["state"].update(resume_data=resume_data))
+
+        return {
+            "message": "简历信息提取成功",
+            "resume_data": resume_data,
+        }
+
+    except json.JSONDecodeError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"LLM 返回的 JSON 格式错误: {str(e)}\n原始内容: {response.content[:500]}",
+        )
+
+
+@app.post("/api/save_resume_data")
+async def save_resume_data(request: ResumeDataRequest):
+    """保存用户填写的简历数据"""
+    await aupdate_session(request.session_id, lambda session: session["state"].update(resume_data=request.resume_data))
+
+    return {
+        "message": "简历数据已保存",
+        "step": "analysis",
+    }
+
+
+@app.post("/api/search_jobs_new")
+async def search_jobs_new(
+    session_id: str = Form(...),
+    except_job: str = Form(...),
+):
+    """搜索岗位（离线向量检索）"""
+    session = await aget_or_create_session(session_id)
+
+    try:
+        except_job_dict = json.loads(except_job)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="except_job格式错误")
+
+    # 验证必需的 job 参数
+    if "job" not in except_job_dict:
+        raise HTTPException(status_code=400, detail="缺少必需的 job 参数")
+
+    try:
+        # 获取简历数据
+        resume_data = session["state"].get("resume_data")
+        if not resume_data:
+            raise HTTPException(status_code=400, detail="请先填写简历信息")
+
+        # 将简历数据压缩为检索查询文本（无可用字段时退回完整 JSON）
+        resume_text = build_resume_query(resume_data) or json.dumps(resume_data, ensure_ascii=False, indent=2)
+        job_category = except_job_dict.get("job")
+
+        try:
+            job_results = await aquery_jobs(resume_text, top_k=20, job_category=job_category)
+        except SearchBusyError as e:
+            raise HTTPException(
+                status_code=503,
+                detail="检索服务繁忙，请稍后重试",
+                headers={"Retry-After": str(e.retry_after)},
+            )
+
+        if not job_results:
+            raise HTTPException(status_code=400, detail="未能检索到任何职位")
+
+        jobs = []
+        for idx, job in enumerate(job_results):
+            jobs.append(
+                {
+                    "index": idx,
+                    "name": job.get("职位名称", ""),
+                    "company": job.get("公司名称", ""),
+                    "salary": job.get("薪资范围", ""),
+                    "location": job.get("工作地点", ""),
+                    "experience": job.get("工作经验", ""),
+                    "education": job.get("学历要求", ""),
+                    "tags": job.get("职位标签", ""),
+                    "skills": job.get("所需技能", ""),
+                    "company_info": job.get("所属行业", ""),
+                    "description": job.get("岗位描述", ""),
+                    "match_tier": job.get("match_tier", ""),
+                }
+            )
+
+        if not jobs:
+            raise HTTPException(status_code=400, detail="未能抓取到任何职位")
+
+        def apply(session):
+            session["state"].update(except_job=except_job_dict, job_results=job_results)
+            session["current_step"] = "job_search"
+
+        await aupdate_session(session_id, apply)
+
+        return {"jobs": jobs, "step": "job_search"}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+
+        error_detail = f"搜索职位失败: {str(e)}\n{traceback.format_exc()}"
+        print(error_detail)
+        raise HTTPException(status_code=500, detail=error_detail)
+
+
+@app.post("/api/comprehensive_evaluation")
 async def comprehensive_evaluation(request: ComprehensiveEvaluationRequest):
     """综合评估所有选中的岗位"""
-    if request.session_id not in sessions:
+    session = await aget_session(request.session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="会话不存在")
-
-    session = sessions[request.session_id]
     custom_jd = (request.custom_jd or "").strip()
-
-    # 获取简历数据
-    resume_data = session["state"].get("resume_data")
-    if not resume_data:
-        raise HTTPException(status_code=400, detail="简历数据不存在")
-
+
+    # 获取简历数据
+    resume_data = session["state"].get("resume_data")
+    if not resume_data:
+        raise HTTPException(status_code=400, detail="简历数据不存在")
+
     # 获取职位数据路径（自定义 JD 可跳过）
     job_results = session["state"].get("job_results", [])
     if not custom_jd and not job_results:
         raise HTTPException(status_code=400, detail="职位数据不存在")
-
-    try:
+
+    try:
         # 读取所有选中的岗位，并按需附加自定义 JD
         selected_jobs = read_jobs_from_results(job_results, request.job_indices)
         if custom_jd:
             selected_jobs = selected_jobs + build_custom_job_entries(custom_jd)
-
-        # 将简历数据转换为文本
-        resume_text = json.dumps(resume_data, ensure_ascii=False, indent=2)
-
-        # 将所有岗位信息合并
-        jobs_text = format_jobs_detail(selected_jobs)
-        jobs_count = len(selected_jobs)
-
-        # 使用 Prompt 模板
-        system_prompt = PromptTemplates.get_comprehensive_evaluation_prompt()
-        sys_msg = SystemMessage(content=system_prompt)
-
+
+        # 将简历数据转换为文本
+        resume_text = json.dumps(resume_data, ensure_ascii=False, indent=2)
+
+        # 将所有岗位信息合并
+        jobs_text = format_jobs_detail(selected_jobs)
+        jobs_count = len(selected_jobs)
+
+        # 使用 Prompt 模板
+        system_prompt = PromptTemplates.get_comprehensive_evaluation_prompt()
+        sys_msg = SystemMessage(content=system_prompt)
+
         job_label = "选中的岗位与自定义JD" if custom_jd else "选中的岗位"
         user_msg = HumanMessage(
             content=(
@@ -227,65 +334,75 @@ async def comprehensive_evaluation(request: ComprehensiveEvaluationRequest):
                 "请进行综合评估，并给出优化建议。"
             )
         )
-
-        messages = [sys_msg, user_msg]
-        evaluation_response = await llm.ainvoke(messages)
-
-        # 解析评估结果
-        try:
-            evaluation_report = parse_json_response(evaluation_response.content)
-
-            # 保存到会话
-            session["state"]["evaluation_report"] = evaluation_report
-            session["state"]["selected_jobs"] = selected_jobs
-            session["state"]["custom_jd"] = custom_jd or ""
-            session["current_step"] = "analysis"
-
-            return {
-                "evaluation_report": evaluation_report,
-                "step": "analysis",
-            }
-
-        except json.JSONDecodeError:
-            # 如果 JSON 解析失败，返回一个基本的报告结构
-            fallback_report = {
-                "summary": "综合评估完成，但无法解析详细结果。",
-                "strengths": ["简历内容完整"],
-                "weaknesses": ["需要进一步优化"],
-                "key_recommendations": ["请根据岗位要求调整简历内容"],
-                "module_suggestions": {},
-                "raw_feedback": evaluation_response.content,
-            }
-
-            session["state"]["evaluation_report"] = fallback_report
-            session["state"]["selected_jobs"] = selected_jobs
-            session["state"]["custom_jd"] = custom_jd or ""
-            session["current_step"] = "analysis"
-
-            return {
-                "evaluation_report": fallback_report,
-                "step": "analysis",
-            }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        import traceback
-
-        error_detail = f"综合评估失败: {str(e)}\n{traceback.format_exc()}"
-        print(error_detail)
-        raise HTTPException(status_code=500, detail=error_detail)
-
-
-@app.post("/api/modify_resume_module")
-async def modify_resume_module(request: ModifyResumeModuleRequest):
-    """AI优化/生成简历的特定模块"""
-    if request.session_id not in sessions:
-        raise HTTPException(status_code=404, detail="会话不存在")
-
-    session = sessions[request.session_id]
-
-    # 获取选中的岗位信息
+
+        messages = [sys_msg, user_msg]
+        evaluation_response = await llm.ainvoke(messages)
+
+        # 解析评估结果
+        try:
+            evaluation_report = parse_json_response(evaluation_response.content)
+
+            # 保存到会话：在最新版本上写入，不覆盖 LLM 调用期间其他请求的修改
+            def apply(session):
+                session["state"].update(
+                    evaluation_report=evaluation_report, selected_jobs=selected_jobs, custom_jd=custom_jd or ""
+                )
+                session["current_step"] = "analysis"
+
+            await aupdate_session(request.session_id, apply)
+
+            return {
+                "evaluation_report": evaluation_report,
+                "step": "analysis",
+            }
+
+        except json.JSONDecodeError:
+            # 如果 JSON 解析失败，返回一个基本的报告结构
+            fallback_report = {
+                "summary": "综合评估完成，但无法解析详细结果。",
+                "strengths": ["简历内容完整"],
+                "weaknesses": ["需要进一步优化"],
+                "key_recommendations": ["请根据岗位要求调整简历内容"],
+                "module_suggestions": {},
+                "raw_feedback": evaluation_response.content,
+            }
+
+            def apply_fallback(session):
+                session["state"].update(
+                    evaluation_report=fallback_report, selected_jobs=selected_jobs, custom_jd=custom_jd or ""
+                )
+                session["current_step"] = "analysis"
+
+            await aupdate_session(request.session_id, apply_fallback)
+
+            return {
+                "evaluation_report": fallback_report,
+                "step": "analysis",
+            }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+
+        error_detail = f"综合评估失败: {str(e)}\n{traceback.format_exc()}"
+        print(error_detail)
+        raise HTTPException(status_code=500, detail=error_detail)
+
+
+@app.post("/api/modify_resume_module")
+async def modify_resume_module(request: ModifyResumeModuleRequest):
+    """AI优化/生成简历的特定模块"""
+    key = SingleFlight.make_key(request.session_id, "modify_resume_module", request.model_dump())
+    return await single_flight.run(key, "modify_resume_module", lambda: _modify_resume_module(request))
+
+
+async def _modify_resume_module(request: ModifyResumeModuleRequest):
+    session = await aget_session(request.session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="会话不存在")
+
+    # 获取选中的岗位信息
     selected_jobs = session["state"].get("selected_jobs", [])
     if not selected_jobs:
         custom_jd = (session["state"].get("custom_jd") or "").strip()
@@ -293,117 +410,121 @@ async def modify_resume_module(request: ModifyResumeModuleRequest):
             selected_jobs = build_custom_job_entries(custom_jd)
         else:
             raise HTTPException(status_code=400, detail="未找到选中的岗位信息")
-
-    # 获取简历数据用于生成新模块
-    resume_data = session["state"].get("resume_data", {})
-
-    try:
-        # 格式化岗位信息
-        jobs_summary = format_jobs_summary(selected_jobs)
-
-        # 判断是生成还是优化
-        is_empty = False
-        if isinstance(request.module_data, str):
-            is_empty = not request.module_data or request.module_data.strip() == ""
-        elif isinstance(request.module_data, list):
-            is_empty = len(request.module_data) == 0
-        elif isinstance(request.module_data, dict):
-            is_empty = not request.module_data or all(not v for v in request.module_data.values())
-
-        operation_type = "生成" if is_empty else "优化"
-
-        # 格式化模块数据
-        module_text = format_module_data(request.module_data)
-
-        # 获取模块描述
-        module_descriptions = PromptTemplates.get_module_descriptions()
-        module_description = module_descriptions.get(request.module_name, f"{request.module_name} 模块")
-
-        # 构建 AI prompt（区分生成和优化）
-        if is_empty:
-            # 生成新模块
-            sys_prompt = SystemMessage(
-                content=(
-                    f"你是专业的简历撰写专家，请根据用户的简历信息和目标岗位，生成 **{module_description}** 模块。\n\n"
-                    "## 生成原则：\n"
-                    "1. 基于用户简历中的其他信息进行合理推断\n"
-                    "2. 突出与目标岗位相关的内容\n"
-                    "3. 使用专业、简洁的表达\n"
-                    "4. 内容要具体、有针对性\n\n"
-                    "## 输出格式：\n"
-                    "- 如果是文本类型（如 personalSummary, skills），直接返回生成的文本\n"
-                    "- 如果是数组类型（如 education, workExperience, projects），返回 JSON 数组\n\n"
-                    "## 注意事项：\n"
-                    "- 不要添加 markdown 代码块标记\n"
-                    "- 如果是 JSON，确保格式正确\n"
-                    "- 内容长度适中，不要过长或过短"
-                )
-            )
-
-            # 将简历数据转换为文本
-            resume_text = json.dumps(resume_data, ensure_ascii=False, indent=2)
-
-            user_prompt = HumanMessage(
-                content=(
-                    f"## 参考的目标岗位\n{jobs_summary}\n\n"
-                    f"## 用户简历信息\n```json\n{resume_text}\n```\n\n"
-                    f"## 评估建议\n{request.evaluation_feedback}\n\n"
-                    f"请生成 {request.module_name} 模块的内容。"
-                )
-            )
-        else:
-            # 优化现有模块 - 使用 Prompt 模板
-            system_prompt = PromptTemplates.get_module_optimization_prompt(module_description)
-            sys_prompt = SystemMessage(content=system_prompt)
-
-            user_prompt = HumanMessage(
-                content=(
-                    f"## 参考的目标岗位\n{jobs_summary}\n\n"
-                    f"## 评估建议\n{request.evaluation_feedback}\n\n"
-                    f"## 当前内容\n```\n{module_text}\n```\n\n"
-                    f"请优化 {request.module_name} 模块的内容。"
-                )
-            )
-
-        messages = [sys_prompt, user_prompt]
-        modification_response = await llm.ainvoke(messages)
-
-        # 解析修改结果
-        modified_module = parse_modified_module(modification_response.content, request.module_name, request.module_data)
-
-        # 生成操作说明
-        operation_log = f"AI已{operation_type}{module_description}模块"
-        if is_empty:
-            operation_log += "，基于您的简历信息和目标岗位要求，生成了针对性的内容。"
-        else:
-            operation_log += "，根据评估建议进行了优化，突出了与目标岗位相关的内容。"
-
-        return {
-            "modified_module": modified_module,
-            "message": f"{request.module_name} 模块已{operation_type}",
-            "operation_log": operation_log,
-            "operation_type": operation_type,
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        import traceback
-
-        error_detail = f"模块修改失败: {str(e)}\n{traceback.format_exc()}"
-        print(error_detail)
-        raise HTTPException(status_code=500, detail=error_detail)
-
-
-@app.post("/api/re_evaluate_module")
-async def re_evaluate_module(request: ModifyResumeModuleRequest):
-    """重新评估修改后的模块"""
-    if request.session_id not in sessions:
-        raise HTTPException(status_code=404, detail="会话不存在")
-
-    session = sessions[request.session_id]
-
-    # 获取选中的岗位信息
+
+    # 获取简历数据用于生成新模块
+    resume_data = session["state"].get("resume_data", {})
+
+    try:
+        # 格式化岗位信息
+        jobs_summary = format_jobs_summary(selected_jobs)
+
+        # 判断是生成还是优化
+        is_empty = False
+        if isinstance(request.module_data, str):
+            is_empty = not request.module_data or request.module_data.strip() == ""
+        elif isinstance(request.module_data, list):
+            is_empty = len(request.module_data) == 0
+        elif isinstance(request.module_data, dict):
+            is_empty = not request.module_data or all(not v for v in request.module_data.values())
+
+        operation_type = "生成" if is_empty else "优化"
+
+        # 格式化模块数据
+        module_text = format_module_data(request.module_data)
+
+        # 获取模块描述
+        module_descriptions = PromptTemplates.get_module_descriptions()
+        module_description = module_descriptions.get(request.module_name, f"{request.module_name} 模块")
+
+        # 构建 AI prompt（区分生成和优化）
+        if is_empty:
+            # 生成新模块
+            sys_prompt = SystemMessage(
+                content=(
+                    f"你是专业的简历撰写专家，请根据用户的简历信息和目标岗位，生成 **{module_description}** 模块。\n\n"
+                    "## 生成原则：\n"
+                    "1. 基于用户简历中的其他信息进行合理推断\n"
+                    "2. 突出与目标岗位相关的内容\n"
+                    "3. 使用专业、简洁的表达\n"
+                    "4. 内容要具体、有针对性\n\n"
+                    "## 输出格式：\n"
+                    "- 如果是文本类型（如 personalSummary, skills），直接返回生成的文本\n"
+                    "- 如果是数组类型（如 education, workExperience, projects），返回 JSON 数组\n\n"
+                    "## 注意事项：\n"
+                    "- 不要添加 markdown 代码块标记\n"
+                    "- 如果是 JSON，确保格式正确\n"
+                    "- 内容长度适中，不要过长或过短"
+                )
+            )
+
+            # 将简历数据转换为文本
+            resume_text = json.dumps(resume_data, ensure_ascii=False, indent=2)
+
+            user_prompt = HumanMessage(
+                content=(
+                    f"## 参考的目标岗位\n{jobs_summary}\n\n"
+                    f"## 用户简历信息\n```json\n{resume_text}\n```\n\n"
+                    f"## 评估建议\n{request.evaluation_feedback}\n\n"
+                    f"请生成 {request.module_name} 模块的内容。"
+                )
+            )
+        else:
+            # 优化现有模块 - 使用 Prompt 模板
+            system_prompt = PromptTemplates.get_module_optimization_prompt(module_description)
+            sys_prompt = SystemMessage(content=system_prompt)
+
+            user_prompt = HumanMessage(
+                content=(
+                    f"## 参考的目标岗位\n{jobs_summary}\n\n"
+                    f"## 评估建议\n{request.evaluation_feedback}\n\n"
+                    f"## 当前内容\n```\n{module_text}\n```\n\n"
+                    f"请优化 {request.module_name} 模块的内容。"
+                )
+            )
+
+        messages = [sys_prompt, user_prompt]
+        modification_response = await llm.ainvoke(messages)
+
+        # 解析修改结果
+        modified_module = parse_modified_module(modification_response.content, request.module_name, request.module_data)
+
+        # 生成操作说明
+        operation_log = f"AI已{operation_type}{module_description}模块"
+        if is_empty:
+            operation_log += "，基于您的简历信息和目标岗位要求，生成了针对性的内容。"
+        else:
+            operation_log += "，根据评估建议进行了优化，突出了与目标岗位相关的内容。"
+
+        return {
+            "modified_module": modified_module,
+            "message": f"{request.module_name} 模块已{operation_type}",
+            "operation_log": operation_log,
+            "operation_type": operation_type,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+
+        error_detail = f"模块修改失败: {str(e)}\n{traceback.format_exc()}"
+        print(error_detail)
+        raise HTTPException(status_code=500, detail=error_detail)
+
+
+@app.post("/api/re_evaluate_module")
+async def re_evaluate_module(request: ModifyResumeModuleRequest):
+    """重新评估修改后的模块"""
+    key = SingleFlight.make_key(request.session_id, "re_evaluate_module", request.model_dump())
+    return await single_flight.run(key, "re_evaluate_module", lambda: _re_evaluate_module(request))
+
+
+async def _re_evaluate_module(request: ModifyResumeModuleRequest):
+    session = await aget_session(request.session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="会话不存在")
+
+    # 获取选中的岗位信息
     selected_jobs = session["state"].get("selected_jobs", [])
     if not selected_jobs:
         custom_jd = (session["state"].get("custom_jd") or "").strip()
@@ -411,126 +532,163 @@ async def re_evaluate_module(request: ModifyResumeModuleRequest):
             selected_jobs = build_custom_job_entries(custom_jd)
         else:
             raise HTTPException(status_code=400, detail="未找到选中的岗位信息")
-
-    try:
-        # 格式化岗位信息
-        jobs_summary = format_jobs_summary(selected_jobs)
-
-        # 格式化模块数据
-        module_text = format_module_data(request.module_data)
-
-        # 获取模块描述
-        module_descriptions = PromptTemplates.get_module_descriptions()
-        module_description = module_descriptions.get(request.module_name, f"{request.module_name} 模块")
-
-        # 使用 Prompt 模板
-        system_prompt = PromptTemplates.get_module_re_evaluation_prompt(module_description)
-        sys_msg = SystemMessage(content=system_prompt)
-
-        user_msg = HumanMessage(
-            content=(f"参考岗位\n{jobs_summary}\n\n{module_description}模块的内容为：{module_text}")
-        )
-
-        messages = [sys_msg, user_msg]
-        evaluation_response = await llm.ainvoke(messages)
-
-        # 返回新的评估建议
-        new_suggestion = evaluation_response.content.strip()
-
-        return {
-            "suggestion": new_suggestion,
-            "message": f"{request.module_name} 模块已重新评估",
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        import traceback
-
-        error_detail = f"重新评估失败: {str(e)}\n{traceback.format_exc()}"
-        print(error_detail)
-        raise HTTPException(status_code=500, detail=error_detail)
-
-
-@app.post("/api/generate_pdf")
-async def generate_pdf(
-    session_id: str = Form(...),
-    template_type: str = Form(...),
-    module_order: str = Form(None),
-    photo: UploadFile = File(None),
-):
-    """生成PDF简历"""
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="会话不存在")
-
-    session = sessions[session_id]
-    resume_data = session["state"].get("resume_data")
-
-    if not resume_data:
-        raise HTTPException(status_code=400, detail="简历数据不存在")
-
-    try:
-        # 解析模块顺序
-        module_order_list = None
-        if module_order:
-            try:
-                module_order_list = json.loads(module_order)
-            except json.JSONDecodeError:
-                print("⚠️ 模块顺序解析失败，使用默认顺序")
-
+
+    try:
+        # 格式化岗位信息
+        jobs_summary = format_jobs_summary(selected_jobs)
+
+        # 格式化模块数据
+        module_text = format_module_data(request.module_data)
+
+        # 获取模块描述
+        module_descriptions = PromptTemplates.get_module_descriptions()
+        module_description = module_descriptions.get(request.module_name, f"{request.module_name} 模块")
+
+        # 使用 Prompt 模板
+        system_prompt = PromptTemplates.get_module_re_evaluation_prompt(module_description)
+        sys_msg = SystemMessage(content=system_prompt)
+
+        user_msg = HumanMessage(
+            content=(f"参考岗位\n{jobs_summary}\n\n{module_description}模块的内容为：{module_text}")
+        )
+
+        messages = [sys_msg, user_msg]
+        evaluation_response = await llm.ainvoke(messages)
+
+        # 返回新的评估建议
+        new_suggestion = evaluation_response.content.strip()
+
+        return {
+            "suggestion": new_suggestion,
+            "message": f"{request.module_name} 模块已重新评估",
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+
+        error_detail = f"重新评估失败: {str(e)}\n{traceback.format_exc()}"
+        print(error_detail)
+        raise HTTPException(status_code=500, detail=error_detail)
+
+
+@app.post("/api/generate_pdf")
+async def generate_pdf(
+    session_id: str = Form(...),
+    template_type: str = Form(...),
+    module_order: str = Form(None),
+    photo: UploadFile = File(None),
+):
+    """生成PDF简历"""
+    session = await aget_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="会话不存在")
+    resume_data = session["state"].get("resume_data")
+
+    if not resume_data:
+        raise HTTPException(status_code=400, detail="简历数据不存在")
+
+    try:
+        # 解析模块顺序
+        module_order_list = None
+        if module_order:
+            try:
+                module_order_list = json.loads(module_order)
+            except json.JSONDecodeError:
+                print("⚠️ 模块顺序解析失败，使用默认顺序")
+
         template_dir = (
             Path(__file__).parent.parent
             / "resume-template"
             / ("template1" if template_type == "template1" else "template2")
         )
-
-        # 确定是否有照片
-        has_photo = photo is not None
-
-        # 如果有照片，保存到模板目录
-        if has_photo:
-            images_dir = template_dir / "images"
-            images_dir.mkdir(exist_ok=True)
-
-            # 保存照片为 avatar.jpg
-            photo_path = images_dir / "avatar.jpg"
-            photo_content = await photo.read()
-            with open(photo_path, "wb") as f:
-                f.write(photo_content)
-
-            print(f"✅ 照片已保存到: {photo_path}")
-
-        # 生成LaTeX代码
-        latex_content = generate_latex_resume(
-            resume_data, template_type=template_type, has_photo=has_photo, module_order=module_order_list
-        )
-
-        name = resume_data.get("basicInfo", {}).get("name", "resume")
-        filename = f"{name}_简历"
-
-        success, pdf_path, error_msg = compile_latex_to_pdf(latex_content, template_dir, filename=filename)
-        if not success or not pdf_path:
-            raise HTTPException(status_code=500, detail=error_msg or "PDF生成失败")
-
-        tex_path = template_dir / f"{filename}.tex"
-
-        return {"message": "PDF生成成功", "pdf_path": str(pdf_path), "tex_path": str(tex_path)}
-
-    except Exception as e:
-        import traceback
-
-        error_detail = f"PDF生成失败: {str(e)}\n{traceback.format_exc()}"
-        print(error_detail)
-        raise HTTPException(status_code=500, detail=error_detail)
-
-
-@app.get("/health")
-async def health_check():
-    """健康检查接口"""
-    return {"status": "ok", "active_sessions": len(sessions)}
-
-
-if __name__ == "__main__":
-    import uvicorn
-
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+        # 确定是否有照片
+        has_photo = photo is not None
+
+        # 如果有照片，保存到模板目录
+        if has_photo:
+            images_dir = template_dir / "images"
+            images_dir.mkdir(exist_ok=True)
+
+            # 保存照片为 avatar.jpg
+            photo_path = images_dir / "avatar.jpg"
+            photo_content = await photo.read()
+            with open(photo_path, "wb") as f:
+                f.write(photo_content)
+
+            print(f"✅ 照片已保存到: {photo_path}")
+
+        # 生成LaTeX代码
+        latex_content = generate_latex_resume(
+            resume_data, template_type=template_type, has_photo=has_photo, module_order=module_order_list
+        )
+
+        name = resume_data.get("basicInfo", {}).get("name", "resume")
+        filename = f"{name}_简历"
+
+        success, pdf_path, error_msg = compile_latex_to_pdf(latex_content, template_dir, filename=filename)
+        if not success or not pdf_path:
+            raise HTTPException(status_code=500, detail=error_msg or "PDF生成失败")
+
+        tex_path = template_dir / f"{filename}.tex"
+
+        return {"message": "PDF生成成功", "pdf_path": str(pdf_path), "tex_path": str(tex_path)}
+
+    except Exception as e:
+        import traceback
+
+        error_detail = f"PDF生成失败: {str(e)}\n{traceback.format_exc()}"
+        print(error_detail)
+        raise HTTPException(status_code=500, detail=error_detail)
+
+
+@app.get("/health")
+async def health_check():
+    """健康检查接口"""
+    batcher = get_embedding_batcher()
+    # SQLite 会话存储的统计查询放到线程池，不阻塞事件循环
+    sessions = await run_in_threadpool(get_session_store().stats)
+    return {
+        "status": "ok",
+        "active_sessions": sessions["size"],
+        "sessions": sessions,
+        "embedding_cache": get_embedding_cache().stats(),
+        "search_executor": get_search_executor().stats(),
+        "embedding_batcher": batcher.stats() if batcher else None,
+        "single_flight": single_flight.stats(),
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """就绪检查接口：模型与索引预热完成前返回 503，预热失败时附带失败原因（后台仍在重试）"""
+    status = app.state.warmup
+    if not status["ready"]:
+        state = "warmup_failed" if status["error"] else "warming_up"
+        return JSONResponse(status_code=503, content={"status": state, **status})
+    return {"status": "ready", **status}
+
+
+@app.get("/admin/index", dependencies=[Depends(require_admin)])
+async def index_status():
+    """索引版本接口：返回当前服务的索引版本、正在排空的旧版本与可用版本列表"""
+    return get_index_manager().stats()
+
+
+@app.post("/admin/index/reload", dependencies=[Depends(require_admin)])
+async def reload_index():
+    """立即检查 current 指针并切换到其指向的版本（不等待下一次轮询）"""
+    manager = get_index_manager()
+    try:
+        swapped = await asyncio.get_running_loop().run_in_executor(None, lambda: manager.refresh(force=True))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"索引切换失败: {str(e)}")
+    return {"swapped": swapped, **manager.stats()}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=8000)
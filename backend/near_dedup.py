@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_SHINGLE_SIZE = 5
+DEFAULT_DEDUP_THRESHOLD = 0.8
+
+_WHITESPACE = re.compile(r"\s+")
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+def shingle_hashes(text: str, size: int = DEFAULT_SHINGLE_SIZE) -> np.ndarray:
+    # 去空白、转小写后取字符 n-gram，并向量化地哈希为 32 位整数
+    text = _WHITESPACE.sub("", text.lower())
+    if not text:
+        return np.zeros(0, dtype=np.uint64)
+    codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    size = min(size, len(codepoints))
+    count = len(codepoints) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        hashes = hashes * np.uint64(1000003) + codepoints[offset : offset + count]
+    hashes ^= hashes >> np.uint64(29)
+    return np.unique(hashes & _MASK32)
+
+
+def _random_uint64(rng: np.random.RandomState, count: int) -> np.ndarray:
+    high = rng.randint(0, 2**32, size=(count, 1), dtype=np.uint64)
+    low = rng.randint(0, 2**32, size=(count, 1), dtype=np.uint64)
+    return (high << np.uint64(32)) | low
+
+
+def shingle_jaccard(left: str, right: str, size: int = DEFAULT_SHINGLE_SIZE) -> float:
+    # 两段文本 shingle 集合的精确 Jaccard 相似度，用于校验 MinHash 估计
+    a, b = shingle_hashes(left, size), shingle_hashes(right, size)
+    union = len(np.union1d(a, b))
+    return len(np.intersect1d(a, b, assume_unique=True)) / union if union else 0.0
+
+
+class MinHashDeduper:
+    """
+    基于 MinHash + LSH 分带的近重复岗位检测
+
+    add 逐条计算签名（每条 O(shingle 数 x num_perm)），clusters 对每个分带的键排序分组，
+    组内成员只与组内第一条比对签名相似度，整体对数据量近似线性。
+    通过相似度阈值的成员用并查集合并为簇，簇内文件顺序最靠前的一条作为保留的代表。
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_DEDUP_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        seed: int = 1,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError(f"num_perm={num_perm} must be divisible by bands={bands}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # multiply-shift 哈希族：(a * x + b) mod 2^64 后取高 32 位，a、b 在完整 64 位范围内取值（a 为奇数）。
+        # 乘法必须在 64 位上回绕，否则结果随 x 单调，所有排列选中同一个最小 shingle
+        self._a = _random_uint64(rng, num_perm) | np.uint64(1)
+        self._b = _random_uint64(rng, num_perm)
+        self.ids: List[str] = []
+        self._signatures: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        hashes = shingle_hashes(text, self.shingle_size)
+        if not len(hashes):
+            return None
+        return ((self._a * hashes[None, :] + self._b) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+    def estimate_jaccard(self, left: str, right: str) -> float:
+        # 两段文本签名的一致比例，即 MinHash 对 shingle Jaccard 的估计
+        a, b = self.signature(left), self.signature(right)
+        if a is None or b is None:
+            return 0.0
+        return float((a == b).mean())
+
+    def add(self, job_id: str, text: str) -> None:
+        # 空描述不参与聚类
+        signature = self.signature(text)
+        if signature is not None:
+            self.ids.append(job_id)
+            self._signatures.append(signature)
+
+    def clusters(self) -> Tuple[Dict[str, str], Dict[str, int]]:
+        """
+        Returns:
+            (重复岗位 id -> 代表 id, 代表 id -> 簇大小)，只包含大小 > 1 的簇
+        """
+        if len(self.ids) < 2:
+            return {}, {}
+        signatures = np.stack(self._signatures)
+        parent = np.arange(len(self.ids))
+
+        def find(node: int) -> int:
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        rows = self.num_perm // self.bands
+        weights = np.uint64(0x9E3779B97F4A7C15) ** np.arange(1, rows + 1, dtype=np.uint64)
+        for band in range(self.bands):
+            block = signatures[:, band * rows : (band + 1) * rows].astype(np.uint64)
+            keys = (block * weights[None, :]).sum(axis=1, dtype=np.uint64)
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            # 每组第一条（行号最小）作为比对对象
+            group_start = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            heads = np.repeat(order[group_start], np.diff(np.r_[group_start, len(order)]))
+            candidates = heads != order
+            left, right = heads[candidates], order[candidates]
+            if not len(left):
+                continue
+            agreement = (signatures[left] == signatures[right]).mean(axis=1)
+            for a, b in zip(left[agreement >= self.threshold], right[agreement >= self.threshold]):
+                root_a, root_b = find(int(a)), find(int(b))
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        roots = np.asarray([find(node) for node in range(len(self.ids))])
+        sizes = np.bincount(roots, minlength=len(self.ids))
+        canonical_of: Dict[str, str] = {}
+        cluster_sizes: Dict[str, int] = {}
+        for node in np.flatnonzero(roots != np.arange(len(self.ids))):
+            canonical_of[self.ids[node]] = self.ids[roots[node]]
+        for root in np.flatnonzero(sizes > 1):
+            cluster_sizes[self.ids[root]] = int(sizes[root])
+        return canonical_of, cluster_sizes
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+DEFAULT_QUERY_MAX_TOKENS = 512
+
+
+def _clean(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "；".join(_clean(item) for item in value if _clean(item))
+    return " ".join(str(value).split())
+
+
+def _experience_lines(label: str, items: Any, title_keys: List[str], bullet_key: str) -> List[str]:
+    # 经历类模块：标题（职位/项目名等）+ 要点，忽略时间、id 等与检索无关的字段
+    lines = []
+    for item in items or []:
+        if not isinstance(item, dict):
+            text = _clean(item)
+            if text:
+                lines.append(f"{label}: {text}")
+            continue
+        title = " ".join(_clean(item.get(key)) for key in title_keys if _clean(item.get(key)))
+        bullets = _clean(item.get(bullet_key))
+        text = "。".join(part for part in (title, bullets) if part)
+        if text:
+            lines.append(f"{label}: {text}")
+    return lines
+
+
+def build_resume_query(resume_data: Dict[str, Any]) -> str:
+    """
+    将结构化简历压缩为检索用的查询文本
+
+    只保留与岗位匹配相关的内容，并按固定顺序输出（越靠前越重要，超出 token 上限时从尾部截断）：
+    目标职位、技能、工作/实习/项目要点、个人总结、专业。
+    联系方式、id、时间、空字段与 JSON 标点都不会进入查询文本。
+
+    Args:
+        resume_data: 简历数据
+
+    Returns:
+        查询文本
+    """
+    basic_info = resume_data.get("basicInfo") or {}
+    lines = []
+
+    position = _clean(basic_info.get("position"))
+    if position:
+        lines.append(f"目标职位: {position}")
+
+    skills = _clean(resume_data.get("skills"))
+    if skills:
+        lines.append(f"技能: {skills}")
+
+    lines += _experience_lines("工作经历", resume_data.get("workExperience"), ["position", "company"], "points")
+    lines += _experience_lines("实习经历", resume_data.get("internshipExperience"), ["position", "company"], "points")
+    lines += _experience_lines("项目经历", resume_data.get("projects"), ["name", "role"], "description")
+
+    summary = _clean(resume_data.get("personalSummary"))
+    if summary:
+        lines.append(f"个人总结: {summary}")
+
+    majors = [
+        _clean(edu.get("major"))
+        for edu in resume_data.get("education") or []
+        if isinstance(edu, dict) and _clean(edu.get("major"))
+    ]
+    if majors:
+        lines.append(f"专业: {'；'.join(dict.fromkeys(majors))}")
+
+    return "\n".join(lines)
+
+
+def truncate_to_tokens(text: str, tokenizer: Optional[Any], max_tokens: int = DEFAULT_QUERY_MAX_TOKENS) -> str:
+    """按 tokenizer 计数截断查询文本，保留前 max_tokens 个 token 对应的原文"""
+    if not text or tokenizer is None or max_tokens <= 0:
+        return text
+    encoded = tokenizer(
+        text,
+        add_special_tokens=False,
+        truncation=True,
+        max_length=max_tokens,
+        return_offsets_mapping=True,
+    )
+    offsets = encoded.get("offset_mapping") or []
+    if len(offsets) < max_tokens:
+        return text
+    return text[: offsets[-1][1]]
@@ -0,0 +1,444 @@
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SESSION_BACKENDS = ("memory", "sqlite")
+DEFAULT_SESSION_TTL_SECONDS = 2 * 60 * 60
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_SESSION_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_SESSION_DB_PATH = Path(__file__).resolve().parent / "sessions.sqlite"
+DEFAULT_SESSION_READ_CACHE_SIZE = 64
+# 访问时间最多每隔这么久写回一次，避免每次读取都产生一次写事务
+DEFAULT_TOUCH_INTERVAL_SECONDS = 60
+EVICTION_REASONS = ("ttl", "count", "bytes")
+DEFAULT_UPDATE_ATTEMPTS = 5
+
+
+class SessionConflictError(RuntimeError):
+    """按版本写回时会话已被其他请求修改"""
+
+
+def estimate_session_bytes(session: Dict[str, Any]) -> int:
+    # 以 JSON 序列化后的 UTF-8 字节数近似会话占用，只在保存时计算一次
+    return len(json.dumps(session, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def dump_session(session: Dict[str, Any]) -> str:
+    # 紧凑 JSON（无缩进、无多余空格），SQLite 中再经 zlib 压缩，岗位描述等中文长文本压缩率较高
+    return json.dumps(session, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class SessionStore:
+    """
+    会话存储接口，backend/main.py 只依赖这里定义的方法
+
+    get 返回的会话 dict 可以原地修改，修改后需调用 save 写回。未 save 的修改不保证被其他进程看到：
+    MemorySessionStore 返回存储中的对象本身，SqliteSessionStore 每次返回独立的副本，未 save 的修改直接丢弃。
+    读取后要等待较久（如调用 LLM）再写回的请求应使用 update：基于最新版本重放修改，不会覆盖并发写入。
+    """
+
+    backend = ""
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """获取会话，不存在或已过期时返回 None"""
+        found = self.get_versioned(session_id)
+        return found[0] if found is not None else None
+
+    def get_versioned(self, session_id: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """获取会话及其版本号，版本号用于 save 的 expected_version"""
+        raise NotImplementedError
+
+    def save(self, session_id: str, session: Dict[str, Any], expected_version: Optional[int] = None) -> int:
+        """
+        写入/更新会话，并按 TTL、数量与字节预算淘汰其他会话，返回新的版本号
+
+        给出 expected_version 时只在存储中的版本仍是它时写入，否则抛出 SessionConflictError。
+        """
+        raise NotImplementedError
+
+    def update(
+        self,
+        session_id: str,
+        mutate: Callable[[Dict[str, Any]], None],
+        factory: Optional[Callable[[], Dict[str, Any]]] = None,
+        attempts: int = DEFAULT_UPDATE_ATTEMPTS,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        读取最新版本、应用 mutate 并按版本写回，版本冲突时重新读取再应用，返回写回的会话
+
+        会话不存在时用 factory 新建，没有 factory 时返回 None。mutate 可能执行多次，只应做幂等的字段赋值。
+        """
+        for _ in range(max(1, attempts)):
+            found = self.get_versioned(session_id)
+            if found is None:
+                if factory is None:
+                    return None
+                session = factory()
+                mutate(session)
+                self.save(session_id, session)
+                return session
+            session, version = found
+            mutate(session)
+            try:
+                self.save(session_id, session, expected_version=version)
+                return session
+            except SessionConflictError:
+                continue
+        raise SessionConflictError(f"session {session_id} kept changing during update")
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def get_or_create(self, session_id: str, factory: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        session = self.get(session_id)
+        if session is None:
+            session = factory()
+            with self._lock:
+                self.created += 1
+            self.save(session_id, session)
+        return session
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """进程退出前调用，释放底层资源"""
+
+
+class MemorySessionStore(SessionStore):
+    """
+    进程内会话存储：空闲 TTL + 会话数上限 + 近似字节预算，超出时按 LRU 淘汰
+
+    只适用于单 worker：会话不跨进程共享。
+    过期检查是惰性的：访问时检查该会话，写入时从 LRU 队首清理空闲过久的会话。
+    """
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_SESSION_TTL_SECONDS,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_bytes: int = DEFAULT_SESSION_MAX_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max(1, max_sessions)
+        self.max_bytes = max(0, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.evictions = {reason: 0 for reason in EVICTION_REASONS}
+        self.total_bytes = 0
+        self._clock = clock
+        self._version = 0
+        # session_id -> [会话, 最近访问时间, 近似字节数, 版本号]，按访问顺序排列
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_versioned(self, session_id: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            now = self._clock()
+            if entry is not None and self._expired(entry, now):
+                self._evict(session_id, "ttl")
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[1] = now
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry[0], entry[3]
+
+    def save(self, session_id: str, session: Dict[str, Any], expected_version: Optional[int] = None) -> int:
+        # 重新估算大小，然后清理过期会话并按数量与字节预算淘汰
+        size = estimate_session_bytes(session)
+        with self._lock:
+            now = self._clock()
+            previous = self._entries.get(session_id)
+            if expected_version is not None and (previous is None or previous[3] != expected_version):
+                raise SessionConflictError(f"session {session_id} was modified concurrently")
+            if previous is not None:
+                del self._entries[session_id]
+                self.total_bytes -= previous[2]
+            self._version += 1
+            self._entries[session_id] = [session, now, size, self._version]
+            self.total_bytes += size
+            self._sweep(now)
+            self._enforce_limits()
+            return self._version
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is not None:
+                self.total_bytes -= entry[2]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_sessions": self.max_sessions,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "created": self.created,
+                "evictions": dict(self.evictions),
+            }
+
+    def _expired(self, entry: list, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry[1] > self.ttl_seconds
+
+    def _evict(self, session_id: str, reason: str) -> None:
+        entry = self._entries.pop(session_id)
+        self.total_bytes -= entry[2]
+        self.evictions[reason] += 1
+
+    def _sweep(self, now: float) -> None:
+        # 队首是最久未访问的会话，遇到第一个未过期的即可停止
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if not self._expired(entry, now):
+                break
+            self._evict(session_id, "ttl")
+
+    def _enforce_limits(self) -> None:
+        # 刚写入的会话位于队尾，即使单独超出预算也保留，避免正在进行的请求丢失状态
+        while len(self._entries) > 1:
+            if len(self._entries) > self.max_sessions:
+                reason = "count"
+            elif self.max_bytes and self.total_bytes > self.max_bytes:
+                reason = "bytes"
+            else:
+                break
+            self._evict(next(iter(self._entries)), reason)
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    SQLite（WAL 模式）会话存储：同一台机器上的多个 uvicorn worker 共享会话
+
+    会话以压缩后的紧凑 JSON 保存，每次 save 生成新的 version。
+    每个进程保留一个小的 LRU 读缓存（session_id -> (version, 解压后的 JSON 文本)），读取时只查 version，
+    与缓存一致时省去读取和解压 blob，只解析 JSON。缓存的是不可变的文本，每次 get 都得到新的 dict，
+    调用方未 save 的修改不会残留在缓存里。
+    淘汰规则与 MemorySessionStore 相同，字节预算按压缩后的大小计算；统计计数只覆盖当前进程。
+    """
+
+    backend = "sqlite"
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_SESSION_DB_PATH,
+        ttl_seconds: float = DEFAULT_SESSION_TTL_SECONDS,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_bytes: int = DEFAULT_SESSION_MAX_BYTES,
+        read_cache_size: int = DEFAULT_SESSION_READ_CACHE_SIZE,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max(1, max_sessions)
+        self.max_bytes = max(0, max_bytes)
+        self.read_cache_size = max(0, read_cache_size)
+        self.hits = 0
+        self.misses = 0
+        self.cache_hits = 0
+        self.created = 0
+        self.evictions = {reason: 0 for reason in EVICTION_REASONS}
+        # 多进程共享同一个库，时间戳必须用墙上时钟
+        self._clock = clock
+        self._touch_interval = DEFAULT_TOUCH_INTERVAL_SECONDS
+        if ttl_seconds > 0:
+            self._touch_interval = min(self._touch_interval, ttl_seconds / 10)
+        self._cache: OrderedDict[str, Tuple[int, str]] = OrderedDict()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 同一进程内的线程共享连接并用锁串行化；跨进程的写冲突由 busy timeout 等待
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, "
+            "version INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_accessed ON sessions (accessed)")
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def get_versioned(self, session_id: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        with self._lock:
+            row = self._conn.execute("SELECT version, accessed FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            now = self._clock()
+            if row is not None and self._expired(row[1], now):
+                # version 条件避免删掉其他进程刚刚写入的新版本
+                deleted = self._conn.execute(
+                    "DELETE FROM sessions WHERE id = ? AND version = ?", (session_id, row[0])
+                ).rowcount
+                self._conn.commit()
+                self.evictions["ttl"] += deleted
+                row = None
+            if row is None:
+                self._cache.pop(session_id, None)
+                self.misses += 1
+                return None
+
+            version, accessed = row
+            cached = self._cache.get(session_id)
+            if cached is not None and cached[0] == version:
+                payload = cached[1]
+                self._cache.move_to_end(session_id)
+                self.cache_hits += 1
+            else:
+                row = self._conn.execute("SELECT version, data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if row is None:
+                    self._cache.pop(session_id, None)
+                    self.misses += 1
+                    return None
+                version, payload = row[0], zlib.decompress(row[1]).decode("utf-8")
+                self._remember(session_id, version, payload)
+            if now - accessed > self._touch_interval:
+                self._conn.execute("UPDATE sessions SET accessed = ? WHERE id = ?", (now, session_id))
+                self._conn.commit()
+            self.hits += 1
+        return json.loads(payload), version
+
+    def save(self, session_id: str, session: Dict[str, Any], expected_version: Optional[int] = None) -> int:
+        payload = dump_session(session)
+        blob = zlib.compress(payload.encode("utf-8"))
+        version = secrets.randbits(62)
+        with self._lock:
+            now = self._clock()
+            if expected_version is None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (id, data, size, version, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, blob, len(blob), version, now),
+                )
+            else:
+                # 条件更新在单条语句内完成比较与写入，跨进程同样是原子的
+                updated = self._conn.execute(
+                    "UPDATE sessions SET data = ?, size = ?, version = ?, accessed = ? WHERE id = ? AND version = ?",
+                    (blob, len(blob), version, now, session_id, expected_version),
+                ).rowcount
+                if not updated:
+                    self._conn.rollback()
+                    self._cache.pop(session_id, None)
+                    raise SessionConflictError(f"session {session_id} was modified concurrently")
+            self._sweep(now)
+            self._enforce_limits(session_id)
+            self._conn.commit()
+            self._remember(session_id, version, payload)
+        return version
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._conn.commit()
+            self._cache.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "path": str(self.path),
+                "pid": os.getpid(),
+                "size": size,
+                "max_sessions": self.max_sessions,
+                "bytes": total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "read_cache": {
+                    "size": len(self._cache),
+                    "max_size": self.read_cache_size,
+                    "hits": self.cache_hits,
+                },
+                "created": self.created,
+                "evictions": dict(self.evictions),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _expired(self, accessed: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - accessed > self.ttl_seconds
+
+    def _remember(self, session_id: str, version: int, payload: str) -> None:
+        if not self.read_cache_size:
+            return
+        self._cache[session_id] = (version, payload)
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.read_cache_size:
+            self._cache.popitem(last=False)
+
+    def _drop(self, session_ids: List[str], reason: str) -> None:
+        self._conn.executemany("DELETE FROM sessions WHERE id = ?", [(session_id,) for session_id in session_ids])
+        for session_id in session_ids:
+            self._cache.pop(session_id, None)
+        self.evictions[reason] += len(session_ids)
+
+    def _sweep(self, now: float) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        expired = self._conn.execute(
+            "SELECT id FROM sessions WHERE accessed < ?", (now - self.ttl_seconds,)
+        ).fetchall()
+        if expired:
+            self._drop([row[0] for row in expired], "ttl")
+
+    def _enforce_limits(self, keep: str) -> None:
+        # 与内存实现一致：刚写入的会话不参与淘汰，其余按最近访问时间从旧到新淘汰
+        count, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions").fetchone()
+        if count <= self.max_sessions and not (self.max_bytes and total_bytes > self.max_bytes):
+            return
+        candidates = self._conn.execute(
+            "SELECT id, size FROM sessions WHERE id != ? ORDER BY accessed", (keep,)
+        ).fetchall()
+        evicted: Dict[str, List[str]] = {"count": [], "bytes": []}
+        for session_id, size in candidates:
+            if count > self.max_sessions:
+                reason = "count"
+            elif self.max_bytes and total_bytes > self.max_bytes:
+                reason = "bytes"
+            else:
+                break
+            evicted[reason].append(session_id)
+            count -= 1
+            total_bytes -= size
+        for reason, session_ids in evicted.items():
+            if session_ids:
+                self._drop(session_ids, reason)
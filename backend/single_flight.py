@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    合并并发的相同请求：同一个 key 正在执行时，后到的调用等待同一个结果，不再重复执行
+
+    只合并执行期间到达的重复请求，完成后不缓存结果。实际执行放在独立任务中，
+    某个调用方断开（被取消）不会影响其他等待者；异常会传给所有等待者。
+    计数与去重都只在当前进程内。
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # endpoint -> {"requests", "executed", "collapsed"}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(session_id: str, endpoint: str, payload: Any) -> str:
+        # 键 = 会话 + 接口 + sha256(规范化 JSON 请求体)
+        body = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+        digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        return f"{session_id}\x00{endpoint}\x00{digest}"
+
+    async def run(self, key: str, endpoint: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        counters = self._counters.setdefault(endpoint, {"requests": 0, "executed": 0, "collapsed": 0})
+        counters["requests"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            counters["executed"] += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            counters["collapsed"] += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        endpoints = {endpoint: dict(counters) for endpoint, counters in self._counters.items()}
+        requests = sum(counters["requests"] for counters in endpoints.values())
+        collapsed = sum(counters["collapsed"] for counters in endpoints.values())
+        return {
+            "in_flight": len(self._inflight),
+            "requests": requests,
+            "collapsed": collapsed,
+            "collapse_ratio": round(collapsed / requests, 4) if requests else 0.0,
+            "endpoints": endpoints,
+        }
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有等待者都已断开时，避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
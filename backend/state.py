@@ -1,28 +1,97 @@
 from __future__ import annotations
 
+import os
 import time
-from typing import Any, Dict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
 
-# 简单的内存会话存储，后续可替换为持久化方案
-sessions: Dict[str, Dict[str, Any]] = {}
+from fastapi.concurrency import run_in_threadpool
+
+from backend.session_store import (
+    DEFAULT_MAX_SESSIONS,
+    DEFAULT_SESSION_DB_PATH,
+    DEFAULT_SESSION_MAX_BYTES,
+    DEFAULT_SESSION_READ_CACHE_SIZE,
+    DEFAULT_SESSION_TTL_SECONDS,
+    MemorySessionStore,
+    SessionStore,
+    SqliteSessionStore,
+)
+
+
+@lru_cache(maxsize=1)
+def get_session_store() -> SessionStore:
+    """
+    会话存储，SESSION_BACKEND 选择 memory（默认，仅单 worker）或 sqlite（多 worker 共享）
+
+    TTL、会话数上限与字节预算对两种后端都生效，可通过环境变量配置。
+    """
+    backend = os.getenv("SESSION_BACKEND", "memory").strip().lower()
+    # SESSION_MAX_MB=0 关闭字节预算
+    max_mb = os.getenv("SESSION_MAX_MB", "").strip()
+    limits = {
+        "ttl_seconds": float(os.getenv("SESSION_TTL_SECONDS", str(DEFAULT_SESSION_TTL_SECONDS))),
+        "max_sessions": int(os.getenv("SESSION_MAX_COUNT", str(DEFAULT_MAX_SESSIONS))),
+        "max_bytes": int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_SESSION_MAX_BYTES,
+    }
+    if backend == "sqlite":
+        return SqliteSessionStore(
+            path=Path(os.getenv("SESSION_DB_PATH", str(DEFAULT_SESSION_DB_PATH))),
+            read_cache_size=int(os.getenv("SESSION_READ_CACHE_SIZE", str(DEFAULT_SESSION_READ_CACHE_SIZE))),
+            **limits,
+        )
+    if backend == "memory":
+        return MemorySessionStore(**limits)
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+
+def new_session() -> Dict[str, Any]:
+    return {
+        "state": {
+            "messages": [],
+            "except_job": {},
+            "resume_data": {},
+            "selected_jobs": [],
+            "job_results": [],
+            "url": "",
+            "custom_jd": "",
+        },
+        "current_step": "form",
+    }
 
 
 def get_or_create_session(session_id: str) -> Dict[str, Any]:
     """获取或创建会话"""
-    if session_id not in sessions:
-        sessions[session_id] = {
-            "state": {
-                "messages": [],
-                "except_job": {},
-                "resume_data": {},
-                "selected_jobs": [],
-                "job_results": [],
-                "url": "",
-                "custom_jd": "",
-            },
-            "current_step": "form",
-        }
-    return sessions[session_id]
+    return get_session_store().get_or_create(session_id, new_session)
+
+
+def get_session(session_id: str) -> Optional[Dict[str, Any]]:
+    """获取会话，不存在或已过期时返回 None"""
+    return get_session_store().get(session_id)
+
+
+def save_session(session_id: str, session: Dict[str, Any]) -> None:
+    """会话修改后写回存储，重新计算占用并触发淘汰"""
+    get_session_store().save(session_id, session)
+
+
+def update_session(session_id: str, mutate: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    """在最新版本的会话上应用修改并按版本写回，不覆盖期间其他请求的写入；会话已过期时重新创建"""
+    return get_session_store().update(session_id, mutate, factory=new_session)
+
+
+# 会话存储可能是 SQLite（含最长 30 秒的锁等待），异步接口中统一放到线程池执行，不阻塞事件循环
+async def aget_session(session_id: str) -> Optional[Dict[str, Any]]:
+    return await run_in_threadpool(get_session, session_id)
+
+
+async def aget_or_create_session(session_id: str) -> Dict[str, Any]:
+    return await run_in_threadpool(get_or_create_session, session_id)
+
+
+async def aupdate_session(session_id: str, mutate: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    return await run_in_threadpool(update_session, session_id, mutate)
 
 
 def add_ids_to_resume_data(resume_data: dict) -> dict:
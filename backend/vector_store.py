@@ -0,0 +1,483 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_NUMPY_PATH = Path(__file__).resolve().parent / "numpy_index"
+
+NUMPY_MANIFEST_FILE = "manifest.json"
+NUMPY_EMBEDDINGS_FILE = "embeddings.npy"
+NUMPY_METADATA_FILE = "metadata.json"
+NUMPY_CATEGORY_ROWS_FILE = "category_rows.npy"
+NUMPY_FORMAT_VERSION = 1
+
+VECTOR_BACKENDS = ("chroma", "numpy")
+SCORE_BLOCK_ROWS = 65536
+
+# chromadb 按目录在进程内缓存共享的 System；原地重建后新旧版本打开的是同一目录，按引用计数释放
+_chroma_system_refs: Counter = Counter()
+_chroma_system_lock = threading.Lock()
+
+
+def _atomic_write_npy(path: Path, array: np.ndarray) -> None:
+    # 写临时文件后替换，正在 mmap 旧文件的进程不受影响
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as handle:
+        np.save(handle, array)
+    os.replace(tmp_path, path)
+
+
+def _atomic_write_json(path: Path, payload: Any, **kwargs: Any) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, ensure_ascii=False, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def _chroma_system(collection: Any) -> Any:
+    # Collection._client 是 System 内的 API 组件，chromadb 没有公开从集合取 System 的接口
+    return getattr(getattr(collection, "_client", None), "_system", None)
+
+
+def _release_chroma_system(system: Any) -> None:
+    # 停止 System（HNSW 段、sqlite 连接）并移出 chromadb 的进程级缓存，否则内存与打开的文件一直保留
+    from chromadb.api.shared_system_client import SharedSystemClient
+
+    cache = SharedSystemClient._identifier_to_system
+    for identifier, cached in list(cache.items()):
+        if cached is system:
+            cache.pop(identifier, None)
+    system.stop()
+
+
+def _dot_scores(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    # float32 直接走 BLAS；float16 按块升精度，避免 numpy 的半精度慢路径
+    if matrix.dtype == np.float32:
+        return matrix @ query
+    scores = np.empty(matrix.shape[0], dtype=np.float32)
+    for start in range(0, matrix.shape[0], SCORE_BLOCK_ROWS):
+        block = np.asarray(matrix[start : start + SCORE_BLOCK_ROWS], dtype=np.float32)
+        scores[start : start + block.shape[0]] = block @ query
+    return scores
+
+
+class VectorStore:
+    """向量检索后端接口，query_jobs 只依赖这里定义的方法"""
+
+    backend = ""
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def embedding_dim(self) -> Optional[int]:
+        """建索引时记录的向量维度，旧索引未记录时返回 None"""
+        raise NotImplementedError
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        n_results: int,
+        job_category: Optional[str] = None,
+    ) -> Dict[str, List[Any]]:
+        """返回 {"ids", "metadatas", "distances"}，按余弦距离升序"""
+        raise NotImplementedError
+
+    def get(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """按 id 取 metadata，顺序与输入一致，不存在的 id 返回 None"""
+        raise NotImplementedError
+
+    def category_shard(self, job_category: str) -> Optional["VectorStore"]:
+        """只包含该类别岗位的检索视图，类别过滤查询直接在其中检索；没有对应分片时返回 None"""
+        return None
+
+    def close(self) -> None:
+        """索引版本被替换且排空后调用，释放底层资源"""
+
+
+class CategoryFilteredStore(VectorStore):
+    """
+    在完整索引上按 job_category 过滤的检索视图，过滤条件下推到检索本身（Chroma where / numpy 类别行区间）
+
+    没有分片可用时由类别查询使用，保证该类别岗位足够时返回的都是同类别结果。
+    """
+
+    def __init__(self, store: VectorStore, job_category: str) -> None:
+        self.store = store
+        self.job_category = job_category
+        self.backend = store.backend
+
+    def count(self) -> int:
+        # 过滤后的数量需要额外查询，这里返回上界，实际条数以检索结果为准
+        return self.store.count()
+
+    def embedding_dim(self) -> Optional[int]:
+        return self.store.embedding_dim()
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        n_results: int,
+        job_category: Optional[str] = None,
+    ) -> Dict[str, List[Any]]:
+        return self.store.search(query_embedding, n_results, job_category=self.job_category)
+
+    def get(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        return [
+            metadata if metadata is not None and metadata.get("job_category") == self.job_category else None
+            for metadata in self.store.get(ids)
+        ]
+
+
+class ChromaVectorStore(VectorStore):
+    backend = "chroma"
+
+    def __init__(self, collection, shards: Optional[Dict[str, Any]] = None) -> None:
+        self.collection = collection
+        # job_category -> 分片集合（建索引时 category_shards=True 生成）
+        self.shards: Dict[str, Any] = shards or {}
+        # 分片集合与全局集合同目录，共用一个 System
+        self._system = _chroma_system(collection)
+        if self._system is not None:
+            with _chroma_system_lock:
+                _chroma_system_refs[id(self._system)] += 1
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def embedding_dim(self) -> Optional[int]:
+        recorded = (self.collection.metadata or {}).get("embedding_dim")
+        return int(recorded) if recorded else None
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        n_results: int,
+        job_category: Optional[str] = None,
+    ) -> Dict[str, List[Any]]:
+        results = self.collection.query(
+            query_embeddings=[list(query_embedding)],
+            n_results=n_results,
+            where={"job_category": job_category} if job_category else None,
+            include=["metadatas", "distances"],
+        )
+        return {
+            "ids": results.get("ids", [[]])[0] or [],
+            "metadatas": results.get("metadatas", [[]])[0] or [],
+            "distances": results.get("distances", [[]])[0] or [],
+        }
+
+    def get(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        if not ids:
+            return []
+        results = self.collection.get(ids=list(ids), include=["metadatas"])
+        by_id = dict(zip(results.get("ids") or [], results.get("metadatas") or []))
+        return [by_id.get(job_id) for job_id in ids]
+
+    def category_shard(self, job_category: str) -> Optional[VectorStore]:
+        shard = self.shards.get(job_category)
+        if shard is None:
+            return None
+        return _ChromaShardStore(shard, self.embedding_dim())
+
+    def close(self) -> None:
+        # 该目录的最后一个使用者关闭时释放 System，之后 prune 才能安全删除目录
+        system, self._system = self._system, None
+        if system is None:
+            return
+        with _chroma_system_lock:
+            _chroma_system_refs[id(system)] -= 1
+            released = _chroma_system_refs[id(system)] <= 0
+            if released:
+                del _chroma_system_refs[id(system)]
+        if released:
+            _release_chroma_system(system)
+
+
+class _ChromaShardStore(ChromaVectorStore):
+    # 分片集合自身不记录 embedding_dim，沿用全局集合的维度；只是查询视图，System 由所属的全局 store 释放
+    def __init__(self, collection, dim: Optional[int]) -> None:
+        self.collection = collection
+        self.shards = {}
+        self._system = None
+        self._dim = dim
+
+    def embedding_dim(self) -> Optional[int]:
+        return self._dim
+
+
+class NumpyVectorStore(VectorStore):
+    """基于内存映射 .npy 矩阵的精确余弦检索：一次矩阵向量乘 + argpartition"""
+
+    backend = "numpy"
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with open(self.path / NUMPY_MANIFEST_FILE, "r", encoding="utf-8") as handle:
+            self.manifest: Dict[str, Any] = json.load(handle)
+        if self.manifest.get("format_version") != NUMPY_FORMAT_VERSION:
+            raise ValueError(f"Unsupported numpy index format at {self.path}")
+
+        self.embeddings = np.load(self.path / NUMPY_EMBEDDINGS_FILE, mmap_mode="r")
+        with open(self.path / NUMPY_METADATA_FILE, "r", encoding="utf-8") as handle:
+            sidecar = json.load(handle)
+        self.ids: List[str] = sidecar["ids"]
+        self.columns: Dict[str, List[str]] = sidecar["columns"]
+        self.category_rows = np.load(self.path / NUMPY_CATEGORY_ROWS_FILE, mmap_mode="r")
+        self.category_ranges: Dict[str, List[int]] = self.manifest.get("categories", {})
+        self.row_by_id = {job_id: row for row, job_id in enumerate(self.ids)}
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def embedding_dim(self) -> Optional[int]:
+        return int(self.manifest["dim"]) or None
+
+    def close(self) -> None:
+        # 丢弃对内存映射的引用，由 GC 解除映射（已排空，不会再有查询访问）
+        self.embeddings = np.zeros((0, self.embeddings.shape[1]), dtype=self.embeddings.dtype)
+        self.category_rows = np.zeros(0, dtype=self.category_rows.dtype)
+
+    def metadata_at(self, row: int) -> Dict[str, str]:
+        return {name: values[row] for name, values in self.columns.items()}
+
+    def get(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        rows = [self.row_by_id.get(job_id) for job_id in ids]
+        return [self.metadata_at(row) if row is not None else None for row in rows]
+
+    def category_shard(self, job_category: str) -> Optional[VectorStore]:
+        # 类别行号区间在建索引时已按类别排好，视图只是一段切片，不复制向量
+        if job_category not in self.category_ranges:
+            return None
+        return _NumpyCategoryView(self, job_category)
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        n_results: int,
+        job_category: Optional[str] = None,
+    ) -> Dict[str, List[Any]]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if job_category:
+            start, end = self.category_ranges.get(job_category, (0, 0))
+            rows = np.asarray(self.category_rows[start:end])
+            scores = _dot_scores(self.embeddings[rows], query)
+        else:
+            rows = None
+            scores = _dot_scores(self.embeddings, query)
+
+        n_results = min(n_results, scores.shape[0])
+        if n_results <= 0:
+            return {"ids": [], "metadatas": [], "distances": []}
+        top = np.argpartition(-scores, n_results - 1)[:n_results]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        selected = rows[top] if rows is not None else top
+
+        return {
+            "ids": [self.ids[row] for row in selected],
+            "metadatas": [self.metadata_at(int(row)) for row in selected],
+            "distances": [float(1.0 - score) for score in scores[top]],
+        }
+
+
+class _NumpyCategoryView(VectorStore):
+    backend = "numpy"
+
+    def __init__(self, store: NumpyVectorStore, job_category: str) -> None:
+        self.store = store
+        self.job_category = job_category
+        start, end = store.category_ranges[job_category]
+        self._count = end - start
+
+    def count(self) -> int:
+        return self._count
+
+    def embedding_dim(self) -> Optional[int]:
+        return self.store.embedding_dim()
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        n_results: int,
+        job_category: Optional[str] = None,
+    ) -> Dict[str, List[Any]]:
+        return self.store.search(query_embedding, n_results, job_category=self.job_category)
+
+    def get(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        return [
+            metadata if metadata is not None and metadata.get("job_category") == self.job_category else None
+            for metadata in self.store.get(ids)
+        ]
+
+
+class NumpyIndexWriter:
+    """流式写入 numpy 索引，add/get/update/upsert/delete 与 chromadb Collection 保持一致，便于复用构建流程"""
+
+    def __init__(
+        self,
+        path: Path,
+        reset: bool = False,
+        dtype: str = "float32",
+        embedding_dim: Optional[int] = None,
+        model_name: Optional[str] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.dim: Optional[int] = embedding_dim
+        self.model_name = model_name
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._metadatas: List[Dict[str, Any]] = []
+        self._chunks: List[np.ndarray] = []
+
+        if reset and self.path.exists():
+            shutil.rmtree(self.path)
+        elif (self.path / NUMPY_MANIFEST_FILE).exists():
+            # 非 reset 模式下保留已有数据，新数据追加在后面
+            existing = NumpyVectorStore(self.path)
+            existing_dim = int(existing.embeddings.shape[1])
+            if embedding_dim and existing_dim != embedding_dim:
+                raise ValueError(f"Index {self.path} stores {existing_dim}-dim embeddings, got {embedding_dim}")
+            self.dtype = existing.embeddings.dtype
+            self.dim = existing_dim
+            self.model_name = model_name or existing.manifest.get("embedding_model")
+            self._ids = list(existing.ids)
+            self._rows = dict(existing.row_by_id)
+            self._metadatas = [existing.metadata_at(row) for row in range(existing.count())]
+            self._chunks.append(np.array(existing.embeddings, dtype=self.dtype))
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: List[Dict[str, Any]],
+        documents: Optional[List[str]] = None,
+    ) -> None:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if self.dim is None:
+            self.dim = int(matrix.shape[1])
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match index dimension {self.dim}")
+
+        keep = []
+        for row, job_id in enumerate(ids):
+            if job_id in self._rows:
+                continue
+            self._rows[job_id] = len(self._ids)
+            self._ids.append(job_id)
+            self._metadatas.append(metadatas[row])
+            keep.append(row)
+        if keep:
+            self._chunks.append(matrix[keep].astype(self.dtype))
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        include: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> Dict[str, List[Any]]:
+        if ids is None:
+            start = offset or 0
+            rows = list(range(start, len(self._ids) if limit is None else min(len(self._ids), start + limit)))
+        else:
+            rows = [self._rows[job_id] for job_id in ids if job_id in self._rows]
+        result: Dict[str, List[Any]] = {"ids": [self._ids[row] for row in rows]}
+        if include is None or "metadatas" in include:
+            result["metadatas"] = [self._metadatas[row] for row in rows]
+        return result
+
+    def update(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        for job_id, metadata in zip(ids, metadatas):
+            if job_id in self._rows:
+                self._metadatas[self._rows[job_id]] = metadata
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: List[Dict[str, Any]],
+        documents: Optional[List[str]] = None,
+    ) -> None:
+        # 已存在的 id 原位替换向量与 metadata，其余追加
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        existing = [index for index, job_id in enumerate(ids) if job_id in self._rows]
+        if existing:
+            merged = self._merged()
+            for index in existing:
+                row = self._rows[ids[index]]
+                merged[row] = matrix[index].astype(self.dtype)
+                self._metadatas[row] = metadatas[index]
+        fresh = [index for index, job_id in enumerate(ids) if job_id not in self._rows]
+        if fresh:
+            self.add(
+                ids=[ids[index] for index in fresh],
+                embeddings=matrix[fresh],
+                metadatas=[metadatas[index] for index in fresh],
+            )
+
+    def delete(self, ids: List[str]) -> None:
+        drop = set(ids) & self._rows.keys()
+        if not drop:
+            return
+        keep = [row for row, job_id in enumerate(self._ids) if job_id not in drop]
+        self._chunks = [self._merged()[keep]]
+        self._ids = [self._ids[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._rows = {job_id: row for row, job_id in enumerate(self._ids)}
+
+    def _merged(self) -> np.ndarray:
+        # 合并所有分块为单个可写矩阵
+        if len(self._chunks) != 1:
+            dim = self.dim or 0
+            merged = np.concatenate(self._chunks) if self._chunks else np.zeros((0, dim), dtype=self.dtype)
+            self._chunks = [merged]
+        return self._chunks[0]
+
+    def close(self) -> None:
+        # 先写数据文件，最后写 manifest，manifest 存在即代表索引完整
+        self.path.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.path / NUMPY_MANIFEST_FILE
+        if manifest_path.exists():
+            manifest_path.unlink()
+
+        dim = self.dim or 0
+        embeddings = self._merged()
+        _atomic_write_npy(self.path / NUMPY_EMBEDDINGS_FILE, np.ascontiguousarray(embeddings, dtype=self.dtype))
+
+        column_names = list(self._metadatas[0].keys()) if self._metadatas else []
+        columns = {name: [str(meta.get(name, "")) for meta in self._metadatas] for name in column_names}
+        sidecar = {"ids": self._ids, "columns": columns}
+        _atomic_write_json(self.path / NUMPY_METADATA_FILE, sidecar, separators=(",", ":"))
+
+        # 预先计算每个类别的行号区间，类别过滤时只需切片
+        categories = np.asarray(columns.get("job_category", [""] * len(self._ids)), dtype=object)
+        order = np.argsort(categories, kind="stable") if len(categories) else np.zeros(0, dtype=np.int64)
+        category_rows = order.astype(np.int32)
+        ranges: Dict[str, List[int]] = {}
+        for position, row in enumerate(category_rows):
+            name = categories[row]
+            if name not in ranges:
+                ranges[name] = [position, position]
+            ranges[name][1] = position + 1
+        _atomic_write_npy(self.path / NUMPY_CATEGORY_ROWS_FILE, category_rows)
+
+        manifest = {
+            "format_version": NUMPY_FORMAT_VERSION,
+            "count": len(self._ids),
+            "dim": dim,
+            "dtype": self.dtype.name,
+            "embedding_model": self.model_name,
+            "space": "cosine",
+            "categories": ranges,
+        }
+        _atomic_write_json(manifest_path, manifest, indent=2)
@@ -3,9 +3,19 @@ set -euo pipefail
 
 ROOT_DIR="$(cd -- "$(dirname "$0")" >/dev/null 2>&1 && pwd)"
 
+# 后端 worker 数，默认 1；多 worker 时会话必须放在共享的 SQLite 中
+BACKEND_WORKERS="${BACKEND_WORKERS:-1}"
+if [ "$BACKEND_WORKERS" -gt 1 ]; then
+    export SESSION_BACKEND="${SESSION_BACKEND:-sqlite}"
+    if [ "$SESSION_BACKEND" != "sqlite" ]; then
+        echo "BACKEND_WORKERS=$BACKEND_WORKERS 需要 SESSION_BACKEND=sqlite" >&2
+        exit 1
+    fi
+fi
+
 # 启动后端 (后台)
-echo "正在启动后端服务..."
-(cd "$ROOT_DIR/backend" && uv run uvicorn main:app --host 0.0.0.0 --port 8000) &
+echo "正在启动后端服务 (workers: $BACKEND_WORKERS)..."
+(cd "$ROOT_DIR/backend" && uv run uvicorn main:app --host 0.0.0.0 --port 8000 --workers "$BACKEND_WORKERS") &
 BACKEND_PID=$!
 trap 'echo "正在关闭后端服务..."; kill $BACKEND_PID 2>/dev/null || true' EXIT
 echo "后端服务已启动 (PID: $BACKEND_PID)"
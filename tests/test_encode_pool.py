@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+import pytest
+
+from backend import encode_pool
+from backend.encode_pool import EncodePool
+
+DIM = 4
+
+
+def _embed(documents):
+    return np.array([[len(text), sum(map(ord, text)) % 997, index, 1.0] for index, text in enumerate(documents)])
+
+
+def _stub_worker(worker_id, model_name, device, local_only, quantize, num_threads, tasks, results):
+    # 子进程里不加载模型，用可复算的伪向量代替，只检验分发与按序拼回
+    results.put(("ready", worker_id, (DIM, 128)))
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        seq, documents, _ = task
+        if any(text == "boom" for text in documents):
+            results.put(("error", seq, "boom"))
+            continue
+        results.put(("done", seq, _embed(documents).astype(np.float32)))
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(encode_pool, "_worker_main", _stub_worker)
+    with EncodePool("stub", workers=3) as pool:
+        yield pool
+
+
+def _expected(documents, batch_size):
+    chunks = [documents[start : start + batch_size] for start in range(0, len(documents), batch_size)]
+    return np.concatenate([_embed(chunk) for chunk in chunks]).astype(np.float32)
+
+
+def test_concurrent_callers_get_their_own_rows_in_order(pool):
+    errors = []
+
+    def run(thread_id):
+        try:
+            for round_id in range(15):
+                documents = [f"t{thread_id} r{round_id} d{index}" for index in range(17 + thread_id)]
+                embeddings = pool.encode(documents, batch_size=4)
+                np.testing.assert_array_equal(embeddings, _expected(documents, 4))
+        except Exception as exc:  # noqa: BLE001
+            errors.append(repr(exc))
+
+    threads = [threading.Thread(target=run, args=(thread_id,)) for thread_id in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=120)
+    assert not any(thread.is_alive() for thread in threads)
+    assert errors == []
+    assert pool.stats()["alive"] == 3
+
+
+def test_worker_error_is_raised_to_the_caller(pool):
+    with pytest.raises(RuntimeError, match="boom"):
+        pool.encode(["ok", "boom", "ok"], batch_size=1)
+    assert pool.encode(["still", "works"]).shape == (2, DIM)
+
+
+def test_dead_worker_is_detected(pool):
+    pool._processes[0].terminate()
+    pool._processes[0].join()
+    with pytest.raises(RuntimeError, match="exited unexpectedly"):
+        pool.encode([f"x{index}" for index in range(12)], batch_size=2)
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from backend.index_pipeline import PIPELINE_STAGES, format_pipeline_report, run_pipeline
+
+
+def batches(count, size=3):
+    return ([index * size + offset for offset in range(size)] for index in range(count))
+
+
+def test_batches_flow_through_all_stages_in_order():
+    written = []
+    encode_threads = set()
+
+    def encode(batch):
+        encode_threads.add(threading.get_ident())
+        return [value * 2 for value in batch]
+
+    report = run_pipeline(batches(10), encode, written.append, size_of=len, queue_size=2)
+    assert [value for batch in written for value in batch] == [value * 2 for value in range(30)]
+    assert encode_threads == {threading.get_ident()}
+    assert all(report[stage]["batches"] == 10 and report[stage]["items"] == 30 for stage in PIPELINE_STAGES)
+    assert report["total"]["items"] == 30
+    assert "encode" in format_pipeline_report(report)
+
+
+def test_empty_source_writes_nothing():
+    written = []
+    report = run_pipeline(iter(()), lambda batch: batch, written.append, size_of=len)
+    assert written == []
+    assert report["total"]["items"] == 0
+
+
+@pytest.mark.parametrize("stage", PIPELINE_STAGES)
+def test_error_in_any_stage_is_reraised_and_stops_the_others(stage):
+    produced = []
+
+    def source():
+        for batch in batches(1000):
+            produced.append(batch)
+            if stage == "parse" and len(produced) == 5:
+                raise RuntimeError("parse failed")
+            yield batch
+
+    def encode(batch):
+        if stage == "encode" and batch[0] == 15:
+            raise RuntimeError("encode failed")
+        return batch
+
+    def write(batch):
+        if stage == "write" and batch[0] == 15:
+            raise RuntimeError("write failed")
+
+    with pytest.raises(RuntimeError, match=f"{stage} failed"):
+        run_pipeline(source(), encode, write, size_of=len, queue_size=2)
+    # 有界队列背压：出错后解析阶段不会把整个源读完
+    assert len(produced) < 1000
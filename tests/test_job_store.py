@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+import pytest
+
+from backend.job_store import JobStore, JobStoreWriter, is_job_store_file
+
+COLUMNS = ["职位名称", "job_category", "薪资"]
+
+
+def write_store(path, records, **kwargs):
+    writer = JobStoreWriter(COLUMNS, dictionary_columns=["job_category"], **kwargs)
+    for job_id, record in records:
+        writer.add(job_id, record)
+    writer.save(path)
+    writer.close()
+    return JobStore(path)
+
+
+RECORDS = [
+    ("j3", {"职位名称": "Java 工程师", "job_category": "Java", "薪资": "20k"}),
+    ("j1", {"职位名称": "算法工程师", "job_category": "算法", "薪资": None}),
+    ("j2", {"职位名称": "Java 架构师", "job_category": "Java", "薪资": {"min": 30}}),
+]
+
+
+def test_lookup_by_id_and_row_order(tmp_path):
+    store = write_store(tmp_path / "jobs.bin", RECORDS)
+    assert is_job_store_file(tmp_path / "jobs.bin")
+    assert len(store) == 3
+    assert store.get("j1") == {"职位名称": "算法工程师", "job_category": "算法", "薪资": ""}
+    assert json.loads(store.get("j2")["薪资"]) == {"min": 30}
+    assert store.get("missing") is None
+    assert store.find_rows(["j2", "missing", "j3"]).tolist() == [2, -1, 0]
+    assert store.row_ids() == ["j3", "j1", "j2"]
+    assert [job_id for job_id, _ in store.iter_records(chunk_size=2)] == ["j3", "j1", "j2"]
+
+
+def test_dictionary_column_filters_and_facets(tmp_path):
+    store = write_store(tmp_path / "jobs.bin", RECORDS)
+    column = store.column("job_category")
+    assert column.is_dictionary
+    assert column.equals("Java").tolist() == [True, False, True]
+    assert column.isin(["算法", "不存在"]).tolist() == [False, True, False]
+    assert column.facet() == {"Java": 2, "算法": 1}
+    assert column.facet(np.array([False, True, True])) == {"算法": 1, "Java": 1}
+    assert store.column("职位名称").take([2, 0]) == ["Java 架构师", "Java 工程师"]
+
+
+def test_duplicates_keep_first_write_and_long_ids_do_not_alias(tmp_path):
+    records = RECORDS + [("j3", {"职位名称": "重复"})]
+    store = write_store(tmp_path / "jobs.bin", records)
+    assert store.get("j3")["职位名称"] == "Java 工程师"
+    assert store.get("j33") is None
+
+
+def test_incremental_build_keeps_base_rows_and_applies_removals(tmp_path):
+    base = write_store(tmp_path / "v1.bin", RECORDS)
+    writer = JobStoreWriter(COLUMNS, base=base, dictionary_columns=["job_category"], extra_columns=True)
+    writer.add("j4", {"职位名称": "Go 工程师", "job_category": "Go", "城市": "上海"})
+    writer.add("j1", {"职位名称": "算法专家", "job_category": "算法"})
+    writer.remove(["j2"])
+    writer.save(tmp_path / "v2.bin")
+    writer.close()
+
+    store = JobStore(tmp_path / "v2.bin")
+    assert sorted(store.row_ids()) == ["j1", "j3", "j4"]
+    assert store.get("j1")["职位名称"] == "算法专家"
+    assert store.get("j3")["城市"] == ""
+    assert store.get("j4")["城市"] == "上海"
+    assert store.get("j2") is None
+
+
+def test_rejects_files_that_are_not_job_stores(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a store at all")
+    assert not is_job_store_file(path)
+    with pytest.raises(ValueError):
+        JobStore(path)
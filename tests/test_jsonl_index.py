@@ -0,0 +1,62 @@
+import json
+
+from backend.jsonl_index import JsonlIndex, count_jsonl_records, jsonl_index_path, make_job_id, open_jsonl_index
+
+
+def job(index):
+    return {"公司名称": f"公司{index}", "职位名称": f"岗位{index}", "岗位描述": "负责后端开发"}
+
+
+def write_jobs(path, jobs, mode="w"):
+    with open(path, mode, encoding="utf-8") as handle:
+        for item in jobs:
+            handle.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+
+def test_random_reads_by_row_and_job_id(tmp_path):
+    source = tmp_path / "jobs.jsonl"
+    source.write_bytes(b"\xef\xbb\xbf" + json.dumps(job(0), ensure_ascii=False).encode("utf-8") + b"\n\n  \n")
+    write_jobs(source, [job(1), job(2)], mode="a")
+    index = open_jsonl_index(source)
+    assert len(index) == 3
+    assert index.read_row(0) == job(0)
+    assert index.get(make_job_id(job(2))) == job(2)
+    assert index.get("missing") is None
+    assert jsonl_index_path(source).exists()
+
+
+def test_appended_records_are_scanned_incrementally(tmp_path):
+    source = tmp_path / "jobs.jsonl"
+    write_jobs(source, [job(0), job(1)])
+    open_jsonl_index(source)
+    write_jobs(source, [job(2), job(0)], mode="a")
+
+    index = JsonlIndex.load(source)
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+    # 重复岗位以第一次出现为准
+    assert index.row_by_id[make_job_id(job(0))] == 0
+    assert index.get(make_job_id(job(2))) == job(2)
+
+
+def test_rewritten_source_invalidates_sidecar(tmp_path):
+    source = tmp_path / "jobs.jsonl"
+    write_jobs(source, [job(0), job(1)])
+    open_jsonl_index(source)
+    write_jobs(source, [job(5), job(6), job(7)])
+    assert JsonlIndex.load(source) is None
+    index = open_jsonl_index(source)
+    assert [index.read_row(row) for row in range(len(index))] == [job(5), job(6), job(7)]
+
+
+def test_count_uses_sidecar_and_scans_only_the_tail(tmp_path):
+    source = tmp_path / "jobs.jsonl"
+    write_jobs(source, [job(0), job(1)])
+    assert count_jsonl_records(source) == 2
+    assert not jsonl_index_path(source).exists()
+
+    open_jsonl_index(source)
+    write_jobs(source, [job(2)], mode="a")
+    with open(source, "a", encoding="utf-8") as handle:
+        handle.write("\n")
+    assert count_jsonl_records(source) == 3
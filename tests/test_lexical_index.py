@@ -0,0 +1,56 @@
+from backend.lexical_index import LexicalIndex, LexicalIndexBuilder, load_lexical_index, tokenize_terms
+
+DOCUMENTS = {
+    "java": "Java 后端开发，熟悉 Spring Boot 与 MySQL",
+    "cpp": "C++ 算法工程师，负责 SLAM 与点云处理",
+    "node": "前端开发，熟悉 node.js 与 React",
+    "python": "Python 数据开发，熟悉 Spark 与 SQL",
+}
+
+
+def build(tmp_path, documents=DOCUMENTS):
+    builder = LexicalIndexBuilder()
+    for job_id, document in documents.items():
+        builder.add(job_id, document)
+    path = tmp_path / "jobs.lexical.npz"
+    builder.save(path)
+    return path
+
+
+def test_tokenize_keeps_symbols_and_splits_cjk_into_bigrams():
+    assert tokenize_terms("C++ 与 Node.js 算法工程") == ["c++", "node.js", "与", "算法", "法工", "工程"]
+
+
+def test_search_ranks_matching_document_first(tmp_path):
+    index = LexicalIndex(build(tmp_path))
+    assert len(index) == 4
+    assert index.search("SLAM 算法", top_k=3)[0][0] == "cpp"
+    assert index.search("c++", top_k=3) == index.search("C++", top_k=3)
+    assert index.search("完全无关的词", top_k=3) == []
+    assert index.search("java", top_k=0) == []
+
+
+def test_common_terms_are_ignored(tmp_path):
+    # “开发”出现在四分之三的文档里，超过 max_df_ratio，不参与打分
+    index = LexicalIndex(build(tmp_path))
+    assert index.search("开发", top_k=5) == []
+    assert {job_id for job_id, _ in index.search("开发", top_k=5, max_df_ratio=1.0)} == {"java", "node", "python"}
+
+
+def test_incremental_remove_and_add_keep_postings_consistent(tmp_path):
+    path = build(tmp_path)
+    builder = LexicalIndexBuilder.from_file(path)
+    assert builder.remove(["cpp", "missing"]) == 1
+    builder.add("java", "重复 id 会被忽略")
+    builder.add("go", "Go 微服务开发，熟悉 gRPC")
+    builder.save(path)
+
+    index = load_lexical_index(path)
+    assert sorted(index.ids) == ["go", "java", "node", "python"]
+    assert index.search("SLAM", top_k=3) == []
+    assert index.search("grpc", top_k=3)[0][0] == "go"
+    assert index.search("spring", top_k=3)[0][0] == "java"
+
+
+def test_missing_index_loads_as_none(tmp_path):
+    assert load_lexical_index(tmp_path / "absent.npz") is None
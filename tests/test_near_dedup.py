@@ -0,0 +1,43 @@
+import pytest
+
+from backend.near_dedup import MinHashDeduper, shingle_jaccard
+
+BASE = "负责后端服务的设计与开发，熟悉 Python、Go 与分布式系统，有高并发项目经验，能够独立排查线上问题。"
+
+
+def test_reposts_fold_into_earliest_posting():
+    deduper = MinHashDeduper(threshold=0.8)
+    deduper.add("a", BASE)
+    deduper.add("b", "前端工程师：负责 React 组件库建设与性能优化，熟悉 TypeScript 与构建工具链。")
+    deduper.add("c", BASE + " ")
+    deduper.add("d", BASE + "欢迎投递")
+    canonical_of, cluster_sizes = deduper.clusters()
+    assert canonical_of == {"c": "a", "d": "a"}
+    assert cluster_sizes == {"a": 3}
+
+
+def test_distinct_postings_stay_separate():
+    deduper = MinHashDeduper()
+    for index in range(20):
+        deduper.add(str(index), f"岗位 {index}：" + "".join(chr(0x4E00 + index * 37 + offset) for offset in range(40)))
+    assert deduper.clusters() == ({}, {})
+
+
+def test_empty_text_is_ignored():
+    deduper = MinHashDeduper()
+    deduper.add("a", "   ")
+    deduper.add("b", BASE)
+    assert len(deduper) == 1
+    assert deduper.clusters() == ({}, {})
+
+
+def test_estimate_tracks_exact_jaccard():
+    deduper = MinHashDeduper(num_perm=256, bands=32)
+    variant = BASE[:30] + "熟悉 Java 与 Spring Cloud 微服务架构"
+    assert deduper.estimate_jaccard(BASE, BASE) == 1.0
+    assert deduper.estimate_jaccard(BASE, variant) == pytest.approx(shingle_jaccard(BASE, variant), abs=0.1)
+
+
+def test_num_perm_must_split_into_bands():
+    with pytest.raises(ValueError):
+        MinHashDeduper(num_perm=64, bands=5)
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from backend.session_store import MemorySessionStore, SessionConflictError, SqliteSessionStore, estimate_session_bytes
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    stores = []
+
+    def make(**kwargs):
+        if request.param == "memory":
+            store = MemorySessionStore(**kwargs)
+        else:
+            store = SqliteSessionStore(path=tmp_path / "sessions.sqlite", **kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_count_limit_evicts_least_recently_used(make_store):
+    clock = FakeClock()
+    store = make_store(max_sessions=2, clock=clock)
+    for session_id in ("a", "b"):
+        store.save(session_id, {"id": session_id})
+        clock.now += 100
+    # 超过写回间隔后读取才会刷新 SQLite 中的访问时间
+    assert store.get("a") == {"id": "a"}
+    clock.now += 100
+    store.save("c", {"id": "c"})
+    assert store.get("b") is None
+    assert store.get("a") == {"id": "a"}
+    assert store.stats()["evictions"]["count"] == 1
+
+
+def test_idle_sessions_expire(make_store):
+    clock = FakeClock()
+    store = make_store(ttl_seconds=10, clock=clock)
+    store.save("a", {"n": 1})
+    clock.now += 5
+    assert store.get("a") == {"n": 1}
+    clock.now += 11
+    assert store.get("a") is None
+    assert store.stats()["evictions"]["ttl"] == 1
+
+
+def test_byte_budget_keeps_the_session_just_written():
+    big = {"text": "岗" * 100}
+    store = MemorySessionStore(max_bytes=estimate_session_bytes(big) + 10)
+    store.save("a", big)
+    store.save("b", big)
+    assert store.get("a") is None
+    assert store.get("b") == big
+    store.save("c", {"text": "岗" * 1000})
+    assert len(store) == 1
+    assert store.stats()["evictions"]["bytes"] == 2
+
+
+def test_stale_version_is_rejected(make_store):
+    store = make_store()
+    store.save("a", {"n": 1})
+    session, version = store.get_versioned("a")
+    store.save("a", {"n": 2})
+    with pytest.raises(SessionConflictError):
+        store.save("a", {"n": 3}, expected_version=version)
+    assert store.get("a") == {"n": 2}
+
+
+def test_concurrent_updates_are_not_lost(make_store):
+    store = make_store()
+    store.save("a", {})
+
+    def run(thread_id):
+        for index in range(20):
+            store.update("a", lambda session: session.__setitem__(f"{thread_id}-{index}", index), attempts=1000)
+
+    threads = [threading.Thread(target=run, args=(thread_id,)) for thread_id in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.get("a")) == 80
+
+
+def test_update_creates_missing_session_with_factory(make_store):
+    store = make_store()
+    assert store.update("a", lambda session: session.update(n=1)) is None
+    assert store.update("a", lambda session: session.update(n=1), factory=dict) == {"n": 1}
+    assert store.get("a") == {"n": 1}
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from backend.single_flight import SingleFlight
+
+
+def test_concurrent_duplicates_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"answer": 42}
+
+    async def main():
+        key = SingleFlight.make_key("s1", "/analyze", {"b": 1, "a": 2})
+        return await asyncio.gather(*(flight.run(key, "/analyze", work) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    stats = flight.stats()
+    assert stats["in_flight"] == 0
+    assert stats["endpoints"]["/analyze"] == {"requests": 5, "executed": 1, "collapsed": 4}
+
+
+def test_results_are_not_cached_after_completion():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        return [await flight.run("k", "/e", work), await flight.run("k", "/e", work)]
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_exception_reaches_every_waiter():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("llm down")
+
+    async def main():
+        return await asyncio.gather(*(flight.run("k", "/e", work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [type(result) for result in results] == [ValueError] * 3
+
+
+def test_cancelled_caller_does_not_cancel_other_waiters():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.run("k", "/e", work))
+        second = asyncio.ensure_future(flight.run("k", "/e", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_key_ignores_field_order_but_not_session():
+    key = SingleFlight.make_key("s1", "/e", {"a": 1, "b": 2})
+    assert key == SingleFlight.make_key("s1", "/e", {"b": 2, "a": 1})
+    assert key != SingleFlight.make_key("s2", "/e", {"a": 1, "b": 2})
@@ -0,0 +1,122 @@
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from backend.job_catalog import convert_jsonl_to_catalog  # noqa: E402
+from backend.job_index import (  # noqa: E402
+    DEFAULT_LENGTH_SORT_WINDOW,
+    DEFAULT_MODEL,
+    DEFAULT_SOURCE_PATH,
+    BuildConfig,
+    build_job_index,
+    load_jobs,
+)
+from backend.vector_store import VECTOR_BACKENDS  # noqa: E402
+
+
+def write_synthetic_corpus(source_path: Path, target_path: Path, size: int) -> int:
+    # 循环复制随包附带的岗位，职位名称追加序号使每条的岗位 id 唯一，文本长度分布与真实数据一致
+    jobs = [job for job in load_jobs(source_path) if job.get("岗位描述")]
+    if not jobs:
+        raise ValueError(f"{source_path} has no jobs with descriptions")
+    with open(target_path, "w", encoding="utf-8") as handle:
+        for i in range(size):
+            job = dict(jobs[i % len(jobs)])
+            if i >= len(jobs):
+                job["职位名称"] = f"{job.get('职位名称') or ''} #{i}"
+            handle.write(json.dumps(job, ensure_ascii=False) + "\n")
+    return size
+
+
+def parse_sizes(value: str) -> List[int]:
+    # "1k,10k,100k" -> [1000, 10000, 100000]
+    sizes = []
+    for item in value.lower().split(","):
+        item = item.strip()
+        if item:
+            sizes.append(int(float(item[:-1]) * 1000) if item.endswith("k") else int(item))
+    return sizes
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Profile index builds over synthetic corpora of increasing size.")
+    parser.add_argument("--source-path", default=str(DEFAULT_SOURCE_PATH))
+    parser.add_argument("--sizes", default="1k,10k,100k", help="Comma-separated corpus sizes, e.g. 1k,10k,100k")
+    parser.add_argument("--backend", choices=VECTOR_BACKENDS, default="numpy")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--encode-workers", type=int, default=1)
+    parser.add_argument("--sort-window", type=int, default=DEFAULT_LENGTH_SORT_WINDOW)
+    parser.add_argument("--no-lexical", action="store_true")
+    parser.add_argument("--near-dedup", action="store_true", help="Include the near-duplicate prepass (off by default)")
+    parser.add_argument(
+        "--format",
+        choices=("jsonl", "catalog"),
+        default="jsonl",
+        help="Source format fed to the build; catalog converts each synthetic corpus first",
+    )
+    parser.add_argument("--allow-remote", action="store_true")
+    parser.add_argument("--output", default="bench_build_index.json", help="Combined JSON report path")
+    return parser
+
+
+def main() -> None:
+    parser = build_parser()
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    for size in parse_sizes(args.sizes):
+        with tempfile.TemporaryDirectory(prefix=f"bench-index-{size}-") as tmp:
+            tmp_dir = Path(tmp)
+            corpus_path = tmp_dir / "jobs.jsonl"
+            profile_path = tmp_dir / "profile.json"
+            write_synthetic_corpus(Path(args.source_path), corpus_path, size)
+            if args.format == "catalog":
+                corpus_path = convert_jsonl_to_catalog(corpus_path)
+            # 不使用文档向量缓存，避免不同规模之间互相命中
+            stats = build_job_index(
+                BuildConfig(
+                    source_path=corpus_path,
+                    db_path=tmp_dir / "index",
+                    model_name=args.model,
+                    device=args.device,
+                    batch_size=args.batch_size,
+                    reset=True,
+                    local_only=not args.allow_remote,
+                    backend=args.backend,
+                    lexical=not args.no_lexical,
+                    embedding_cache_path=None,
+                    encode_workers=args.encode_workers,
+                    length_sort_window=args.sort_window,
+                    near_dedup=args.near_dedup,
+                    profile_path=profile_path,
+                )
+            )
+        results.append({"size": size, "format": args.format, **stats.profile})
+
+    print(f"{'size':>8} {'docs/s':>9} {'tokens/s':>10} {'wall s':>8} {'peak MB':>8}  top stages")
+    for result in results:
+        top = ", ".join(
+            f"{name} {stage['share_of_wall']:.0%}" for name, stage in list(result["stages"].items())[:3]
+        )
+        tokens_per_s = result["tokens_per_s"] if result["tokens_per_s"] is not None else "-"
+        peak_rss_mb = result["peak_rss_mb"] if result["peak_rss_mb"] is not None else "-"
+        print(
+            f"{result['size']:>8} {result['docs_per_s']:>9} {tokens_per_s:>10} "
+            f"{result['wall_s']:>8} {peak_rss_mb:>8}  {top}"
+        )
+
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, ensure_ascii=False, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from backend.embedding_batcher import EmbeddingBatcher  # noqa: E402
+from backend.job_index import (  # noqa: E402
+    DEFAULT_MODEL,
+    DEFAULT_SOURCE_PATH,
+    build_job_document,
+    load_embedding_model,
+    load_jobs,
+)
+
+
+def load_query_texts(source_path: Path, count: int) -> List[str]:
+    # 用岗位文本模拟简历查询，长度分布与线上接近
+    texts: List[str] = []
+    for job in load_jobs(source_path):
+        document = build_job_document(job)
+        if document:
+            texts.append(document)
+        if len(texts) >= count:
+            break
+    return texts
+
+
+def run_concurrent(encode_one: Callable[[str], List[float]], texts: List[str], concurrency: int) -> Dict[str, float]:
+    # concurrency 个线程并发地逐条发起查询，统计吞吐与延迟
+    latencies: List[float] = []
+    lock = threading.Lock()
+    cursor = iter(range(len(texts)))
+
+    def worker() -> None:
+        while True:
+            with lock:
+                index = next(cursor, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            encode_one(texts[index])
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "qps": len(texts) / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched vs per-request query encoding.")
+    parser.add_argument("--source-path", default=str(DEFAULT_SOURCE_PATH))
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--queries", type=int, default=128)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--wait-ms", type=float, default=10.0)
+    parser.add_argument("--allow-remote", action="store_true")
+    return parser
+
+
+def main() -> None:
+    parser = build_parser()
+    args = parser.parse_args()
+
+    model = load_embedding_model(model_name=args.model, device=args.device, local_only=not args.allow_remote)
+    texts = load_query_texts(Path(args.source_path), args.queries)
+
+    def encode_batch(batch: List[str]) -> List[List[float]]:
+        embeddings = model.encode(
+            batch,
+            batch_size=len(batch),
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return embeddings.tolist()
+
+    # 预热一次，排除首次推理开销
+    encode_batch(texts[:1])
+
+    for concurrency in [int(value) for value in args.concurrency.split(",") if value.strip()]:
+        per_request = run_concurrent(lambda text: encode_batch([text])[0], texts, concurrency)
+
+        batcher = EmbeddingBatcher(encode_batch, max_batch_size=args.max_batch, max_wait_ms=args.wait_ms)
+        batched = run_concurrent(batcher.encode, texts, concurrency)
+        stats = batcher.stats()
+        batcher.close()
+
+        print(f"concurrency={concurrency}")
+        print(
+            f"  per-request: {per_request['qps']:.1f} q/s, "
+            f"p50 {per_request['p50_ms']:.0f} ms, p95 {per_request['p95_ms']:.0f} ms"
+        )
+        print(
+            f"  batched:     {batched['qps']:.1f} q/s, "
+            f"p50 {batched['p50_ms']:.0f} ms, p95 {batched['p95_ms']:.0f} ms, avg batch {stats['avg_batch']}"
+        )
+        print(f"  speedup:     {batched['qps'] / per_request['qps']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import torch
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from backend.encode_pool import EncodePool  # noqa: E402
+from backend.job_index import (  # noqa: E402
+    DEFAULT_MODEL,
+    DEFAULT_SOURCE_PATH,
+    build_job_document,
+    load_embedding_model,
+    load_jobs,
+)
+
+
+def load_documents(source_path: Path, count: int) -> List[str]:
+    documents: List[str] = []
+    for job in load_jobs(source_path):
+        document = build_job_document(job)
+        if document:
+            documents.append(document)
+        if len(documents) >= count:
+            break
+    return documents
+
+
+def parse_splits(value: str) -> List[Tuple[int, int]]:
+    # "1x64,4x16" -> [(1, 64), (4, 16)]，即 进程数x每进程线程数
+    splits = []
+    for item in value.split(","):
+        if item.strip():
+            workers, threads = item.lower().split("x")
+            splits.append((int(workers), int(threads)))
+    return splits
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare CPU encoding throughput across worker/thread splits.")
+    parser.add_argument("--source-path", default=str(DEFAULT_SOURCE_PATH))
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--splits", default="1x64,2x32,4x16,8x8,16x4", help="Comma-separated WORKERSxTHREADS")
+    parser.add_argument("--allow-remote", action="store_true")
+    return parser
+
+
+def main() -> None:
+    parser = build_parser()
+    args = parser.parse_args()
+
+    documents = load_documents(Path(args.source_path), args.documents)
+    local_only = not args.allow_remote
+    baseline = None
+    for workers, threads in parse_splits(args.splits):
+        if workers == 1:
+            # 单进程基线：与 build_job_index 默认路径一致，只调 torch 线程数
+            torch.set_num_threads(threads)
+            model = load_embedding_model(model_name=args.model, device="cpu", local_only=local_only)
+            encoder, closer = model, None
+        else:
+            pool = EncodePool(args.model, workers=workers, threads_per_worker=threads, local_only=local_only)
+            encoder, closer = pool, pool.close
+
+        # 预热：每个进程至少跑一批
+        encoder.encode(documents[: args.batch_size * workers], batch_size=args.batch_size)
+        start = time.perf_counter()
+        encoder.encode(documents, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        if closer is not None:
+            closer()
+
+        rate = len(documents) / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>3} workers x {threads:>3} threads: {rate:8.1f} docs/s ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,213 +1,37 @@
-from __future__ import annotations
-
 import argparse
-import hashlib
-import json
+import sys
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
-
-import chromadb
-import torch
-from sentence_transformers import SentenceTransformer
-from tqdm import tqdm
-
-DEFAULT_COLLECTION = "offline_jobs"
-DEFAULT_MODEL = "Qwen/Qwen3-Embedding-0.6B"
-DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "backend" / "chromadb_data"
-DEFAULT_SOURCE_PATH = Path(__file__).resolve().parent.parent / "backend" / "data" / "offline_jobs.jsonl"
-
-
-def load_jobs_jsonl(path: Path) -> Iterable[Dict[str, Any]]:
-    # 加载数据
-    with open(path, "r", encoding="utf-8") as handle:
-        for line in handle:
-            line = line.strip()
-            if not line:
-                continue
-            yield json.loads(line)
-
-
-def count_jsonl_lines(path: Path) -> int:
-    count = 0
-    with open(path, "r", encoding="utf-8") as handle:
-        for line in handle:
-            if line.strip():
-                count += 1
-    return count
-
-
-def _safe_text(value: Any) -> str:
-    # 清洗文本
-    if value is None:
-        return ""
-    return str(value).strip()
-
-
-def make_job_id(job: Dict[str, Any]) -> str:
-    # 生成唯一ID
-    key = "|".join(
-        [
-            _safe_text(job.get("公司名称")),
-            _safe_text(job.get("职位名称")),
-            _safe_text(job.get("岗位描述")),
-        ]
-    )
-    return hashlib.sha256(key.encode("utf-8")).hexdigest()
-
-
-def build_job_document(job: Dict[str, Any]) -> str:
-    # 构建embedding文本内容
-    fields = [
-        ("职位名称", job.get("职位名称")),
-        ("所需技能", job.get("所需技能")),
-        ("岗位描述", job.get("岗位描述")),
-    ]
-    parts = [f"{label}: {_safe_text(value)}" for label, value in fields if _safe_text(value)]
-    return "\n".join(parts)
-
-
-def build_job_metadata(job: Dict[str, Any]) -> Dict[str, str]:
-    # 构建metadata
-    metadata = {
-        "公司名称": _safe_text(job.get("公司名称")),
-        "职位名称": _safe_text(job.get("职位名称")),
-        "工作地点": _safe_text(job.get("工作地点")),
-        "薪资范围": _safe_text(job.get("薪资范围")),
-        "工作经验": _safe_text(job.get("工作经验")),
-        "学历要求": _safe_text(job.get("学历要求")),
-        "职位标签": _safe_text(job.get("职位标签")),
-        "所需技能": _safe_text(job.get("所需技能")),
-        "公司规模": _safe_text(job.get("公司规模")),
-        "公司阶段": _safe_text(job.get("公司阶段")),
-        "所属行业": _safe_text(job.get("所属行业")),
-        "岗位描述": _safe_text(job.get("岗位描述")),
-        "job_category": _safe_text(job.get("job_category")),
-        "job_code": _safe_text(job.get("job_code")),
-    }
-    return metadata
-
-
-def load_embedding_model(
-    model_name: str = DEFAULT_MODEL,
-    device: str = "cuda",
-    local_only: bool = True,
-) -> SentenceTransformer:
-    # 加载embedding模型
-    return SentenceTransformer(
-        model_name,
-        device=device,
-        trust_remote_code=True,
-        local_files_only=local_only,
-    )
-
-
-def get_collection(
-    db_path: Path,
-    collection_name: str,
-    reset: bool = False,
-) -> chromadb.Collection:
-    # 获取或创建ChromaDB集合
-    client = chromadb.PersistentClient(path=str(db_path))
-    if reset:
-        try:
-            client.delete_collection(collection_name)
-        except Exception:
-            pass
-    return client.get_or_create_collection(
-        collection_name,
-        metadata={"hnsw:space": "cosine"},
-    )
-
-
-def add_job_batch(
-    collection: chromadb.Collection,
-    model: SentenceTransformer,
-    documents: List[str],
-    metadatas: List[Dict[str, str]],
-    ids: List[str],
-    batch_size: int,
-) -> None:
-    # 批量添加数据到集合
-    with torch.no_grad():
-        embeddings = model.encode(
-            documents,
-            batch_size=batch_size,
-            normalize_embeddings=True,
-            convert_to_numpy=True,
-            show_progress_bar=False,
-        )
-    collection.add(
-        ids=ids,
-        documents=documents,
-        metadatas=metadatas,
-        embeddings=embeddings.tolist(),
-    )
-
-
-def build_job_index(
-    source_path: Path = DEFAULT_SOURCE_PATH,
-    db_path: Path = DEFAULT_DB_PATH,
-    collection_name: str = DEFAULT_COLLECTION,
-    model_name: str = DEFAULT_MODEL,
-    device: str = "cuda",
-    batch_size: int = 32,
-    max_items: Optional[int] = None,
-    reset: bool = False,
-    local_only: bool = True,
-) -> int:
-    # 构建职位数据索引
-    collection = get_collection(db_path, collection_name, reset=reset)
-    model = load_embedding_model(model_name=model_name, device=device, local_only=local_only)
 
-    seen_ids: set[str] = set()
-    docs_batch: List[str] = []
-    metas_batch: List[Dict[str, str]] = []
-    ids_batch: List[str] = []
-    total = 0
-
-    total_lines = count_jsonl_lines(source_path)
-    if max_items:
-        total_lines = min(total_lines, max_items)
-    progress = tqdm(total=total_lines, desc="Indexing jobs", unit="job")
-    for job in load_jobs_jsonl(source_path):
-        job_id = make_job_id(job)
-        if job_id in seen_ids:
-            progress.update(1)
-            continue
-        seen_ids.add(job_id)
-
-        document = build_job_document(job)
-        if not document:
-            progress.update(1)
-            continue
-
-        docs_batch.append(document)
-        metas_batch.append(build_job_metadata(job))
-        ids_batch.append(job_id)
-        total += 1
-
-        if max_items and total >= max_items:
-            progress.update(1)
-            break
-
-        if len(docs_batch) >= batch_size:
-            add_job_batch(collection, model, docs_batch, metas_batch, ids_batch, batch_size=batch_size)
-            docs_batch = []
-            metas_batch = []
-            ids_batch = []
-        progress.update(1)
-
-    if docs_batch:
-        add_job_batch(collection, model, docs_batch, metas_batch, ids_batch, batch_size=batch_size)
-    progress.close()
-
-    return total
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from backend.build_profile import DEFAULT_PROFILE_PATH  # noqa: E402
+from backend.document_embedding_cache import DEFAULT_DOCUMENT_CACHE_PATH  # noqa: E402
+from backend.index_pipeline import DEFAULT_PIPELINE_QUEUE_SIZE, format_pipeline_report  # noqa: E402
+from backend.index_snapshots import DEFAULT_KEEP_SNAPSHOTS  # noqa: E402
+from backend.job_index import (  # noqa: E402
+    DEFAULT_COLLECTION,
+    DEFAULT_DB_PATH,
+    DEFAULT_LENGTH_SORT_WINDOW,
+    DEFAULT_MODEL,
+    DEFAULT_SOURCE_PATH,
+    BuildConfig,
+    BuildStats,
+    build_job_index,
+)
+from backend.near_dedup import DEFAULT_DEDUP_THRESHOLD  # noqa: E402
+from backend.vector_store import DEFAULT_NUMPY_PATH, VECTOR_BACKENDS  # noqa: E402
 
 
 def build_parser() -> argparse.ArgumentParser:
-    parser = argparse.ArgumentParser(description="Build Chroma index from offline jobs JSONL.")
+    parser = argparse.ArgumentParser(description="Build Chroma or numpy index from offline jobs JSONL.")
     parser.add_argument("--source-path", default=str(DEFAULT_SOURCE_PATH))
-    parser.add_argument("--db-path", default=str(DEFAULT_DB_PATH))
+    parser.add_argument("--backend", choices=VECTOR_BACKENDS, default="chroma")
+    parser.add_argument(
+        "--db-path",
+        default=None,
+        help=f"Index root (default: {DEFAULT_DB_PATH} for chroma, {DEFAULT_NUMPY_PATH} for numpy)",
+    )
     parser.add_argument("--collection", default=DEFAULT_COLLECTION)
     parser.add_argument("--model", default=DEFAULT_MODEL)
     parser.add_argument("--device", default="cuda")
@@ -215,16 +39,130 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--max-items", type=int, default=None)
     parser.add_argument("--reset", action="store_true")
     parser.add_argument("--allow-remote", action="store_true")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32", help="numpy backend only")
+    parser.add_argument(
+        "--embedding-dim",
+        type=int,
+        default=None,
+        help="Truncate embeddings to this many dimensions (Matryoshka) and record it in the index",
+    )
+    parser.add_argument("--no-lexical", action="store_true", help="Skip building the BM25 index for hybrid search")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only embed jobs missing from the index; update metadata of existing ones",
+    )
+    parser.add_argument("--prune", action="store_true", help="With --incremental, delete ids no longer in the source")
+    parser.add_argument(
+        "--embedding-cache",
+        default=str(DEFAULT_DOCUMENT_CACHE_PATH),
+        help="SQLite cache of document embeddings reused across rebuilds",
+    )
+    parser.add_argument("--no-embedding-cache", action="store_true", help="Always run the model for every document")
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_PIPELINE_QUEUE_SIZE,
+        help="Batches buffered between the parse, encode and write stages",
+    )
+    parser.add_argument(
+        "--encode-workers",
+        type=int,
+        default=1,
+        help="CPU only: encode with this many processes, each holding its own model copy",
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=None,
+        help="torch threads per encode worker (default: cpu_count // encode-workers)",
+    )
+    parser.add_argument(
+        "--sort-window",
+        type=int,
+        default=DEFAULT_LENGTH_SORT_WINDOW,
+        help="Buffer this many documents and batch them by token length to cut padding (0 keeps file order)",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=None,
+        help="Size each encode batch so batch size x longest sequence stays under this many tokens",
+    )
+    parser.add_argument(
+        "--near-dedup",
+        action="store_true",
+        help="Fold near-duplicate reposts into their earliest posting; the others are not indexed",
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEFAULT_DEDUP_THRESHOLD,
+        help="With --near-dedup, estimated Jaccard similarity above which two postings count as near-duplicates",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="Build into <db-path>/versions/<timestamp> and publish it via the <db-path>/current pointer",
+    )
+    parser.add_argument("--keep-snapshots", type=int, default=DEFAULT_KEEP_SNAPSHOTS)
+    parser.add_argument(
+        "--category-shards",
+        action="store_true",
+        help="Chroma only: also write one collection per job_category so filtered searches skip the global index",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_PROFILE_PATH,
+        default=None,
+        help=f"Write per-stage timing, throughput and peak RSS as JSON (default path: {DEFAULT_PROFILE_PATH})",
+    )
     return parser
 
 
+def print_build_stats(config: BuildConfig, stats: BuildStats) -> None:
+    if config.near_dedup:
+        print(
+            f"Near-duplicates: {stats.near_duplicates} postings folded into "
+            f"{stats.near_duplicate_clusters} clusters"
+        )
+    print("Pipeline stages:")
+    print(format_pipeline_report(stats.pipeline))
+    if stats.unchanged is not None:
+        print(
+            f"Incremental sync: {stats.new} new, {stats.reembedded} re-embedded, "
+            f"{stats.updated} metadata updated, {stats.removed} removed, {stats.unchanged} unchanged"
+        )
+    cache = stats.embedding_cache
+    if cache is not None:
+        print(
+            f"Embedding cache: {cache['hits']} hits, {cache['misses']} misses "
+            f"(hit ratio {cache['hit_ratio']:.1%}) at {cache['path']}"
+        )
+    if stats.category_shards:
+        print(f"Category shards: {len(stats.category_shards)} ({', '.join(stats.category_shards)})")
+    print(f"Job store: {stats.stored_jobs} jobs at {stats.job_store_path}")
+    if stats.snapshot_version is not None:
+        print(
+            f"Published snapshot {stats.snapshot_version} ({stats.indexed_jobs} jobs); "
+            f"pruned {len(stats.pruned_snapshots)} old snapshot(s)"
+        )
+    if stats.profile is not None:
+        profile = stats.profile
+        peak_rss = f"{profile['peak_rss_mb']} MB" if profile["peak_rss_mb"] is not None else "n/a"
+        print(f"Profile: {profile['docs_per_s']} docs/s, peak RSS {peak_rss} -> {config.profile_path}")
+
+
 def main() -> None:
     parser = build_parser()
     args = parser.parse_args()
 
-    total = build_job_index(
+    default_db_path = DEFAULT_NUMPY_PATH if args.backend == "numpy" else DEFAULT_DB_PATH
+    db_path = Path(args.db_path) if args.db_path else default_db_path
+    config = BuildConfig(
         source_path=Path(args.source_path),
-        db_path=Path(args.db_path),
+        db_path=db_path,
         collection_name=args.collection,
         model_name=args.model,
         device=args.device,
@@ -232,9 +170,29 @@ def main() -> None:
         max_items=args.max_items,
         reset=args.reset,
         local_only=not args.allow_remote,
+        backend=args.backend,
+        dtype=args.dtype,
+        embedding_dim=args.embedding_dim,
+        lexical=not args.no_lexical,
+        incremental=args.incremental,
+        prune=args.prune,
+        embedding_cache_path=None if args.no_embedding_cache else Path(args.embedding_cache),
+        pipeline_queue_size=args.queue_size,
+        encode_workers=args.encode_workers,
+        threads_per_worker=args.threads_per_worker,
+        length_sort_window=args.sort_window,
+        token_budget=args.token_budget,
+        near_dedup=args.near_dedup,
+        dedup_threshold=args.dedup_threshold,
+        snapshot=args.snapshot,
+        keep_snapshots=args.keep_snapshots,
+        profile_path=Path(args.profile) if args.profile else None,
+        category_shards=args.category_shards,
     )
+    stats = build_job_index(config)
+    print_build_stats(config, stats)
 
-    print(f"Indexed {total} jobs into {args.collection} at {args.db_path}")
+    print(f"Indexed {stats.new} jobs into {args.collection} at {db_path} ({args.backend})")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+import numpy as np  # noqa: E402
+
+from backend.job_index import DEFAULT_SOURCE_PATH, find_near_duplicates, load_jobs  # noqa: E402
+from backend.jsonl_index import make_job_id, safe_text  # noqa: E402
+from backend.near_dedup import DEFAULT_DEDUP_THRESHOLD, MinHashDeduper, shingle_jaccard  # noqa: E402
+
+# 64 个排列时单对估计的标准差不超过 0.0625，容差约取 2.4 倍
+DEFAULT_PAIR_TOLERANCE = 0.15
+DEFAULT_MEAN_TOLERANCE = 0.05
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Check that near-duplicate folding agrees with exact shingle Jaccard on real data."
+    )
+    parser.add_argument("--source-path", default=str(DEFAULT_SOURCE_PATH))
+    parser.add_argument("--threshold", type=float, default=DEFAULT_DEDUP_THRESHOLD)
+    parser.add_argument("--pair-tolerance", type=float, default=DEFAULT_PAIR_TOLERANCE)
+    parser.add_argument("--mean-tolerance", type=float, default=DEFAULT_MEAN_TOLERANCE)
+    return parser
+
+
+def main() -> None:
+    parser = build_parser()
+    args = parser.parse_args()
+
+    source_path = Path(args.source_path)
+    # 与建索引的预扫描走同一入口，检查的是实际会被折叠的岗位
+    canonical_of, cluster_sizes = find_near_duplicates(source_path, threshold=args.threshold)
+    texts: Dict[str, str] = {}
+    for job in load_jobs(source_path):
+        job_id = make_job_id(job)
+        if job_id not in texts:
+            texts[job_id] = " ".join(safe_text(job.get(key)) for key in ("公司名称", "职位名称", "岗位描述"))
+
+    deduper = MinHashDeduper(threshold=args.threshold)
+    pairs = list(canonical_of.items())
+    estimated = np.asarray([deduper.estimate_jaccard(texts[dup], texts[rep]) for dup, rep in pairs])
+    exact = np.asarray([shingle_jaccard(texts[dup], texts[rep]) for dup, rep in pairs])
+    print(f"{len(texts)} unique jobs, {len(pairs)} folded into {len(cluster_sizes)} clusters")
+    if not pairs:
+        return
+
+    errors = np.abs(estimated - exact)
+    print(
+        f"exact Jaccard of folded pairs: median {np.median(exact):.3f}, min {exact.min():.3f}; "
+        f"|estimate - exact|: mean {errors.mean():.3f}, max {errors.max():.3f}"
+    )
+    failed = False
+    for (dup, rep), est, true in zip(pairs, estimated, exact):
+        if abs(est - true) > args.pair_tolerance:
+            print(f"  {dup} -> {rep}: estimated {est:.3f}, exact {true:.3f}")
+            failed = True
+    if errors.mean() > args.mean_tolerance:
+        print(f"mean error {errors.mean():.3f} exceeds {args.mean_tolerance}")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
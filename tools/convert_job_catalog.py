@@ -0,0 +1,40 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from backend.job_catalog import JobCatalog, convert_jsonl_to_catalog  # noqa: E402
+from backend.job_index import DEFAULT_SOURCE_PATH  # noqa: E402
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Convert the offline jobs JSONL into a columnar job catalog.")
+    parser.add_argument("--source-path", default=str(DEFAULT_SOURCE_PATH))
+    parser.add_argument("--output", default=None, help="Catalog path (default: <source>.catalog)")
+    parser.add_argument("--facet", default="job_category", help="Column to summarize after conversion")
+    return parser
+
+
+def main() -> None:
+    parser = build_parser()
+    args = parser.parse_args()
+
+    source_path = Path(args.source_path)
+    start = time.perf_counter()
+    target_path = convert_jsonl_to_catalog(source_path, Path(args.output) if args.output else None)
+    elapsed = time.perf_counter() - start
+
+    catalog = JobCatalog(target_path)
+    unique = int(catalog.first_occurrence().sum())
+    size_ratio = target_path.stat().st_size / max(1, source_path.stat().st_size)
+    print(f"Wrote {len(catalog)} jobs ({unique} unique) to {target_path} in {elapsed:.2f}s ({size_ratio:.0%} of JSONL)")
+    if args.facet and args.facet in catalog.columns:
+        for value, count in catalog.facet(args.facet).items():
+            print(f"  {value or '<empty>'}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from backend.job_index import (  # noqa: E402
+    DEFAULT_MODEL,
+    DEFAULT_SOURCE_PATH,
+    QUANTIZE_MODES,
+    check_quantized_agreement,
+    dimension_recall_report,
+    truncate_embeddings,
+)
+from backend.resume_query import DEFAULT_QUERY_MAX_TOKENS, build_resume_query, truncate_to_tokens  # noqa: E402
+
+
+def compare_resume_queries(resume_path: Path, k: int = 20, repeats: int = 5) -> Dict[str, Any]:
+    # 对比完整 JSON 与紧凑查询文本的长度、编码耗时和 top-k 结果重合度（模型与索引取自后端环境变量配置）
+    import numpy as np
+
+    from backend.job_search import get_embedding_model, get_job_collection
+
+    with open(resume_path, "r", encoding="utf-8") as handle:
+        resume_data = json.load(handle)
+    model = get_embedding_model()
+    store = get_job_collection()
+    variants = {
+        "json": json.dumps(resume_data, ensure_ascii=False, indent=2),
+        "compact": truncate_to_tokens(build_resume_query(resume_data), model.tokenizer, DEFAULT_QUERY_MAX_TOKENS),
+    }
+
+    model.encode(["warm-up"], show_progress_bar=False)
+    report: Dict[str, Any] = {}
+    top_ids = {}
+    for name, text in variants.items():
+        start = time.perf_counter()
+        for _ in range(repeats):
+            embedding = model.encode([text], normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / repeats
+        embedding = truncate_embeddings(embedding[0], store.embedding_dim())
+        top_ids[name] = store.search(np.asarray(embedding, dtype=np.float32).tolist(), n_results=k)["ids"]
+        report[name] = {
+            "chars": len(text),
+            "tokens": len(model.tokenizer(text, add_special_tokens=False)["input_ids"]),
+            "encode_ms": elapsed_ms,
+        }
+
+    overlap = len(set(top_ids["json"]) & set(top_ids["compact"]))
+    report[f"overlap@{k}"] = overlap / k if k else 0.0
+    report["encode_speedup"] = report["json"]["encode_ms"] / report["compact"]["encode_ms"]
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Quality/latency reports for embedding model variants.")
+    parser.add_argument("--source-path", default=str(DEFAULT_SOURCE_PATH))
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--sample-size", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--allow-remote", action="store_true")
+    parser.add_argument(
+        "--quantize",
+        choices=[mode for mode in QUANTIZE_MODES if mode != "none"],
+        help="Compare a quantized CPU backend against the fp32 model",
+    )
+    parser.add_argument("--dims", help="Comma-separated truncated dimensions for a recall@k report, e.g. 128,256,512")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument(
+        "--resume",
+        help="Resume JSON file: compare the compact query serializer with the raw JSON dump (uses backend env config)",
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    return parser
+
+
+def main() -> None:
+    parser = build_parser()
+    args = parser.parse_args()
+
+    report = {}
+    if args.quantize:
+        report["quantize"] = {
+            "mode": args.quantize,
+            **check_quantized_agreement(
+                source_path=Path(args.source_path),
+                model_name=args.model,
+                quantize=args.quantize,
+                sample_size=args.sample_size,
+                batch_size=args.batch_size,
+                local_only=not args.allow_remote,
+            ),
+        }
+
+    if args.dims:
+        dims = [int(value) for value in args.dims.split(",") if value.strip()]
+        recalls = dimension_recall_report(
+            source_path=Path(args.source_path),
+            model_name=args.model,
+            dims=dims,
+            k=args.k,
+            sample_size=args.sample_size,
+            device=args.device,
+            batch_size=args.batch_size,
+            local_only=not args.allow_remote,
+        )
+        report["dims"] = {f"recall@{args.k}": {str(dim): recall for dim, recall in recalls.items()}}
+
+    if args.resume:
+        report["resume_query"] = compare_resume_queries(Path(args.resume), k=args.k, repeats=args.repeats)
+
+    if not report:
+        parser.error("nothing to report, pass --quantize, --dims and/or --resume")
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,9 @@ from tqdm import tqdm
 ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(ROOT_DIR))
 
+from backend.job_catalog import convert_jsonl_to_catalog  # noqa: E402
+from backend.jsonl_index import open_jsonl_index  # noqa: E402
+
 
 DEFAULT_OUTPUT_DIR = ROOT_DIR / "backend" / "data" / "offline_jobs"
 DEFAULT_COMBINED_PATH = ROOT_DIR / "backend" / "data" / "offline_jobs.jsonl"
@@ -365,6 +368,7 @@ async def crawl_jobs(
     city: str,
     job_type: str,
     append: bool,
+    catalog: bool = False,
 ) -> None:
     mode = "a" if append else "w"
     with open(combined_path, mode, encoding="utf-8") as combined_file:
@@ -393,6 +397,15 @@ async def crawl_jobs(
             appended = append_csv_to_jsonl(Path(csv_path), combined_file, job_name, job_code)
             print(f"Added {appended} rows to {combined_path}")
 
+    # 更新 .idx 偏移索引：追加模式只扫描新增行，覆盖写入时整体重建
+    job_index = open_jsonl_index(combined_path)
+    print(f"Indexed {len(job_index)} rows in {combined_path}.idx")
+
+    # 可选：同时输出列式岗位目录，建索引时可直接读取，省去 JSON 解析
+    if catalog:
+        catalog_path = convert_jsonl_to_catalog(combined_path)
+        print(f"Wrote job catalog to {catalog_path}")
+
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Offline crawl jobs and build a JSONL dataset.")
@@ -404,6 +417,11 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR))
     parser.add_argument("--combined-path", default=str(DEFAULT_COMBINED_PATH))
     parser.add_argument("--append", action="store_true", help="Append to combined JSONL instead of overwrite")
+    parser.add_argument(
+        "--catalog",
+        action="store_true",
+        help="Also write a columnar job catalog (.catalog) next to the combined JSONL",
+    )
     return parser
 
 
@@ -430,6 +448,7 @@ def main() -> None:
         city=args.city,
         job_type=args.job_type,
         append=args.append,
+        catalog=args.catalog,
     )
 
 